@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,11 +79,195 @@ WSGI_APPLICATION = 'advanced_api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite pragmas run on every new connection:
+# - busy_timeout: wait for a lock instead of failing at once with
+#   "database is locked" (first, so the journal mode switch waits too)
+# - journal_mode=WAL: readers and the writer no longer block each other
+# - synchronous=NORMAL: with WAL, fsync at checkpoints instead of every
+#   commit (a power loss may drop the last commits but cannot corrupt)
+# - mmap_size: read pages through a memory map instead of read() calls
+# Transactions start with BEGIN IMMEDIATE: a writer then waits for the lock
+# up front, instead of failing when a read transaction cannot be upgraded.
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': ';'.join([
+        f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    ]),
+    # Closed connections go back to a per-process pool and are reused by
+    # the next request, in any thread (see api/sqlite_pool/base.py)
+    'pool': {
+        'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 8)),
+        'MAX_AGE': 300,
+        'HEALTH_CHECKS': True,
+    },
+}
+
+# Each thread keeps its connection for CONN_MAX_AGE seconds (checked with
+# CONN_HEALTH_CHECKS before a request reuses it). Under ASGI, where
+# requests run in short-lived threads, set DB_CONN_MAX_AGE=0: connections
+# are then returned to the pool after every request.
+CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# 'replica' is a read replica used only when API_READ_REPLICAS is enabled
+# (see api/replicas.py). Locally it is a second SQLite file kept in sync
+# with `manage.py replicate_db`; tests mirror it onto 'default'.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api.sqlite_pool',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    'replica': {
+        'ENGINE': 'api.sqlite_pool',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['api.replicas.ReadReplicaRouter']
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The 'api' alias holds cached API responses. Swap the backend for
+# 'django.core.cache.backends.filebased.FileBasedCache' or
+# 'django.core.cache.backends.redis.RedisCache' to share it between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-responses',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Response cache for the read-only Book and Author views (see api/cache.py)
+API_RESPONSE_CACHE = {
+    'ALIAS': 'api',
+    'TIMEOUT': 300,
+    'ENABLED': True,
+}
+
+# Serialize GET responses of the Book and Author read views with compiled
+# field plans instead of DRF field objects (see api/read_serializers.py)
+API_FAST_READ_SERIALIZERS = True
+
+# Per-request SQL/serializer/render profiling (see api/profiling.py).
+# Timings are sent as a Server-Timing header and logged on 'api.profiling';
+# slow requests are logged with their SQL on 'api.profiling.slow'. Statement
+# parameters hold token keys and request data, so keep SLOW_LOG_PARAMS off
+# outside of local debugging.
+API_PROFILING = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_SAMPLE_RATE': 1.0,
+    'SLOW_LOG_PARAMS': False,
+}
+
+# Page-number pagination counts: exact up to THRESHOLD rows, estimated above
+# it, cached per filter for TIMEOUT seconds (see api/counting.py)
+API_COUNT_ESTIMATES = {
+    'ENABLED': True,
+    'THRESHOLD': 10000,
+    'TIMEOUT': 30,
+}
+
+# Negotiated gzip/Brotli response compression (see api/compression.py).
+# Brotli is offered only when the 'brotli' or 'brotlicffi' package is installed.
+# HTML pages are never compressed (BREACH), only API JSON/NDJSON/CSV bodies.
+API_COMPRESSION = {
+    'ENABLED': True,
+    'ENCODINGS': ('br', 'gzip'),
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'PATH_PREFIXES': ('/api/',),
+}
+
+# Stream JSON list responses with at least MIN_ITEMS results in chunks
+# instead of rendering the whole body at once (see api/renderers.py)
+API_STREAMING_JSON = {
+    'ENABLED': True,
+    'MIN_ITEMS': 50,
+    'CHUNK_SIZE': 16384,
+}
+
+# Sliding-window rate limits for the write endpoints, per scope and user
+# (anonymous clients per address). BACKEND 'cache' shares the counters
+# through CACHE_ALIAS across processes (see api/throttling.py)
+API_THROTTLING = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        'book-write': '120/min',
+        'book-bulk': '30/min',
+        'auth-token': '20/min',
+    },
+}
+
+# Funnel book create/update/delete through one writer thread that commits
+# them in batches, instead of one SQLite transaction per request
+# (see api/write_queue.py). Off by default.
+API_WRITE_COALESCING = {
+    'ENABLED': False,
+    'MAX_BATCH': 100,
+    'FLUSH_INTERVAL': 0.002,
+    'TIMEOUT': 30,
+}
+
+# Send the reads of the Book/Author read views to the replicas; clients are
+# pinned to the primary for STICKY_SECONDS after a write (see
+# api/replicas.py). Set API_READ_REPLICAS=1 to enable.
+API_READ_REPLICAS = {
+    'ENABLED': os.environ.get('API_READ_REPLICAS') == '1',
+    'ALIASES': ['replica'],
+    'STICKY_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+# Token -> user cache for CachedTokenAuthentication (see api/authentication.py)
+API_TOKEN_CACHE = {
+    'ENABLED': True,
+    'MAX_SIZE': 10000,
+    'TIMEOUT': 60,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Set API_PROFILING_LOG_LEVEL=INFO to emit the profile lines
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': os.environ.get('API_PROFILING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        # Set API_PROFILING_SLOW_LOG_LEVEL=INFO to emit the sampled slow requests
+        'api.profiling.slow': {
+            'handlers': ['console'],
+            'level': os.environ.get('API_PROFILING_SLOW_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -128,12 +315,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.StreamingJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.SlidingWindowThrottle',
+    ],
+    # Number of trusted proxies in front of the app. With 0, anonymous
+    # clients are throttled by REMOTE_ADDR and X-Forwarded-For is ignored,
+    # so it cannot be spoofed to get a fresh rate limit.
+    'NUM_PROXIES': int(os.environ.get('API_NUM_PROXIES', 0)),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'MAX_PAGE_SIZE': 100,
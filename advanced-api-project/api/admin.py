@@ -1,5 +1,71 @@
+import re
+
 from django.contrib import admin
-from .models import Author, Book
+from .models import Author, Book, CatalogStat
+
+
+def is_integer(value, signed=False):
+    """
+    Return True if a filter value is an integer the database can compare.
+
+    Only ASCII digits are accepted (``str.isdigit()`` also accepts '²',
+    which ``int()`` rejects), and at most 18 of them, so the value fits a
+    64-bit column.
+    """
+    pattern = r'-?[0-9]{1,18}' if signed else r'[0-9]{1,18}'
+    return re.fullmatch(pattern, value) is not None
+
+
+class TopAuthorListFilter(admin.SimpleListFilter):
+    """
+    Author filter listing only the authors with the most books.
+    
+    The default ``RelatedFieldListFilter`` renders every Author as a choice,
+    which does not scale to 100k authors. This filter offers the
+    ``max_choices`` authors with the most books (read through the
+    ``book_count`` index) plus the currently selected author; any other
+    author is reachable with ``?author__id__exact=<id>`` (the same parameter
+    as the default filter) or the search box.
+    """
+    title = 'author'
+    parameter_name = 'author__id__exact'
+    max_choices = 20
+    
+    def lookups(self, request, model_admin):
+        authors = list(
+            Author.objects.filter(book_count__gt=0).order_by('-book_count', 'pk').values_list('pk', 'name')[:self.max_choices]
+        )
+        selected = self.value()
+        if selected and is_integer(selected) and int(selected) not in {pk for pk, _ in authors}:
+            authors.extend(Author.objects.filter(pk=selected).values_list('pk', 'name'))
+        return authors
+    
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        return queryset.filter(author_id=value) if is_integer(value) else queryset.none()
+
+
+class PublicationYearListFilter(admin.SimpleListFilter):
+    """
+    Publication year filter whose choices come from the CatalogStat summary.
+    
+    Reads the per-year rows of the summary table (see api/stats.py) instead
+    of a ``SELECT DISTINCT publication_year`` over every book.
+    """
+    title = 'publication year'
+    parameter_name = 'publication_year'
+    
+    def lookups(self, request, model_admin):
+        years = CatalogStat.objects.filter(dimension=CatalogStat.YEAR, count__gt=0).order_by('-value')
+        return [(year, str(year)) for year in years.values_list('value', flat=True)]
+    
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        return queryset.filter(publication_year=value) if is_integer(value, signed=True) else queryset.none()
 
 
 @admin.register(Author)
@@ -8,16 +74,14 @@ class AuthorAdmin(admin.ModelAdmin):
     Admin configuration for the Author model.
     
     Provides a user-friendly interface for managing authors in the Django admin.
-    Includes list display, filtering, and search capabilities.
+    Includes list display, filtering, and search capabilities. ``search_fields``
+    also backs the paginated author autocomplete on the Book form.
     """
     list_display = ('name', 'book_count')
     search_fields = ('name',)
     ordering = ('name',)
-    
-    def book_count(self, obj):
-        """Display the number of books by this author."""
-        return obj.books.count()
-    book_count.short_description = 'Number of Books'
+    readonly_fields = ('book_count',)
+    show_full_result_count = False
 
 
 @admin.register(Book)
@@ -28,9 +92,16 @@ class BookAdmin(admin.ModelAdmin):
     Provides a user-friendly interface for managing books in the Django admin.
     Includes list display, filtering, and search capabilities with proper
     foreign key relationship handling.
+    
+    The changelist reads the ``author_name`` snapshot, so it needs no join or
+    per-row author query. The author is picked with a paginated autocomplete
+    widget instead of a <select> of every author, and the list filters do
+    not enumerate the Author or Book tables.
     """
-    list_display = ('title', 'author', 'publication_year')
-    list_filter = ('author', 'publication_year')
-    search_fields = ('title', 'author__name')
+    list_display = ('title', 'author_name', 'publication_year')
+    list_filter = (TopAuthorListFilter, PublicationYearListFilter)
+    search_fields = ('title', 'author_name')
     ordering = ('title',)
-    list_select_related = ('author',)
\ No newline at end of file
+    autocomplete_fields = ('author',)
+    readonly_fields = ('author_name',)
+    show_full_result_count = False
@@ -0,0 +1,149 @@
+"""
+Async (ASGI-native) read views for books and authors.
+
+Each view mirrors one of the sync DRF views in ``api/views.py`` and reuses
+its configuration: filter backends and FilterSet, search, ordering,
+sparse fieldsets, serializer and pagination class. Only the database
+round-trips differ: pages are read with ``aiterator()`` and detail lookups
+use ``aget()``, so under an ASGI server the event loop keeps serving other
+requests while a query runs.
+
+Differences from the sync views:
+
+- Responses are always JSON (no browsable API or content negotiation).
+  Large lists are streamed with an async iterator (see ``api/renderers.py``).
+- The response cache and ETag/Last-Modified handling are not applied.
+- Reads go to a replica unless the client carries the primary pin cookie
+  (the per-user pin needs authentication, which is not run here).
+
+Building the filtered queryset can touch the database once per process
+(the full-text index availability check), and the page count may be read
+from the shared cache or estimated (see ``api/counting.py``), so both run
+in ``sync_to_async``.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from . import views
+from .renderers import StreamingJSONRenderer, aiter_render, should_stream
+from .replicas import choose_replica, is_pinned, reset_replica, use_replica
+
+
+class AsyncCatalogView(View):
+    """
+    Base class for async read views backed by a sync DRF view class.
+
+    Attributes:
+        sync_view_class: The DRF view whose configuration is reused
+    """
+    sync_view_class = None
+    http_method_names = ['get', 'head', 'options']
+    renderer_class = StreamingJSONRenderer
+
+    def get_sync_view(self, request, **kwargs):
+        """Instantiate the DRF view for this request without dispatching it."""
+        view = self.sync_view_class()
+        view.args, view.kwargs, view.format_kwarg = (), kwargs, None
+        view.request = Request(request)
+        view.headers = {}
+        return view
+
+    def render(self, data, status=200):
+        renderer = self.renderer_class()
+        if status == 200 and should_stream(data):
+            return StreamingHttpResponse(
+                aiter_render(data, renderer), status=status, content_type=self.renderer_class.media_type
+            )
+        return HttpResponse(renderer.render(data), status=status, content_type=self.renderer_class.media_type)
+
+    def handle_exception(self, exc):
+        """Turn API errors and 404s into the same JSON bodies DRF sends."""
+        response = exception_handler(exc, {'view': self})
+        if response is None:
+            raise exc
+        rendered = self.render(response.data, status=response.status_code)
+        for name, value in response.headers.items():
+            if name.lower() != 'content-type':
+                rendered[name] = value
+        return rendered
+
+    async def get(self, request, **kwargs):
+        alias = None if is_pinned(request) else choose_replica()
+        token = use_replica(alias) if alias is not None else None
+        try:
+            data = await self.get_data(request, **kwargs)
+        except (APIException, Http404) as exc:
+            return self.handle_exception(exc)
+        finally:
+            if token is not None:
+                reset_replica(token)
+        return self.render(data)
+
+    async def get_data(self, request, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncCatalogView):
+    """Async list view with the sync view's filtering, pagination and batch lookups."""
+
+    async def get_data(self, request, **kwargs):
+        view = self.get_sync_view(request, **kwargs)
+        ids = view.get_requested_ids()
+        if ids is not None:
+            found = await view.get_queryset().ain_bulk(ids)
+            objects, missing = view.order_batch(ids, found)
+            return {'results': view.get_serializer(objects, many=True).data, 'missing': missing}
+
+        queryset = await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+        paginator = view.paginator
+        if paginator is None:
+            objects = [obj async for obj in queryset.aiterator(chunk_size=2000)]
+            return view.get_serializer(objects, many=True).data
+
+        page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+        data = view.get_serializer(page, many=True).data
+        if paginator.keyset is not None:
+            # Cursor links may read a related ordering field (e.g. author__name)
+            response = await sync_to_async(paginator.get_paginated_response)(data)
+        else:
+            response = paginator.get_paginated_response(data)
+        return response.data
+
+
+class AsyncDetailView(AsyncCatalogView):
+    """Async detail view looking the object up with ``aget()``."""
+
+    async def get_data(self, request, **kwargs):
+        view = self.get_sync_view(request, **kwargs)
+        queryset = await sync_to_async(view.get_queryset)()
+        model = queryset.model
+        try:
+            instance = await queryset.aget(pk=kwargs['pk'])
+        except model.DoesNotExist:
+            raise Http404(f'No {model._meta.object_name} matches the given query.')
+        return view.get_serializer(instance).data
+
+
+class AsyncBookListView(AsyncListView):
+    """Async version of BookListView (same query parameters)."""
+    sync_view_class = views.BookListView
+
+
+class AsyncBookDetailView(AsyncDetailView):
+    """Async version of BookDetailView."""
+    sync_view_class = views.BookDetailView
+
+
+class AsyncAuthorListView(AsyncListView):
+    """Async version of AuthorListView (same query parameters)."""
+    sync_view_class = views.AuthorListView
+
+
+class AsyncAuthorDetailView(AsyncDetailView):
+    """Async version of AuthorDetailView."""
+    sync_view_class = views.AuthorDetailView
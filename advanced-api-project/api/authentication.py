@@ -0,0 +1,132 @@
+"""
+Token authentication with an in-process token -> user cache.
+
+DRF's ``TokenAuthentication`` joins ``authtoken_token`` and ``auth_user`` on
+every authenticated request. ``CachedTokenAuthentication`` keeps the result
+in a bounded LRU cache with a TTL, so repeat requests with the same token
+skip that query.
+
+Invalidation (see ``api/signals.py``):
+
+- Deleting a token (``CustomObtainAuthToken`` rotation, admin, user
+  deletion) or deactivating a user revokes cached entries everywhere: the
+  ``token`` generation in the shared API cache is bumped, and entries cached
+  under an older generation are ignored by every process that shares that
+  cache backend.
+- Any other change to a user drops that user's entries in this process.
+  Other processes pick the change up within ``TIMEOUT`` seconds.
+
+Settings (``API_TOKEN_CACHE``):
+    ENABLED: Use the cache (otherwise behave exactly like TokenAuthentication)
+    MAX_SIZE: Maximum number of cached tokens per process
+    TIMEOUT: Seconds an entry may be served before it is re-validated
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import bump_generation, get_generations
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_SIZE': 10000,
+    'TIMEOUT': 60,
+}
+
+GENERATION_LABEL = 'token'
+
+
+def get_token_cache_settings():
+    """Return the token cache settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_TOKEN_CACHE', {})}
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of ``token key -> (user, token)`` with a TTL.
+
+    Each entry remembers the revocation generation it was stored under and
+    is ignored once that generation has moved on.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation, timeout):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, token, entry_generation, stored = entry
+            if entry_generation != generation or time.monotonic() - stored > timeout:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user, token
+
+    def set(self, key, user, token, generation, max_size):
+        with self._lock:
+            self._entries[key] = (user, token, generation, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id):
+        """Drop every entry that belongs to ``user_id``."""
+        with self._lock:
+            for key in [k for k, (user, *_) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def revoke_cached_tokens():
+    """Invalidate cached tokens in every process sharing the API cache."""
+    bump_generation(GENERATION_LABEL)
+    token_cache.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` backed by ``token_cache``.
+
+    Failed lookups (unknown token, inactive user) are never cached. Each hit
+    returns copies of the cached user and token, so a view that modifies
+    ``request.user`` cannot leak changes into later requests.
+    """
+
+    def authenticate_credentials(self, key):
+        options = get_token_cache_settings()
+        if not options['ENABLED']:
+            return super().authenticate_credentials(key)
+
+        generation, = get_generations((GENERATION_LABEL,))
+        cached = token_cache.get(key, generation, options['TIMEOUT'])
+        if cached is not None:
+            user, token = cached
+            return copy.copy(user), copy.copy(token)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, copy.copy(user), copy.copy(token), generation, options['MAX_SIZE'])
+        return user, token
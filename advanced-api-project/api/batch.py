@@ -0,0 +1,109 @@
+"""
+Batch "get many by id" lookups for the read-only list views.
+
+``GET /api/books/?ids=3,1,2`` returns the requested books in the requested
+order with a single ``in_bulk()`` query, instead of one detail request per
+id. Ids that do not exist are listed under ``missing``:
+
+    {
+        "results": [{"id": 3, ...}, {"id": 1, ...}],
+        "missing": [2]
+    }
+
+Sparse fieldsets (``fields``, ``expand``, ``books_limit``) apply as usual.
+Filtering, search, ordering and pagination parameters are ignored for a
+batch lookup.
+"""
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .fieldsets import parse_list_param
+
+
+# Largest primary key SQLite (and a signed 64-bit column) can store
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """
+    Return ``value`` as a positive id, or None if it is not one.
+
+    Only ASCII digits are accepted: ``str.isdigit()`` is also true for
+    characters such as '²' that ``int()`` rejects.
+    """
+    if not value.isascii() or not value.isdigit():
+        return None
+    number = int(value)
+    return number if 1 <= number <= MAX_ID else None
+
+
+class BatchLookupMixin:
+    """
+    Mixin for read-only list views that answers ``?ids=...`` lookups.
+
+    Attributes:
+        ids_query_param: Query parameter carrying the comma-separated ids
+        max_batch_ids: Maximum number of ids per request
+    """
+    ids_query_param = 'ids'
+    max_batch_ids = 100
+
+    def get_requested_ids(self):
+        """
+        Return the requested ids in order, without duplicates.
+
+        Returns:
+            list or None: The ids, or None if this is not a batch lookup
+
+        Raises:
+            ValidationError: If an id is not a positive integer or too many
+            ids were requested
+        """
+        if hasattr(self, '_requested_ids'):
+            return self._requested_ids
+
+        values = parse_list_param(self.request, self.ids_query_param)
+        if values is None:
+            self._requested_ids = None
+            return None
+
+        parsed = [parse_id(value) for value in values]
+        invalid = [value for value, number in zip(values, parsed) if number is None]
+        if invalid:
+            raise ValidationError({self.ids_query_param: [f'Invalid id: {value}' for value in invalid]})
+        ids = list(dict.fromkeys(parsed))
+        if not ids:
+            raise ValidationError({self.ids_query_param: ['At least one id is required.']})
+        if len(ids) > self.max_batch_ids:
+            raise ValidationError({
+                self.ids_query_param: [f'At most {self.max_batch_ids} ids may be requested at once.']
+            })
+        self._requested_ids = ids
+        return ids
+
+    def filter_queryset(self, queryset):
+        """Restrict a batch lookup to the requested ids (used for ETags)."""
+        ids = self.get_requested_ids()
+        if ids is None:
+            return super().filter_queryset(queryset)
+        return queryset.filter(pk__in=ids)
+
+    def order_batch(self, ids, found):
+        """
+        Arrange ``in_bulk()`` results in the requested order.
+
+        Returns:
+            tuple: (objects in request order, missing ids)
+        """
+        objects = [found[pk] for pk in ids if pk in found]
+        missing = [pk for pk in ids if pk not in found]
+        return objects, missing
+
+    def list(self, request, *args, **kwargs):
+        ids = self.get_requested_ids()
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        objects, missing = self.order_batch(ids, self.get_queryset().in_bulk(ids))
+        serializer = self.get_serializer(objects, many=True)
+        return Response({'results': serializer.data, 'missing': missing})
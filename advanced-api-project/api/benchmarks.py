@@ -0,0 +1,407 @@
+"""
+Benchmark harness for the API routes.
+
+The harness seeds a synthetic catalog, then requests every route in
+``api/urls.py`` (with a set of filter, search, ordering, pagination and
+fieldset combinations for the list endpoints) through Django's test client
+and records per scenario:
+
+- p50/p99/mean latency in milliseconds
+- SQL queries per request
+- peak Python memory allocated while handling one request (tracemalloc)
+
+Results are plain dicts so they can be dumped as JSON and compared between
+commits with ``compare_results()``. The ``benchmark_api`` management command
+wraps all of this on a throwaway test database.
+
+Write routes run inside a transaction that is rolled back after every
+request, so each iteration sees the same data.
+"""
+
+import datetime
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from itertools import islice
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries, router, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+
+from . import urls as api_urls
+from .counters import recompute_book_counts
+from .models import Author, Book
+from .search import rebuild_index
+from .stats import rebuild_stats
+
+
+WORDS = [
+    'shadow', 'river', 'garden', 'winter', 'empire', 'silent', 'golden', 'night',
+    'stone', 'ocean', 'forest', 'storm', 'crown', 'glass', 'iron', 'summer',
+]
+
+BENCHMARK_USERNAME = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def percentile(values, pct):
+    """Return the ``pct`` percentile of ``values`` (nearest-rank method)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def seed_dataset(books, books_per_author=10, batch_size=5000, seed=0, log=None):
+    """
+    Replace the catalog with ``books`` synthetic books.
+
+    Rows are written with ``bulk_create`` (no signals), then the full-text
+    index, ``Author.book_count`` and the catalog statistics are rebuilt in
+    one pass each.
+
+    Args:
+        books: Number of books to create
+        books_per_author: Books per author (the last author may have fewer)
+        batch_size: Rows per INSERT batch
+        seed: Random seed, so datasets are reproducible
+        log: Optional callable receiving progress messages
+    """
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    author_total = max(1, math.ceil(books / books_per_author))
+
+    Book.objects.all().delete()
+    Author.objects.all().delete()
+
+    for chunk in chunked(range(author_total), batch_size):
+        Author.objects.bulk_create(
+            [Author(name=f'{rng.choice(WORDS).title()} Author {i}') for i in chunk]
+        )
+    authors = list(Author.objects.order_by('pk').values_list('pk', 'name'))
+    log(f'Created {len(authors)} authors')
+
+    def generate():
+        for i in range(books):
+            yield Book(
+                title=f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}',
+                publication_year=rng.randint(1800, 2024),
+                author_id=authors[i // books_per_author][0],
+                author_name=authors[i // books_per_author][1],
+            )
+
+    created = 0
+    for chunk in chunked(generate(), batch_size):
+        Book.objects.bulk_create(chunk)
+        created += len(chunk)
+        if created % (batch_size * 20) == 0:
+            log(f'Created {created} books')
+    log(f'Created {created} books')
+
+    rebuild_index(router.db_for_write(Book))
+    recompute_book_counts()
+    rebuild_stats()
+
+
+def batch_ids(first_id, size=50):
+    """Return ``size`` consecutive ids from ``first_id`` as an ``ids`` parameter."""
+    return ','.join(str(first_id + offset) for offset in range(size))
+
+
+def build_scenarios(book_id, author_id, middle_page):
+    """
+    Return the benchmark scenarios.
+
+    Each scenario is a dict with ``name``, ``route`` (URL name), ``method``,
+    optional ``kwargs`` (URL kwargs), ``params`` (query string or body),
+    ``auth`` (log in first) and ``write`` (roll back after each request).
+    """
+    book = {'pk': book_id}
+    author = {'pk': author_id}
+    new_book = {'title': 'Benchmark Book', 'publication_year': 2000, 'author': author_id}
+    scenarios = [
+        ('overview', 'api-overview', 'get', None, {}),
+        ('books', 'book-list', 'get', None, {}),
+        ('books deep page', 'book-list', 'get', None, {'page': middle_page}),
+        ('books page_size=100', 'book-list', 'get', None, {'page_size': 100}),
+        ('books filter title', 'book-list', 'get', None, {'title': 'river'}),
+        ('books filter year range', 'book-list', 'get', None,
+         {'publication_year_min': 1990, 'publication_year_max': 2000}),
+        ('books filter author_name', 'book-list', 'get', None, {'author_name': 'stone'}),
+        ('books search', 'book-list', 'get', None, {'search': 'golden river'}),
+        ('books order -publication_year', 'book-list', 'get', None, {'ordering': '-publication_year'}),
+        ('books order author__name', 'book-list', 'get', None, {'ordering': 'author__name'}),
+        ('books cursor', 'book-list', 'get', None, {'pagination': 'cursor'}),
+        ('books cursor by year', 'book-list', 'get', None,
+         {'pagination': 'cursor', 'ordering': '-publication_year'}),
+        ('books fields', 'book-list', 'get', None, {'fields': 'id,title'}),
+        ('books ids 50', 'book-list', 'get', None, {'ids': batch_ids(book_id)}),
+        ('book detail', 'book-detail', 'get', book, {}),
+        ('book export filtered', 'book-export', 'get', None, {'publication_year': 2000}),
+        ('book export csv filtered', 'book-export', 'get', None,
+         {'publication_year': 2000, 'export_format': 'csv'}),
+        ('authors', 'author-list', 'get', None, {}),
+        ('authors deep page', 'author-list', 'get', None, {'page': max(1, middle_page // 10)}),
+        ('authors order -book_count', 'author-list', 'get', None, {'ordering': '-book_count'}),
+        ('authors search', 'author-list', 'get', None, {'search': 'ocean'}),
+        ('authors fields', 'author-list', 'get', None, {'fields': 'id,name'}),
+        ('authors ids 50', 'author-list', 'get', None, {'ids': batch_ids(author_id)}),
+        ('authors books_limit', 'author-list', 'get', None, {'books_limit': 3}),
+        ('authors cursor', 'author-list', 'get', None, {'pagination': 'cursor'}),
+        ('author detail', 'author-detail', 'get', author, {}),
+        ('async books', 'async-book-list', 'get', None, {}),
+        ('async books filter year range', 'async-book-list', 'get', None,
+         {'publication_year_min': 1990, 'publication_year_max': 2000}),
+        ('async books cursor', 'async-book-list', 'get', None, {'pagination': 'cursor'}),
+        ('async book detail', 'async-book-detail', 'get', book, {}),
+        ('async authors', 'async-author-list', 'get', None, {}),
+        ('async author detail', 'async-author-detail', 'get', author, {}),
+        ('catalog stats', 'catalog-stats', 'get', None, {}),
+        ('cache stats', 'cache-stats', 'get', None, {}),
+        ('auth token', 'api_token_auth', 'post', None,
+         {'username': BENCHMARK_USERNAME, 'password': BENCHMARK_PASSWORD}),
+        ('book create', 'book-create', 'post', None, new_book),
+        ('book update', 'book-update', 'patch', book, {'title': 'Benchmark Update'}),
+        ('book delete', 'book-delete', 'delete', book, {}),
+        ('bulk create 100', 'book-bulk', 'post', None, [new_book] * 100),
+    ]
+    return [
+        {
+            'name': name,
+            'route': route,
+            'method': method,
+            'kwargs': kwargs or {},
+            'params': params,
+            'auth': route in AUTHENTICATED_ROUTES,
+            'write': method != 'get' and route != 'api_token_auth',
+        }
+        for name, route, method, kwargs, params in scenarios
+    ]
+
+
+# Routes that need a logged-in (staff) user
+AUTHENTICATED_ROUTES = {'book-create', 'book-update', 'book-delete', 'book-bulk', 'cache-stats'}
+
+# Routes that cannot be exercised: the view needs a ``pk`` URL kwarg they lack
+UNBENCHMARKED_ROUTES = {
+    'book-update-simple': 'no pk in URL; the view cannot resolve an object',
+    'book-delete-simple': 'no pk in URL; the view cannot resolve an object',
+}
+
+
+def route_names():
+    """Return the names of all routes in ``api/urls.py``."""
+    return [p.name for p in api_urls.urlpatterns if isinstance(p, URLPattern) and p.name]
+
+
+class BenchmarkRunner:
+    """
+    Run benchmark scenarios and collect results.
+
+    Args:
+        repeat: Timed requests per scenario
+        warmup: Untimed requests per scenario before timing
+        use_cache: Keep the response and count caches enabled (off by
+            default, so the numbers reflect the database and serializer work)
+        only: Optional iterable of route or scenario names to run
+    """
+
+    def __init__(self, repeat=30, warmup=3, use_cache=False, only=None):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.use_cache = use_cache
+        self.only = set(only) if only else None
+
+    def get_user(self):
+        user, _ = User.objects.get_or_create(
+            username=BENCHMARK_USERNAME, defaults={'is_staff': True, 'is_superuser': True}
+        )
+        user.set_password(BENCHMARK_PASSWORD)
+        user.save()
+        return user
+
+    def get_scenarios(self):
+        book_id = Book.objects.order_by('pk').values_list('pk', flat=True).first()
+        author_id = Author.objects.order_by('pk').values_list('pk', flat=True).first()
+        if book_id is None or author_id is None:
+            raise ValueError('The catalog is empty; seed a dataset first.')
+        middle_page = max(1, Book.objects.count() // 20)
+        scenarios = build_scenarios(book_id, author_id, middle_page)
+        if self.only:
+            scenarios = [s for s in scenarios if s['route'] in self.only or s['name'] in self.only]
+        return scenarios
+
+    def request(self, client, scenario):
+        """Send one request and fully consume the response."""
+        url = reverse(scenario['route'], kwargs=scenario['kwargs'])
+        method = getattr(client, scenario['method'])
+        if scenario['method'] == 'get':
+            response = method(url, scenario['params'])
+        else:
+            response = method(url, scenario['params'], content_type='application/json')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def run_once(self, client, scenario):
+        """Run one request, rolling back writes."""
+        if not scenario['write']:
+            return self.request(client, scenario)
+        with transaction.atomic():
+            response = self.request(client, scenario)
+            transaction.set_rollback(True)
+        return response
+
+    def measure(self, client, scenario):
+        """Return the result dict for one scenario."""
+        for _ in range(self.warmup):
+            self.run_once(client, scenario)
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.run_once(client, scenario)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # The query log is a bounded deque; empty it so the capture is not
+        # truncated after many requests. captured_queries reads the live log,
+        # so it is counted before the next request resets it.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.run_once(client, scenario)
+        query_count = len(queries.captured_queries)
+
+        tracemalloc.start()
+        try:
+            self.run_once(client, scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'name': scenario['name'],
+            'route': scenario['route'],
+            'method': scenario['method'].upper(),
+            'params': scenario['params'] if scenario['method'] == 'get' else None,
+            'status': response.status_code,
+            'requests': self.repeat,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'queries': query_count,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self, log=None):
+        """
+        Run every selected scenario.
+
+        Throttling is always off: a scenario sends more requests than the
+        write and token rates allow, and rejected requests would be timed
+        instead of the view. A scenario whose response is not 2xx is logged
+        and listed under ``failed``, since its timings are not comparable.
+
+        Returns:
+            dict: ``{'meta': {...}, 'results': [...], 'uncovered': {...},
+            'failed': [...]}``
+        """
+        log = log or (lambda message: None)
+        user = self.get_user()
+        client = Client()
+        results = []
+        settings_override = {'API_THROTTLING': {'ENABLED': False}}
+        if not self.use_cache:
+            settings_override.update({
+                'API_RESPONSE_CACHE': {'ENABLED': False},
+                'API_COUNT_ESTIMATES': {'TIMEOUT': 0},
+            })
+        with override_settings(**settings_override):
+            for scenario in self.get_scenarios():
+                if scenario['auth']:
+                    client.force_login(user)
+                else:
+                    client.logout()
+                result = self.measure(client, scenario)
+                log(f"{result['name']:<32} p50 {result['p50_ms']:9.2f} ms  "
+                    f"p99 {result['p99_ms']:9.2f} ms  {result['queries']:3d} queries")
+                if not 200 <= result['status'] < 300:
+                    log(f"WARNING: {result['name']} returned status {result['status']}; "
+                        f"its timings are not of a successful request")
+                results.append(result)
+
+        covered = {result['route'] for result in results}
+        uncovered = {
+            name: UNBENCHMARKED_ROUTES.get(name, 'not selected')
+            for name in route_names() if name not in covered
+        }
+        failed = [result['name'] for result in results if not 200 <= result['status'] < 300]
+        return {'meta': self.get_meta(), 'results': results, 'uncovered': uncovered, 'failed': failed}
+
+    def get_meta(self):
+        """Describe the environment and dataset the results came from."""
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'books': Book.objects.count(),
+            'authors': Author.objects.count(),
+            'repeat': self.repeat,
+            'warmup': self.warmup,
+            'response_cache': self.use_cache,
+        }
+
+
+def compare_results(baseline, current, threshold=0.2):
+    """
+    Compare two benchmark runs.
+
+    Args:
+        baseline: Result dict of the reference run
+        current: Result dict of the new run
+        threshold: Allowed relative p50 slowdown before a scenario is
+            reported (0.2 = 20%)
+
+    Returns:
+        list: One message per regressed scenario
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            regressions.append(
+                f"{result['name']}: queries {old['queries']} -> {result['queries']}"
+            )
+        if old['p50_ms'] and result['p50_ms'] > old['p50_ms'] * (1 + threshold):
+            regressions.append(
+                f"{result['name']}: p50 {old['p50_ms']} ms -> {result['p50_ms']} ms"
+            )
+    return regressions
@@ -0,0 +1,214 @@
+"""
+Response caching for the read-only API views.
+
+Cached entries are stored in the cache alias named by
+``settings.API_RESPONSE_CACHE['ALIAS']`` so the backend can be swapped
+(locmem, file based, Redis) without code changes.
+
+Invalidation uses per-model generation counters instead of deleting keys:
+every cache key embeds the current generation of each model the view
+depends on, and a write to a Book or Author bumps that model's generation
+(see ``api/signals.py``). Entries built from old data simply stop being
+addressed and expire through the normal timeout.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .replicas import reading_from_replica
+
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'ENABLED': True,
+    'KEY_PREFIX': 'api',
+}
+
+# Query parameters that only affect rendering, not the cached data
+IGNORED_QUERY_PARAMS = {'format'}
+
+# Response headers stored with the cached data (conditional GET validators)
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache_settings():
+    """Return the response cache settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_RESPONSE_CACHE', {})}
+
+
+def get_response_cache():
+    """Return the cache backend used for API responses."""
+    return caches[get_cache_settings()['ALIAS']]
+
+
+def _key(*parts):
+    return ':'.join([get_cache_settings()['KEY_PREFIX'], *map(str, parts)])
+
+
+def _initial_generation():
+    # Generations start from the clock so that a counter which was evicted
+    # never restarts at a value that older cached responses were keyed on.
+    return time.time_ns()
+
+
+def get_generations(models):
+    """
+    Return the current generation of each model label.
+
+    Args:
+        models: Iterable of model labels, e.g. ('book', 'author')
+
+    Returns:
+        tuple: Generation numbers in the same order as ``models``
+    """
+    cache = get_response_cache()
+    keys = [_key('gen', model) for model in models]
+    found = cache.get_many(keys)
+    missing = {key: _initial_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return tuple(found[key] for key in keys)
+
+
+def bump_generation(model):
+    """
+    Invalidate every cached response that depends on ``model``.
+
+    Args:
+        model: Model label, e.g. 'book'
+    """
+    cache = get_response_cache()
+    key = _key('gen', model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not set yet or evicted
+        cache.set(key, _initial_generation(), timeout=None)
+
+
+def _count(view_name, outcome):
+    cache = get_response_cache()
+    key = _key('stats', view_name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_cache_stats(view_names):
+    """
+    Return hit/miss counters for the given views.
+
+    Args:
+        view_names: Iterable of view names (the ``cache_name`` of each view)
+
+    Returns:
+        dict: ``{view_name: {'hits': int, 'misses': int}}``
+    """
+    cache = get_response_cache()
+    keys = {(name, outcome): _key('stats', name, outcome)
+            for name in view_names for outcome in ('hits', 'misses')}
+    found = cache.get_many(keys.values())
+    return {
+        name: {outcome: found.get(keys[(name, outcome)], 0) for outcome in ('hits', 'misses')}
+        for name in view_names
+    }
+
+
+def normalize_query_params(query_params):
+    """
+    Return a canonical string for a request's query parameters.
+
+    Parameters are sorted, empty values are dropped (django-filter ignores
+    them) and rendering-only parameters such as ``format`` are removed, so
+    ``?ordering=title&title=`` and ``?ordering=title`` share a cache entry.
+    """
+    items = []
+    for name in sorted(query_params.keys()):
+        if name in IGNORED_QUERY_PARAMS:
+            continue
+        for value in sorted(query_params.getlist(name)):
+            if value != '':
+                items.append(f'{name}={value}')
+    return '&'.join(items)
+
+
+class CachedResponseMixin:
+    """
+    Mixin for read-only generic views that caches successful GET responses.
+
+    The serialized ``response.data`` is cached (not the rendered bytes), so
+    content negotiation still happens per request while the database queries
+    and serializer work are skipped on a hit. ``ETag``/``Last-Modified``
+    headers are cached with the data, so conditional GETs are answered from
+    the cache as well. Responses read from a replica are not stored (see
+    ``api/replicas.py``).
+
+    Attributes:
+        cache_name: Name used in cache keys and hit/miss counters
+        cache_dependencies: Model labels whose writes invalidate this view
+    """
+    cache_name = None
+    cache_dependencies = ('book', 'author')
+
+    def get_cache_key(self, request, *args, **kwargs):
+        """
+        Build the cache key for this request.
+
+        The key combines the view name, the generations of its dependencies,
+        the host (pagination links are absolute), the URL kwargs and the
+        normalized query string.
+        """
+        generations = get_generations(self.cache_dependencies)
+        raw = '|'.join([
+            request.get_host(),
+            ','.join(f'{k}={v}' for k, v in sorted(kwargs.items())),
+            normalize_query_params(request.query_params),
+        ])
+        digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        return _key('response', self.cache_name, '.'.join(map(str, generations)), digest)
+
+    def get(self, request, *args, **kwargs):
+        options = get_cache_settings()
+        if not options['ENABLED']:
+            return super().get(request, *args, **kwargs)
+
+        cache = get_response_cache()
+        key = self.get_cache_key(request, *args, **kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(self.cache_name, 'hits')
+            headers = cached['headers']
+            if 'ETag' in headers or 'Last-Modified' in headers:
+                last_modified = headers.get('Last-Modified')
+                response = get_conditional_response(
+                    request,
+                    etag=headers.get('ETag'),
+                    last_modified=last_modified and parse_http_date_safe(last_modified),
+                )
+                if response is not None:
+                    response['X-Cache'] = 'HIT'
+                    return response
+            response = Response(cached['data'], headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(self.cache_name, 'misses')
+        response = super().get(request, *args, **kwargs)
+        # A replica may not have the writes the generations in the key count
+        if response.status_code == 200 and not reading_from_replica():
+            cache.set(key, {
+                'data': response.data,
+                'headers': {name: response[name] for name in CACHED_HEADERS if name in response},
+            }, timeout=options['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,255 @@
+"""
+Negotiated gzip/Brotli compression for API responses.
+
+``CompressionMiddleware`` picks an encoding from the request's
+``Accept-Encoding`` header (honoring q-values, ``identity`` and ``*``) among
+the encodings enabled in settings, in the server's order of preference.
+Brotli is used when the ``brotli`` (or ``brotlicffi``) package is
+installed; otherwise only gzip is offered.
+
+- Regular responses are compressed when their body is at least
+  ``MIN_SIZE`` bytes and the result is actually smaller.
+- Streaming responses (see ``api/renderers.py`` and the export view) are
+  compressed chunk by chunk, so the body is never held in memory.
+- Only API responses are compressed: the request path must start with one
+  of ``PATH_PREFIXES`` and the content type must be JSON, NDJSON or CSV.
+  HTML pages (the admin, the browsable API) are never compressed, since
+  they carry CSRF tokens next to attacker-reflected input, which a
+  compressed body would expose to BREACH. Responses that already carry a
+  ``Content-Encoding`` are left alone.
+- ``Vary: Accept-Encoding`` is always added, and strong ETags become weak
+  (RFC 9110 8.8.1) when the body is compressed. Conditional GETs still
+  match, since ``If-None-Match`` uses the weak comparison.
+
+Settings (``API_COMPRESSION``):
+    ENABLED: Turn compression on or off
+    ENCODINGS: Encodings to offer, most preferred first
+    MIN_SIZE: Smallest body (in bytes) worth compressing
+    GZIP_LEVEL: zlib compression level (1-9)
+    BROTLI_QUALITY: Brotli quality (0-11)
+    PATH_PREFIXES: URL path prefixes whose responses may be compressed
+    CONTENT_TYPES: Media type prefixes that may be compressed
+"""
+
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ENCODINGS': ('br', 'gzip'),
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'PATH_PREFIXES': ('/api/',),
+    'CONTENT_TYPES': (
+        'application/json',
+        'application/x-ndjson',
+        'text/csv',
+    ),
+}
+
+
+def get_compression_settings():
+    """Return the compression settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_COMPRESSION', {})}
+
+
+def available_encodings(options):
+    """Return the configured encodings this process can produce."""
+    return [encoding for encoding in options['ENCODINGS'] if encoding == 'gzip' or (encoding == 'br' and brotli)]
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an ``Accept-Encoding`` header.
+
+    Returns:
+        dict: ``{coding: q}`` with lower-cased codings
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(header, encodings):
+    """
+    Choose a content coding for an ``Accept-Encoding`` header.
+
+    Args:
+        header: The request's ``Accept-Encoding`` value
+        encodings: Supported codings, most preferred first
+
+    Returns:
+        str or None: The coding to use, or None for an uncompressed body
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class GzipStream:
+    """Incremental gzip compressor with a ``compress``/``flush`` interface."""
+
+    def __init__(self, level):
+        # wbits=31: gzip container, 32K window; a fixed header (mtime 0)
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def sync(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class BrotliStream:
+    """Incremental Brotli compressor with the same interface as GzipStream."""
+
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+    def sync(self):
+        return self.compressor.flush()
+
+
+def make_compressor(encoding, options):
+    if encoding == 'br':
+        return BrotliStream(options['BROTLI_QUALITY'])
+    return GzipStream(options['GZIP_LEVEL'])
+
+
+def compress_bytes(data, encoding, options):
+    """Compress a whole body."""
+    compressor = make_compressor(encoding, options)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding, options):
+    """
+    Compress an iterable of byte chunks lazily.
+
+    Each input chunk is flushed, so a client sees data as soon as the
+    renderer produces it.
+    """
+    compressor = make_compressor(encoding, options)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.sync()
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def acompress_chunks(chunks, encoding, options):
+    """Async variant of ``compress_chunks`` for async streaming responses."""
+    compressor = make_compressor(encoding, options)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.sync()
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with the best encoding the client accepts.
+
+    Place it right after ``ProfilingMiddleware`` so compression time is part
+    of the profiled total and every other middleware sees the uncompressed
+    response. Like ``ProfilingMiddleware`` it is sync and async capable.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def is_compressible(self, request, response, options):
+        if response.has_header('Content-Encoding'):
+            return False
+        if not request.path.startswith(tuple(options['PATH_PREFIXES'])):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        return content_type.startswith(tuple(options['CONTENT_TYPES']))
+
+    def process_response(self, request, response):
+        options = get_compression_settings()
+        if not options['ENABLED'] or not self.is_compressible(request, response, options):
+            return response
+        if not response.streaming and len(response.content) < options['MIN_SIZE']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''), available_encodings(options)
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_chunks(response.streaming_content, encoding, options)
+            else:
+                response.streaming_content = compress_chunks(response.streaming_content, encoding, options)
+            # The compressed size is only known once the body has been sent
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding, options)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,242 @@
+"""
+Conditional GET support (ETag / Last-Modified) for the read-only API views.
+
+Validators are computed from a single aggregate query over the
+``updated_at`` columns of Book and Author, so a ``304 Not Modified`` answer
+never loads model instances or runs a serializer. Lists too large to count
+exactly (see ``api/counting.py``) are versioned by the cache generations
+instead, since the aggregate would scan every matching row.
+
+Only a single book is a row with its own ``updated_at``; lists and author
+details also change when a book is deleted, which no ``updated_at`` column
+records (counters are adjusted with ``queryset.update()``, which leaves
+``Author.updated_at`` alone too). Those representations therefore carry an
+ETag only: their stamp includes the row counts, so deletes change it, while
+a ``Last-Modified`` date could not move forward and ``If-Modified-Since``
+would keep answering 304.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_generations, normalize_query_params
+from .counting import EXACT, bounded, cache_count, estimate_count, get_cached_count, get_count_settings
+
+
+def make_etag(*parts):
+    """Return a quoted (strong) ETag built from ``parts``."""
+    raw = '|'.join(str(part) for part in parts)
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def latest(*values):
+    """Return the most recent of the given datetimes, ignoring None."""
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Evaluate the request's conditional headers.
+
+    Args:
+        request: The current request
+        etag: Quoted ETag of the current representation
+        last_modified: Last modification time as a Unix timestamp, or None
+
+    Returns:
+        HttpResponse or None: A 304/412 response, or None if the full body
+        should be sent
+    """
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """Set ``ETag`` and ``Last-Modified`` headers on a response."""
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for read-only generic views that answers conditional GETs.
+
+    Subclasses compute a version stamp with ``get_version()``; the mixin
+    turns it into ``ETag``/``Last-Modified`` headers and returns
+    ``304 Not Modified`` when the client's copy is current.
+    """
+
+    def get_version(self, request, *args, **kwargs):
+        """
+        Return ``(stamp, last_modified)`` for the requested representation.
+
+        ``stamp`` is any value that changes whenever the response body would
+        change; ``last_modified`` is a datetime or None. Returning None skips
+        conditional handling (e.g. for a missing object, which then 404s, or
+        a keyset page).
+        """
+        raise NotImplementedError
+
+    def is_keyset_request(self, request):
+        """
+        Return True if this is a keyset-paginated list request.
+
+        Keyset pages are never versioned: aggregating over the whole filtered
+        queryset would cost as much as the OFFSET scan keyset mode avoids.
+        """
+        paginator = getattr(self, 'paginator', None)
+        return hasattr(paginator, 'is_keyset_request') and paginator.is_keyset_request(request)
+
+    def aggregate_list(self, queryset, request, **aggregates):
+        """
+        Aggregate a filtered list unless it is too large to count exactly.
+
+        The aggregate (which must include ``count``) reads at most
+        ``THRESHOLD + 1`` rows, joined rows included (see
+        ``api/counting.py``). If the limit is reached, None is returned and
+        the estimated count is kept on ``self.result_count`` and
+        ``self.count_type`` for the paginator; the caller then versions the
+        list with ``get_estimated_version()``.
+        """
+        options = get_count_settings()
+        if not options['ENABLED']:
+            return queryset.aggregate(**aggregates)
+        cached = get_cached_count(self, request)
+        if cached is None or cached[1] == EXACT:
+            limit = options['THRESHOLD'] + 1
+            stats = bounded(queryset, limit).aggregate(rows=Count('*'), **aggregates)
+            if stats['rows'] < limit:
+                cache_count(self, request, (stats['count'], EXACT))
+                return stats
+            cached = estimate_count(queryset, options)
+            cache_count(self, request, cached)
+        self.result_count, self.count_type = cached
+        return None
+
+    def get_estimated_version(self):
+        """
+        Version a list too large to aggregate.
+
+        The stamp is the count plus the cache generations of the view's
+        models, so any write changes the ETag; no Last-Modified is sent.
+        """
+        generations = get_generations(getattr(self, 'cache_dependencies', ('book', 'author')))
+        return (self.result_count, generations), None
+
+    def get_validators(self, request, *args, **kwargs):
+        """Return ``(etag, last_modified timestamp)`` or ``(None, None)``."""
+        version = self.get_version(request, *args, **kwargs)
+        if version is None:
+            return None, None
+        stamp, last_modified = version
+        etag = make_etag(
+            self.__class__.__name__,
+            stamp,
+            normalize_query_params(request.query_params),
+        )
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is not None:
+            response = not_modified_response(request, etag, last_modified)
+            if response is not None:
+                return response
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
+
+
+class BookListVersionMixin(ConditionalGetMixin):
+    """
+    Version a book list by aggregating over the filtered queryset.
+
+    The aggregate already counts the filtered rows, so the count is kept on
+    ``self.result_count`` for the paginator instead of issuing a second
+    ``COUNT(*)``. Lists above the exact-count threshold get an estimated
+    count and a generation-based version instead (see ``aggregate_list``).
+    No ``Last-Modified`` is sent, since deleting a book does not advance it.
+    """
+
+    def get_version(self, request, *args, **kwargs):
+        if self.is_keyset_request(request):
+            return None
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        stats = self.aggregate_list(
+            queryset,
+            request,
+            count=Count('pk'),
+            book_updated=Max('updated_at'),
+            author_updated=Max('author__updated_at'),
+        )
+        if stats is None:
+            return self.get_estimated_version()
+        self.result_count = stats['count']
+        last_modified = latest(stats['book_updated'], stats['author_updated'])
+        return (stats['count'], last_modified and last_modified.isoformat()), None
+
+
+class BookDetailVersionMixin(ConditionalGetMixin):
+    """Version a single book by its ``updated_at`` column."""
+
+    def get_version(self, request, *args, **kwargs):
+        updated_at = self.get_queryset().filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return (kwargs['pk'], updated_at.isoformat()), updated_at
+
+
+class AuthorListVersionMixin(ConditionalGetMixin):
+    """
+    Version an author list (including nested books) with one aggregate.
+
+    As for books, the author count is reused by the paginator, and only an
+    ETag is sent.
+    """
+
+    def get_version(self, request, *args, **kwargs):
+        if self.is_keyset_request(request):
+            return None
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        stats = self.aggregate_list(
+            queryset,
+            request,
+            count=Count('pk', distinct=True),
+            author_updated=Max('updated_at'),
+            book_count=Count('books', distinct=True),
+            book_updated=Max('books__updated_at'),
+        )
+        if stats is None:
+            return self.get_estimated_version()
+        self.result_count = stats['count']
+        last_modified = latest(stats['author_updated'], stats['book_updated'])
+        stamp = (stats['count'], stats['book_count'], last_modified and last_modified.isoformat())
+        return stamp, None
+
+
+class AuthorDetailVersionMixin(ConditionalGetMixin):
+    """
+    Version a single author and its nested books.
+
+    ETag only: deleting one of the books changes ``book_count`` but no
+    ``updated_at`` column.
+    """
+
+    def get_version(self, request, *args, **kwargs):
+        stats = self.get_queryset().model.objects.filter(pk=kwargs['pk']).aggregate(
+            author_updated=Max('updated_at'),
+            book_count=Count('books'),
+            book_updated=Max('books__updated_at'),
+        )
+        if stats['author_updated'] is None:
+            return None
+        last_modified = latest(stats['author_updated'], stats['book_updated'])
+        return (kwargs['pk'], stats['book_count'], last_modified.isoformat()), None
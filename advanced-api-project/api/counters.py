@@ -0,0 +1,79 @@
+"""
+Maintenance of the denormalized ``Author.book_count`` column.
+
+Counters are adjusted with relative ``UPDATE ... SET book_count =
+book_count + n`` statements, so concurrent writers never overwrite each
+other's increments. Decrements are clamped at zero: a counter that has
+drifted low (see ``recompute_book_counts``) must not make a delete fail on
+the column's non-negative constraint. Callers are expected to run inside
+the transaction that writes the books.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Author, Book
+
+
+def adjust_book_counts(deltas):
+    """
+    Apply book count changes to authors.
+
+    Args:
+        deltas: Mapping of author id -> change in number of books
+
+    Authors sharing the same delta are updated with a single statement.
+    Counts never go below zero.
+    """
+    by_delta = defaultdict(list)
+    for author_id, delta in deltas.items():
+        if delta and author_id is not None:
+            by_delta[delta].append(author_id)
+    for delta, author_ids in by_delta.items():
+        Author.objects.filter(pk__in=author_ids).update(book_count=Greatest(F('book_count') + delta, Value(0)))
+
+
+def count_created(books):
+    """Return the deltas for newly created ``books``."""
+    return Counter(book.author_id for book in books)
+
+
+def count_deleted(books):
+    """Return the deltas for deleted ``books``."""
+    return Counter({author_id: -delta for author_id, delta in count_created(books).items()})
+
+
+def count_moved(moves):
+    """
+    Return the deltas for books that changed author.
+
+    Args:
+        moves: Iterable of ``(old author id, new author id)`` pairs
+    """
+    deltas = Counter()
+    for old, new in moves:
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+    return deltas
+
+
+def recompute_book_counts():
+    """
+    Recompute every author's ``book_count`` from the Book table.
+
+    Returns:
+        int: The number of authors whose count was wrong
+    """
+    actual = Book.objects.filter(author=OuterRef('pk')).order_by().values('author').annotate(
+        total=Count('pk')
+    ).values('total')
+    drifted = Author.objects.annotate(
+        actual=Coalesce(Subquery(actual), Value(0))
+    ).exclude(book_count=F('actual'))
+    fixed = drifted.count()
+    if fixed:
+        Author.objects.update(book_count=Coalesce(Subquery(actual), Value(0)))
+    return fixed
@@ -0,0 +1,182 @@
+"""
+Exact or estimated row counts for the page-number pagination envelope.
+
+An exact ``COUNT(*)`` over a filtered list costs as much as reading every
+matching row, which for broad filters and free-text search is more than the
+page itself. ``count_results()`` therefore:
+
+1. Returns a cached count for the same filter, if there is one. Counts are
+   cached per view and normalized filter parameters (page, ordering and
+   fieldset parameters do not change the count) together with the cache
+   generations of the view's models, so a write starts new entries and an
+   exact count is never stale. ``TIMEOUT`` bounds how long an entry lives.
+2. Counts at most ``THRESHOLD + 1`` rows (``SELECT COUNT(*) FROM (... LIMIT
+   n)``). Up to the threshold that is the exact count.
+3. Above the threshold returns an estimate: the planner's row estimate on
+   PostgreSQL, and elsewhere the number of matches in ``SAMPLE_WINDOWS``
+   primary key ranges of ``SAMPLE_SIZE`` ids spread over the table, scaled
+   to the whole key range.
+
+Settings (``API_COUNT_ESTIMATES``):
+    ENABLED: Estimate large counts (otherwise always count exactly)
+    THRESHOLD: Largest count that is always exact
+    TIMEOUT: Seconds a count is cached (0 disables the count cache)
+    SAMPLE_WINDOWS: Primary key ranges sampled for an estimate
+    SAMPLE_SIZE: Width of each sampled range
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Max, Min, Q
+
+from .cache import _key, get_generations, get_response_cache, normalize_query_params
+from .replicas import reading_from_replica
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'THRESHOLD': 10000,
+    'TIMEOUT': 30,
+    'SAMPLE_WINDOWS': 8,
+    'SAMPLE_SIZE': 1000,
+}
+
+EXACT = 'exact'
+ESTIMATE = 'estimate'
+
+# Query parameters that select a page or a representation, not the rows counted
+COUNT_IGNORED_PARAMS = {
+    'page', 'page_size', 'ordering', 'pagination', 'cursor',
+    'fields', 'expand', 'books_limit', 'format',
+}
+
+
+def get_count_settings():
+    """Return the count estimate settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_COUNT_ESTIMATES', {})}
+
+
+def get_count_key(view, request):
+    """Return the cache key of the count for ``view``'s filtered queryset."""
+    params = request.query_params.copy()
+    for name in COUNT_IGNORED_PARAMS:
+        params.pop(name, None)
+    dependencies = getattr(view, 'cache_dependencies', ('book', 'author'))
+    raw = '|'.join([
+        type(view).__name__,
+        '.'.join(map(str, get_generations(dependencies))),
+        normalize_query_params(params),
+    ])
+    return _key('count', hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def bounded_count(queryset, limit):
+    """Count the rows of ``queryset``, stopping after ``limit``."""
+    return bounded(queryset, limit).count()
+
+
+def bounded(queryset, limit):
+    """
+    Return the first ``limit`` rows of ``queryset`` for counting.
+
+    Ordering and annotations (such as a search rank) are dropped, so the
+    database only evaluates the filters for the rows it reads.
+    """
+    return queryset.order_by().values('pk')[:limit]
+
+
+def planner_estimate(queryset):
+    """Return the planner's row estimate for ``queryset``, or None if unavailable."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def sample_estimate(queryset, windows, size):
+    """
+    Estimate the row count of ``queryset`` from primary key range samples.
+
+    ``windows`` ranges of ``size`` ids, evenly spread between the smallest
+    and largest id of the table, are counted in one query and the number of
+    matches is scaled to the whole id range. Each range is read through the
+    primary key index, so the cost does not depend on the table size.
+
+    Returns:
+        tuple: ``(count, kind)``; tables whose whole id range fits in the
+        sample are simply counted (``EXACT``)
+    """
+    bounds = queryset.model._default_manager.using(queryset.db).aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0, EXACT
+    span = bounds['high'] - bounds['low'] + 1
+    if span <= windows * size:
+        return queryset.order_by().count(), EXACT
+    step = span // windows
+    condition = Q()
+    for window in range(windows):
+        start = bounds['low'] + window * step
+        condition |= Q(pk__gte=start, pk__lt=start + size)
+    matches = queryset.order_by().filter(condition).count()
+    return round(matches * span / (windows * size)), ESTIMATE
+
+
+def estimate_count(queryset, options=None):
+    """Return ``(count, kind)`` with an estimated row count for ``queryset``."""
+    options = options or get_count_settings()
+    estimate = planner_estimate(queryset)
+    if estimate is not None:
+        return estimate, ESTIMATE
+    return sample_estimate(queryset, options['SAMPLE_WINDOWS'], options['SAMPLE_SIZE'])
+
+
+def get_cached_count(view, request):
+    """Return the cached ``(count, kind)`` for the view's current filters, or None."""
+    cached = get_response_cache().get(get_count_key(view, request))
+    return tuple(cached) if cached is not None else None
+
+
+def cache_count(view, request, result):
+    """Cache ``(count, kind)`` for the view's current filters (not when read from a replica)."""
+    if reading_from_replica():
+        return
+    get_response_cache().set(get_count_key(view, request), result, get_count_settings()['TIMEOUT'])
+
+
+def count_results(queryset, view=None, request=None):
+    """
+    Return ``(count, kind)`` for a filtered list queryset.
+
+    ``kind`` is ``EXACT`` or ``ESTIMATE``. Estimated counts are never lower
+    than ``THRESHOLD + 1``, since at least that many rows were seen.
+
+    Args:
+        queryset: The filtered queryset
+        view: The list view (used for the cache key); without a view and
+            request the count is not cached
+        request: The current request
+    """
+    options = get_count_settings()
+    if not options['ENABLED']:
+        return queryset.count(), EXACT
+
+    cacheable = view is not None and request is not None
+    if cacheable:
+        cached = get_cached_count(view, request)
+        if cached is not None:
+            return cached
+
+    threshold = options['THRESHOLD']
+    count = bounded_count(queryset, threshold + 1)
+    if count <= threshold:
+        result = (count, EXACT)
+    else:
+        estimate, kind = estimate_count(queryset, options)
+        result = (max(estimate, threshold + 1), kind)
+
+    if cacheable:
+        cache_count(view, request, result)
+    return result
@@ -0,0 +1,54 @@
+"""
+Streaming serialization helpers for catalog exports.
+
+Rows are plain tuples (from ``values_list``) and are encoded one at a time,
+so an export never holds more than one database chunk in memory.
+"""
+
+import csv
+import json
+
+
+# export_format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(rows, header):
+    """Yield one JSON object per row, newline terminated."""
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), ensure_ascii=False) + '\n'
+
+
+def stream_csv(rows, header):
+    """Yield a CSV header line followed by one line per row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_rows(rows, header, export_format):
+    """
+    Encode ``rows`` lazily in the requested format.
+
+    Args:
+        rows: Iterable of value tuples
+        header: Field names matching the tuple positions
+        export_format: 'ndjson' or 'csv'
+
+    Returns:
+        Iterator of text chunks
+    """
+    if export_format == 'csv':
+        return stream_csv(rows, header)
+    return stream_ndjson(rows, header)
@@ -0,0 +1,189 @@
+"""
+Sparse fieldsets and optional nested books for the read-only API views.
+
+Query Parameters:
+- fields: Comma-separated fields to return, e.g. ``?fields=id,name``.
+  Only the matching columns are loaded (``QuerySet.only()``).
+- expand: Comma-separated relations to nest alongside ``fields``, e.g.
+  ``?fields=name&expand=books``. Without ``fields`` every field (including
+  nested books) is returned, as before.
+- books_limit: Maximum number of nested books per author. The books are
+  fetched with a single windowed prefetch (``ROW_NUMBER() OVER
+  (PARTITION BY author_id ...)``), not one query per author.
+
+When ``books`` is not part of the response the prefetch is skipped entirely.
+"""
+
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from .models import Book
+
+
+def parse_list_param(request, name):
+    """
+    Return the comma-separated values of query parameter ``name``.
+
+    Returns:
+        list or None: The stripped, non-empty values, or None if the
+        parameter was not sent
+    """
+    raw = request.query_params.get(name)
+    if raw is None:
+        return None
+    return [value.strip() for value in raw.split(',') if value.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Mixin for read-only generic views that honors ``fields``/``expand``.
+
+    The serializer must accept a ``fields`` argument (see
+    ``DynamicFieldsMixin`` in ``api/serializers.py``).
+
+    Attributes:
+        field_columns: Maps each serializer field to the model fields it
+            reads; fields missing from the map are not columns (relations)
+        expandable_fields: Serializer fields only returned when requested via
+            ``fields`` or ``expand`` on a narrowed response
+
+    The view's ``queryset`` should not select or prefetch relations; the
+    mixins below add only what the requested fields need.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    books_limit_query_param = 'books_limit'
+    max_books_limit = 100
+    field_columns = {}
+    expandable_fields = ()
+
+    def get_requested_fields(self):
+        """
+        Return the serializer fields requested by the client.
+
+        Returns:
+            tuple or None: Field names, or None for the full representation
+
+        Raises:
+            ValidationError: If an unknown field or expansion was requested
+        """
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        available = list(self.serializer_class().fields)
+        fields = parse_list_param(self.request, self.fields_query_param)
+        expand = parse_list_param(self.request, self.expand_query_param) or []
+
+        errors = {}
+        if fields is not None:
+            unknown = [name for name in fields if name not in available]
+            if unknown:
+                errors[self.fields_query_param] = [f'Unknown field: {name}' for name in unknown]
+        unknown = [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            errors[self.expand_query_param] = [f'Cannot expand: {name}' for name in unknown]
+        if errors:
+            raise ValidationError(errors)
+
+        if fields is None:
+            requested = None
+        else:
+            requested = tuple(name for name in available if name in fields or name in expand)
+        self._requested_fields = requested
+        return requested
+
+    def get_books_limit(self):
+        """Return the validated ``books_limit`` parameter, or None."""
+        raw = self.request.query_params.get(self.books_limit_query_param)
+        if raw in (None, ''):
+            return None
+        try:
+            limit = int(raw)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_books_limit:
+            raise ValidationError({
+                self.books_limit_query_param: [
+                    f'Must be an integer between 1 and {self.max_books_limit}.'
+                ]
+            })
+        return limit
+
+    def wants(self, name):
+        """Return True if serializer field ``name`` is part of the response."""
+        fields = self.get_requested_fields()
+        return fields is None or name in fields
+
+    def get_only_columns(self):
+        """Return the columns to load for a narrowed response, or None."""
+        fields = self.get_requested_fields()
+        if fields is None:
+            return None
+        columns = ['pk']
+        for name in fields:
+            columns.extend(self.field_columns.get(name, ()))
+        return columns
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        columns = self.get_only_columns()
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if 'data' not in kwargs:
+            kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class AuthorFieldsetMixin(SparseFieldsetMixin):
+    """Sparse fieldsets for authors, with optional and capped nested books."""
+    field_columns = {'id': ('id',), 'name': ('name',)}
+    expandable_fields = ('books',)
+
+    def get_books_prefetch(self):
+        """
+        Return the Prefetch for nested books.
+
+        Books are ordered as before (by title, then id). With ``books_limit``
+        each book is numbered within its author by a ``ROW_NUMBER()`` window
+        and only the first ``books_limit`` rows are kept, still in one query.
+        """
+        ordering = ('title', 'pk')
+        books = Book.objects.only('id', 'title', 'publication_year', 'author').order_by(*ordering)
+        limit = self.get_books_limit()
+        if limit is not None:
+            books = books.annotate(
+                author_row=Window(RowNumber(), partition_by=F('author_id'), order_by=ordering),
+            ).filter(author_row__lte=limit)
+        return Prefetch('books', queryset=books)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('books'):
+            queryset = queryset.prefetch_related(self.get_books_prefetch())
+        return queryset
+
+
+class BookFieldsetMixin(SparseFieldsetMixin):
+    """
+    Sparse fieldsets for books.
+
+    ``author`` is serialized as a primary key, so the author row is only
+    joined (``select_related``) for the full representation, where keyset
+    pagination over ``author__name`` can use it.
+    """
+    field_columns = {
+        'id': ('id',),
+        'title': ('title',),
+        'publication_year': ('publication_year',),
+        'author': ('author',),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_requested_fields() is None:
+            queryset = queryset.select_related('author')
+        return queryset
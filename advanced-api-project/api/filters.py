@@ -4,8 +4,9 @@ This module provides filtering capabilities for the Book and Author models.
 """
 
 import django_filters
-from django.db.models import Q, Count
+from django.db.models import Q
 from .models import Book, Author
+from .search import search_books
 
 
 class BookFilter(django_filters.FilterSet):
@@ -65,18 +66,19 @@ class BookFilter(django_filters.FilterSet):
         """
         Custom search method to search across multiple fields.
         
+        Uses the full-text index (FTS5 on SQLite, tsvector on PostgreSQL)
+        when available and falls back to icontains on title and author name.
+        See api/search.py.
+        
         Args:
             queryset: The queryset to search
             name: The field name
             value: The search value
             
         Returns:
-            Filtered queryset
+            Filtered queryset (annotated with search_rank when indexed)
         """
-        return queryset.filter(
-            Q(title__icontains=value) |
-            Q(author__name__icontains=value)
-        )
+        return search_books(queryset, value)
 
 
 class AuthorFilter(django_filters.FilterSet):
@@ -108,6 +110,9 @@ class AuthorFilter(django_filters.FilterSet):
         """
         Filter authors with minimum number of books.
         
+        Reads the denormalized Author.book_count column, so no
+        COUNT/GROUP BY over the books table is needed.
+        
         Args:
             queryset: The queryset to filter
             name: The field name
@@ -116,14 +121,14 @@ class AuthorFilter(django_filters.FilterSet):
         Returns:
             Filtered queryset
         """
-        return queryset.annotate(
-            book_count=Count('books')
-        ).filter(book_count__gte=value)
+        return queryset.filter(book_count__gte=value)
     
     def filter_max_book_count(self, queryset, name, value):
         """
         Filter authors with maximum number of books.
         
+        Reads the denormalized Author.book_count column.
+        
         Args:
             queryset: The queryset to filter
             name: The field name
@@ -132,9 +137,7 @@ class AuthorFilter(django_filters.FilterSet):
         Returns:
             Filtered queryset
         """
-        return queryset.annotate(
-            book_count=Count('books')
-        ).filter(book_count__lte=value)
+        return queryset.filter(book_count__lte=value)
     
     def filter_search(self, queryset, name, value):
         """
@@ -0,0 +1,432 @@
+"""
+Streaming, idempotent import of books from CSV or NDJSON files.
+
+Records are read one line at a time (the file is never loaded whole) and
+written in batches, one transaction per batch:
+
+- Authors are resolved by exact name through an in-memory ``name -> id``
+  map loaded once at start (the lowest id wins for duplicate names).
+  Unknown authors are created in bulk with the batch, unless author
+  creation is disabled, in which case their records are rejected.
+- Books are upserted on their natural key ``(title, author, publication
+  year)``: keys that already exist, in the database or earlier in the
+  file, are left untouched, so importing the same file twice creates
+  nothing the second time. The key covers every imported field, so there
+  is nothing to update on a match. The API itself still accepts duplicate
+  books; the key is only enforced by the importer.
+- Bulk writes bypass the model signals, so ``Author.book_count``, the
+  catalog statistics, the ``author_name`` snapshot, the search index and
+  the response cache are maintained here (as in the bulk API endpoint).
+
+After every committed batch the byte offset just past its last record is
+saved to a checkpoint file, so an interrupted import resumes where it
+stopped. Lines are read in binary mode to keep offsets exact.
+
+Input format (header row for CSV, one JSON object per line for NDJSON):
+
+    title,author,publication_year
+    Dune,Frank Herbert,1965
+"""
+
+import csv
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+
+from .counters import adjust_book_counts, count_created
+from .models import Author, Book, CatalogStat
+from .signals import books_bulk_written, invalidate_model
+from .stats import adjust_stats, count_created_books
+
+
+FORMATS = ('csv', 'ndjson')
+
+# Errors kept in the report (all invalid records are counted)
+MAX_REPORTED_ERRORS = 20
+
+TITLE_MAX_LENGTH = Book._meta.get_field('title').max_length
+AUTHOR_MAX_LENGTH = Author._meta.get_field('name').max_length
+
+
+class ImportFileError(Exception):
+    """The input file cannot be imported (unknown format, bad header)."""
+
+
+def detect_format(path):
+    """Return the input format implied by the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise ImportFileError(f'Cannot tell the format of {path}; use --format csv or ndjson.')
+
+
+def read_header(path, input_format):
+    """
+    Return the CSV column names and the offset of the first data line.
+
+    NDJSON files have no header: returns ``(None, 0)``.
+    """
+    if input_format != 'csv':
+        return None, 0
+    with open(path, 'rb') as stream:
+        line = stream.readline()
+        header = next(csv.reader([line.decode('utf-8-sig')]), [])
+        if not header:
+            raise ImportFileError(f'{path} has no CSV header.')
+        return [name.strip() for name in header], stream.tell()
+
+
+def iter_lines(path, start=0, end=None):
+    """
+    Yield ``(line bytes, offset after the line)`` from ``start``.
+
+    Stops at the first line starting at or after ``end``; a line that
+    starts before ``end`` is read to its end.
+    """
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        position = start
+        while end is None or position < end:
+            line = stream.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line, position
+
+
+def iter_csv_rows(lines):
+    """
+    Group raw lines into CSV records, joining lines inside quoted fields.
+
+    Yields ``(row text, offset after the row)``.
+    """
+    pending = ''
+    for line, offset in lines:
+        pending += line.decode('utf-8')
+        if pending.count('"') % 2:
+            continue  # A quoted field continues on the next line
+        yield pending, offset
+        pending = ''
+    if pending:
+        yield pending, offset
+
+
+def iter_records(path, input_format, start=None, end=None, header=None):
+    """
+    Yield ``(record, offset after it, parse error)`` for each input record.
+
+    Args:
+        path: Input file
+        input_format: 'csv' or 'ndjson'
+        start: Byte offset to start at (default: the first data line)
+        end: Byte offset to stop at (see ``iter_lines``)
+        header: CSV column names (read from the file if not given)
+
+    ``record`` is a dict, or None when the line could not be parsed (the
+    error message says why). Blank lines are skipped.
+    """
+    data_start = 0
+    if input_format == 'csv':
+        file_header, data_start = read_header(path, input_format)
+        header = header or file_header
+    lines = iter_lines(path, data_start if start is None else max(start, data_start), end)
+
+    if input_format == 'ndjson':
+        for line, offset in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield None, offset, f'Invalid JSON: {exc}'
+                continue
+            if not isinstance(record, dict):
+                yield None, offset, 'Expected a JSON object'
+                continue
+            yield record, offset, None
+        return
+
+    for text, offset in iter_csv_rows(lines):
+        if not text.strip():
+            continue
+        row = next(csv.reader([text]), [])
+        if len(row) != len(header):
+            yield None, offset, f'Expected {len(header)} columns, got {len(row)}'
+            continue
+        yield dict(zip(header, row)), offset, None
+
+
+def clean_record(record, current_year):
+    """
+    Validate a record with the rules of ``BookSerializer``.
+
+    Args:
+        record: The raw record (a dict of strings or JSON values)
+        current_year: Latest accepted publication year (taken once per run,
+            so a run spanning New Year's Eve applies one rule)
+
+    Returns:
+        tuple: (title, author name, publication year)
+
+    Raises:
+        ValueError: With a message describing the first problem found
+    """
+    title = str(record.get('title') or '').strip()
+    author = str(record.get('author') or '').strip()
+    if not title:
+        raise ValueError('title is required')
+    if len(title) > TITLE_MAX_LENGTH:
+        raise ValueError(f'title is longer than {TITLE_MAX_LENGTH} characters')
+    if not author:
+        raise ValueError('author is required')
+    if len(author) > AUTHOR_MAX_LENGTH:
+        raise ValueError(f'author is longer than {AUTHOR_MAX_LENGTH} characters')
+    try:
+        year = int(str(record.get('publication_year', '')).strip())
+    except ValueError:
+        raise ValueError('publication_year must be an integer')
+    if year > current_year:
+        raise ValueError(f'publication_year cannot be in the future (current year is {current_year})')
+    return title, author, year
+
+
+def validate_records(records, current_year=None):
+    """
+    Validate raw ``(record, offset, parse error)`` triples.
+
+    Yields ``(values, offset, error)``: ``values`` is the result of
+    ``clean_record`` or None when ``error`` says why the record is invalid.
+    ``current_year`` defaults to the year at the first record.
+    """
+    if current_year is None:
+        current_year = datetime.now().year
+    for record, offset, error in records:
+        if error is None:
+            try:
+                yield clean_record(record, current_year), offset, None
+                continue
+            except ValueError as exc:
+                error = str(exc)
+        yield None, offset, error
+
+
+def load_author_map():
+    """Return ``{author name: id}`` for every author (lowest id per name)."""
+    authors = {}
+    for pk, name in Author.objects.order_by('pk').values_list('pk', 'name').iterator(chunk_size=10000):
+        authors.setdefault(name, pk)
+    return authors
+
+
+def load_checkpoint(path):
+    """Return the saved checkpoint dict, or None if there is none."""
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically (a crash leaves the old or the new one)."""
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as stream:
+        json.dump(checkpoint, stream)
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temporary, path)
+
+
+class BookImporter:
+    """
+    Upsert batches of cleaned book records.
+
+    Attributes:
+        create_authors: Create unknown authors (otherwise reject the records)
+        authors: The ``name -> id`` author map
+        stats: Counters: read, created, existing, invalid, authors_created
+        errors: The first ``MAX_REPORTED_ERRORS`` ``(offset, message)`` pairs
+        current_year: Latest publication year accepted during this run
+    """
+
+    def __init__(self, create_authors=True):
+        self.create_authors = create_authors
+        self.authors = load_author_map()
+        self.stats = Counter()
+        self.errors = []
+        self.started = time.perf_counter()
+        self.current_year = datetime.now().year
+
+    def report(self, errors=False):
+        """Return the counters and throughput so far (and the first errors)."""
+        elapsed = time.perf_counter() - self.started
+        report = {
+            **{key: self.stats[key] for key in ('read', 'created', 'existing', 'invalid', 'authors_created')},
+            'elapsed_s': round(elapsed, 3),
+            'rows_per_s': rows_per_second(self.stats['read'], elapsed),
+        }
+        if errors:
+            report['errors'] = [{'offset': offset, 'error': message} for offset, message in self.errors]
+        return report
+
+    def reject(self, offset, message):
+        self.stats['invalid'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((offset, message))
+
+    def clean(self, records):
+        """
+        Validate raw ``(record, offset, parse error)`` triples.
+
+        Returns:
+            list: ``(offset, (title, author name, year))`` for valid records
+        """
+        return self.accept(validate_records(records, self.current_year))
+
+    def accept(self, validated):
+        """
+        Count validated ``(values, offset, error)`` triples and reject the invalid ones.
+
+        Returns:
+            list: ``(offset, values)`` for the valid records
+        """
+        cleaned = []
+        for values, offset, error in validated:
+            self.stats['read'] += 1
+            if error is None:
+                cleaned.append((offset, values))
+            else:
+                self.reject(offset, error)
+        return cleaned
+
+    def resolve_authors(self, names):
+        """Make sure every name in ``names`` is in the author map (creating authors if allowed)."""
+        missing = sorted({name for name in names if name not in self.authors})
+        if not missing or not self.create_authors:
+            return
+        created = Author.objects.bulk_create([Author(name=name) for name in missing])
+        self.authors.update((author.name, author.pk) for author in created)
+        self.stats['authors_created'] += len(created)
+        adjust_stats({(CatalogStat.AUTHORS, 0): len(created)})
+        invalidate_model('author')
+
+    def existing_keys(self, keys):
+        """Return the natural keys among ``keys`` that are already stored."""
+        titles = {title for title, _, _ in keys}
+        author_ids = {author_id for _, author_id, _ in keys}
+        candidates = (
+            Book.objects.filter(author_id__in=author_ids, title__in=titles)
+            .values_list('title', 'author_id', 'publication_year')
+        )
+        return {key for key in candidates if key in keys}
+
+    def write_batch(self, cleaned):
+        """
+        Upsert one batch of cleaned records in a single transaction.
+
+        Returns:
+            list: The created Book instances
+        """
+        with transaction.atomic():
+            self.resolve_authors(author for _, (_, author, _) in cleaned)
+            keys = {}
+            for offset, (title, author, year) in cleaned:
+                author_id = self.authors.get(author)
+                if author_id is None:
+                    self.reject(offset, f'Unknown author: {author}')
+                    continue
+                key = (title, author_id, year)
+                if key in keys:
+                    self.stats['existing'] += 1
+                else:
+                    keys[key] = author
+            existing = self.existing_keys(keys) if keys else set()
+            self.stats['existing'] += len(existing)
+            books = [
+                Book(title=title, author_id=author_id, publication_year=year, author_name=author)
+                for (title, author_id, year), author in keys.items()
+                if (title, author_id, year) not in existing
+            ]
+            if books:
+                books = Book.objects.bulk_create(books)
+                adjust_book_counts(count_created(books))
+                adjust_stats(count_created_books(books))
+                books_bulk_written(books)
+            self.stats['created'] += len(books)
+        return books
+
+    def run(self, batches, on_batch=None):
+        """
+        Import ``batches`` of raw records.
+
+        Args:
+            batches: Iterable of ``(raw records, offset after the batch)``
+            on_batch: Called with the end offset after each committed batch
+        """
+        for records, end_offset in batches:
+            cleaned = self.clean(records)
+            if cleaned:
+                self.write_batch(cleaned)
+            if on_batch is not None:
+                on_batch(end_offset)
+
+
+def iter_batches(records, batch_size):
+    """Group ``(record, offset, error)`` triples into ``(batch, end offset)`` pairs."""
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch, item[1]
+            batch = []
+    if batch:
+        yield batch, batch[-1][1]
+
+
+def rows_per_second(rows, elapsed):
+    return round(rows / elapsed, 1) if elapsed > 0 else 0.0
+
+
+def check_format(path, input_format=None):
+    """Return ``input_format``, or the format implied by the extension."""
+    input_format = input_format or detect_format(path)
+    if input_format not in FORMATS:
+        raise ImportFileError(f'Unknown format {input_format!r}; use csv or ndjson.')
+    return input_format
+
+
+def import_file(path, input_format=None, batch_size=1000, start=None, create_authors=True,
+                checkpoint_path=None, progress=None):
+    """
+    Import a CSV/NDJSON file of books.
+
+    Args:
+        path: Input file
+        input_format: 'csv' or 'ndjson' (default: from the extension)
+        batch_size: Records per transaction
+        start: Byte offset to resume from (default: the first record)
+        create_authors: Create authors missing from the database
+        checkpoint_path: File updated with the offset after each batch
+        progress: Optional callable receiving a stats dict after each batch
+
+    Returns:
+        dict: Counters, elapsed seconds, throughput and the first errors
+    """
+    input_format = check_format(path, input_format)
+    importer = BookImporter(create_authors=create_authors)
+
+    def on_batch(offset):
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, {'path': os.path.abspath(path), 'offset': offset, 'stats': importer.report()})
+        if progress is not None:
+            progress({**importer.report(), 'offset': offset})
+
+    records = iter_records(path, input_format, start=start)
+    importer.run(iter_batches(records, batch_size), on_batch=on_batch)
+    return importer.report(errors=True)
@@ -0,0 +1,89 @@
+"""
+Benchmark every API route on a seeded throwaway database.
+
+A test database is created (the development database is never touched),
+seeded with a synthetic catalog and benchmarked with
+``api.benchmarks.BenchmarkRunner``. Results are written as JSON.
+
+Usage:
+    python manage.py benchmark_api --books 10000 --output bench.json
+    python manage.py benchmark_api --books 100000 --route book-list --repeat 50
+    python manage.py benchmark_api --compare bench.json --output bench-new.json
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.benchmarks import BenchmarkRunner, compare_results, seed_dataset
+from api.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Benchmark latency, query counts and memory of every API route and emit JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000,
+                            help='Number of books to seed (default: 10000).')
+        parser.add_argument('--books-per-author', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=30,
+                            help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only run this route or scenario name (repeatable).')
+        parser.add_argument('--with-cache', action='store_true',
+                            help='Keep the response and count caches enabled.')
+        parser.add_argument('--output', help='Write the JSON results to this file.')
+        parser.add_argument('--compare', help='Baseline JSON file; fail on regressions.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative p50 slowdown when comparing (default: 0.2).')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Reuse the test database (and its dataset) between runs.')
+
+    def handle(self, *args, **options):
+        log = self.stderr.write
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'],
+        )
+        try:
+            if Book.objects.count() != options['books']:
+                log(f"Seeding {options['books']} books...")
+                seed_dataset(
+                    options['books'],
+                    books_per_author=options['books_per_author'],
+                    batch_size=options['batch_size'],
+                    log=log,
+                )
+            runner = BenchmarkRunner(
+                repeat=options['repeat'],
+                warmup=options['warmup'],
+                use_cache=options['with_cache'],
+                only=options['routes'],
+            )
+            results = runner.run(log=log)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+            log(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if results['failed']:
+            raise CommandError('Scenarios without a 2xx response: ' + ', '.join(results['failed']))
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as handle:
+                baseline = json.load(handle)
+            regressions = compare_results(baseline, results, options['threshold'])
+            if regressions:
+                raise CommandError('Regressions found:\n' + '\n'.join(regressions))
+            log('No regressions against the baseline.')
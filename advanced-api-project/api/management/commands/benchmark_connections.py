@@ -0,0 +1,181 @@
+"""
+Measure requests/s with different database connection settings.
+
+A file-backed SQLite test database is seeded (an in-memory database would
+hide the cost of opening connections and of commits). Then, for each
+configuration, ``--concurrency`` threads send requests through Django's
+test ``Client``. The client fires the request started/finished signals,
+so connections are closed or kept exactly as under a real server. Each
+configuration reports the cost of opening (or, pooled, checking out) a
+connection and runs two workloads:
+
+- read: book detail and list GETs (response cache off, so every request
+  queries the database)
+- mixed: the same with every ``--write-every``-th request a book PATCH
+
+Configurations:
+    before: Django's SQLite backend, a new connection per request,
+        rollback journal, synchronous=FULL and deferred transactions
+        (the defaults)
+    persistent: CONN_MAX_AGE with health checks, the tuned SQLite options
+        of settings.py (WAL pragmas, IMMEDIATE transactions)
+    pooled: api.sqlite_pool with CONN_MAX_AGE=0 (connections go back
+        to the pool after each request), the tuned SQLite options
+    settings: the DATABASES['default'] configuration of settings.py
+
+Usage:
+    python manage.py benchmark_connections --requests 2000 --concurrency 8
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import percentile, seed_dataset
+from api.models import Book
+from api.sqlite_pool.base import close_pools
+
+
+TUNED_OPTIONS = {key: value for key, value in settings.SQLITE_OPTIONS.items() if key != 'pool'}
+
+CONFIGURATIONS = {
+    'before': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'OPTIONS': {'init_command': 'PRAGMA synchronous=FULL'},
+    },
+    'persistent': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': TUNED_OPTIONS,
+    },
+    'pooled': {
+        'ENGINE': 'api.sqlite_pool',
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'OPTIONS': {**TUNED_OPTIONS, 'pool': True},
+    },
+    'settings': {
+        key: settings.DATABASES['default'][key]
+        for key in ('ENGINE', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')
+    },
+}
+
+
+def set_journal_mode(path, mode):
+    """Switch the journal mode once, before the workers connect (it is stored in the file)."""
+    with closing(sqlite3.connect(str(path))) as raw:
+        raw.execute(f'PRAGMA journal_mode={mode}')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark requests/s with per-request, persistent and pooled database connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests per configuration and workload.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--books', type=int, default=2000)
+        parser.add_argument('--write-every', type=int, default=10,
+                            help='Every n-th request of the mixed workload is a write.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        directory = tempfile.mkdtemp(prefix='connection-benchmark-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        database = connections.settings['default']
+        original = {key: database[key] for key in CONFIGURATIONS['before']}
+        results = {}
+        try:
+            seed_dataset(options['books'])
+            user = User.objects.create_user('connection-benchmark', password='unused')
+            token = Token.objects.create(user=user)
+            book_ids = list(Book.objects.values_list('pk', flat=True)[:100])
+            for name, config in CONFIGURATIONS.items():
+                connections.close_all()
+                close_pools()
+                database.update(config)
+                set_journal_mode(database['NAME'], 'delete' if name == 'before' else 'wal')
+                results[name] = {
+                    'connect_us': self.measure_connect(),
+                    **{
+                        workload: self.measure(token, book_ids, options, write_every)
+                        for workload, write_every in (('read', 0), ('mixed', options['write_every']))
+                    },
+                }
+        finally:
+            database.update(original)
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name in ('persistent', 'pooled', 'settings'):
+            for workload in ('read', 'mixed'):
+                results[name][workload]['speedup'] = round(
+                    results[name][workload]['throughput_rps'] / results['before'][workload]['throughput_rps'], 2
+                )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure_connect(self, rounds=200):
+        """Return the mean cost of connecting and closing in microseconds."""
+        start = time.perf_counter()
+        for _ in range(rounds):
+            wrapper = connections.create_connection('default')
+            wrapper.ensure_connection()
+            wrapper.close()
+        return round((time.perf_counter() - start) / rounds * 1e6, 1)
+
+    def measure(self, token, book_ids, options, write_every):
+        per_worker = options['requests'] // options['concurrency']
+
+        def worker(index):
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}', raise_request_exception=False)
+            timings, errors = [], 0
+            try:
+                for i in range(per_worker):
+                    book_id = book_ids[(index * per_worker + i) % len(book_ids)]
+                    start = time.perf_counter()
+                    if write_every and i % write_every == write_every - 1:
+                        response = client.patch(f'/api/books/{book_id}/update/', {'publication_year': 2000 + i % 20},
+                                                content_type='application/json')
+                    elif i % 2:
+                        response = client.get('/api/books/', {'page_size': 10, 'author': book_id % 50 + 1})
+                    else:
+                        response = client.get(f'/api/books/{book_id}/')
+                    timings.append((time.perf_counter() - start) * 1000)
+                    errors += response.status_code >= 400
+            finally:
+                connections.close_all()
+            return timings, errors
+
+        with override_settings(API_RESPONSE_CACHE={'ENABLED': False},
+                               API_THROTTLING={'ENABLED': False},
+                               API_PROFILING={'ENABLED': False}):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                outcomes = list(pool.map(worker, range(options['concurrency'])))
+            elapsed = time.perf_counter() - start
+
+        timings = [timing for worker_timings, _ in outcomes for timing in worker_timings]
+        return {
+            'requests': len(timings),
+            'errors': sum(errors for _, errors in outcomes),
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
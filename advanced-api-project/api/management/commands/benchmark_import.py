@@ -0,0 +1,94 @@
+"""
+Measure import throughput (rows/s) against the number of parse workers.
+
+A CSV file of ``--rows`` books by ``--authors`` authors is generated, then
+imported once per configuration into a fresh file-backed SQLite test
+database (an in-memory database would hide the cost of commits):
+
+- serial: ``import_file``, parsing in the writer process
+- workers=n: ``import_parallel`` with n parse/validate processes feeding
+  the single writer
+
+Each configuration also reports how long the writer spent in database
+transactions, which bounds the speed-up parallel parsing can give.
+
+Usage:
+    python manage.py benchmark_import --rows 200000 --workers 1 2 4 8
+"""
+
+import csv
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from api.importer import BookImporter, import_file
+from api.parallel_import import import_parallel
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the serial and multiprocess book import.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--authors', type=int, default=5000)
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                            help='Worker counts to run the parallel import with.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix='import-benchmark-')
+        path = os.path.join(directory, 'books.csv')
+        self.write_dataset(path, options['rows'], options['authors'])
+
+        setup_test_environment()
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        results = {'cpus': os.cpu_count(), 'rows': options['rows']}
+        try:
+            results['serial'] = self.measure(lambda: import_file(path, batch_size=options['batch_size']))
+            for workers in options['workers']:
+                results[f'workers={workers}'] = self.measure(
+                    lambda: import_parallel(path, workers=workers, batch_size=options['batch_size'])
+                )
+        finally:
+            teardown_test_environment()
+            os.remove(path)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def write_dataset(self, path, rows, authors):
+        with open(path, 'w', newline='', encoding='utf-8') as stream:
+            writer = csv.writer(stream)
+            writer.writerow(['title', 'author', 'publication_year'])
+            for i in range(rows):
+                writer.writerow([f'Imported Book {i}', f'Imported Author {i % authors}', 1900 + i % 125])
+
+    def measure(self, run):
+        """Import into a new test database; return throughput and writer time."""
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        write_time = [0.0]
+        write_batch = BookImporter.write_batch
+
+        def timed_write_batch(importer, cleaned):
+            start = time.perf_counter()
+            try:
+                return write_batch(importer, cleaned)
+            finally:
+                write_time[0] += time.perf_counter() - start
+
+        try:
+            with override_settings(API_PROFILING={'ENABLED': False}), \
+                    mock.patch.object(BookImporter, 'write_batch', timed_write_batch):
+                report = run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return {
+            'created': report['created'],
+            'elapsed_s': report['elapsed_s'],
+            'rows_per_s': report['rows_per_s'],
+            'writer_busy_pct': round(write_time[0] / report['elapsed_s'] * 100, 1) if report['elapsed_s'] else 0.0,
+        }
@@ -0,0 +1,104 @@
+"""
+Measure the per-request overhead of SlidingWindowThrottle.
+
+Runs on a throwaway test database. For each configuration (throttling
+disabled, 'local' counters, 'cache' counters) it reports:
+
+- the cost of one ``allow_request()`` call in microseconds, and
+- the p50/p99 latency of token-authenticated PATCH requests to the book
+  update endpoint (rates are raised so no request is rejected).
+
+Usage:
+    python manage.py benchmark_throttling --calls 20000 --requests 300
+"""
+
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.benchmarks import percentile
+from api.models import Author, Book
+from api.throttling import SlidingWindowThrottle, local_store
+from api.views import BookUpdateView
+
+
+CONFIGURATIONS = {
+    'disabled': {'ENABLED': False},
+    'local': {'ENABLED': True, 'BACKEND': 'local'},
+    'cache': {'ENABLED': True, 'BACKEND': 'cache', 'CACHE_ALIAS': 'default'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request overhead of the sliding-window throttle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=20000,
+                            help='allow_request() calls per configuration.')
+        parser.add_argument('--requests', type=int, default=300,
+                            help='HTTP requests per configuration.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user('throttle-benchmark', password='unused')
+            token = Token.objects.create(user=user)
+            author = Author.objects.create(name='Throttle Benchmark')
+            book = Book.objects.create(title='Throttle Benchmark', publication_year=2000, author=author)
+            results = {}
+            for name, config in CONFIGURATIONS.items():
+                settings = {**config, 'RATES': {'book-write': '100000000/min'}}
+                with override_settings(API_THROTTLING=settings, API_PROFILING={'ENABLED': False}):
+                    local_store.clear()
+                    caches['default'].clear()
+                    results[name] = {
+                        'allow_request_us': self.measure_calls(user, options['calls']),
+                        **self.measure_requests(token, book, options['requests']),
+                    }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for name in ('local', 'cache'):
+            results[name]['p50_overhead_ms'] = round(results[name]['p50_ms'] - results['disabled']['p50_ms'], 3)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure_calls(self, user, calls):
+        """Return the mean cost of one allow_request() call in microseconds."""
+        http_request = APIRequestFactory().patch('/api/books/1/update/')
+        force_authenticate(http_request, user=user)
+        view = BookUpdateView()
+        request = Request(http_request, authenticators=view.get_authenticators())
+        request.user  # Authenticate once, outside the timed loop
+        throttle = SlidingWindowThrottle()
+        start = time.perf_counter()
+        for _ in range(calls):
+            throttle.allow_request(request, view)
+        return round((time.perf_counter() - start) / calls * 1e6, 3)
+
+    def measure_requests(self, token, book, requests):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        path = f'/api/books/{book.pk}/update/'
+        for _ in range(20):  # Warm up (connections, caches) before timing
+            client.patch(path, {'publication_year': 2000}, content_type='application/json')
+        timings = []
+        for i in range(requests):
+            start = time.perf_counter()
+            response = client.patch(path, {'publication_year': 2000 + i % 2}, content_type='application/json')
+            timings.append((time.perf_counter() - start) * 1000)
+        return {
+            'status': response.status_code,
+            'requests': requests,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
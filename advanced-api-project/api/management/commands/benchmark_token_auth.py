@@ -0,0 +1,77 @@
+"""
+Compare TokenAuthentication with CachedTokenAuthentication.
+
+Runs on a throwaway test database: creates a staff user with a token, then
+sends the same token-authenticated requests with the cache disabled and
+enabled, and reports queries and latency per request.
+
+Usage:
+    python manage.py benchmark_token_auth --requests 500
+"""
+
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request queries and latency of cached token authentication.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--path', default='/api/cache-stats/',
+                            help='Token-authenticated endpoint to request.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user('token-benchmark', password='unused', is_staff=True)
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            results = {
+                'uncached': self.measure(client, options, enabled=False),
+                'cached': self.measure(client, options, enabled=True),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        saved = results['uncached']['queries_per_request'] - results['cached']['queries_per_request']
+        results['queries_saved_per_request'] = round(saved, 3)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, client, options, enabled):
+        token_cache.clear()
+        timings = []
+        queries = 0
+        with override_settings(API_TOKEN_CACHE={'ENABLED': enabled},
+                               API_PROFILING={'ENABLED': False}):
+            for _ in range(options['requests']):
+                reset_queries()
+                start = time.perf_counter()
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(options['path'])
+                timings.append((time.perf_counter() - start) * 1000)
+                queries += len(captured.captured_queries)
+        return {
+            'status': response.status_code,
+            'requests': options['requests'],
+            'queries_per_request': round(queries / options['requests'], 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
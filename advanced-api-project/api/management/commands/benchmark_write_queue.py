@@ -0,0 +1,113 @@
+"""
+Compare direct and coalesced book writes under concurrent load.
+
+A file-backed SQLite test database is created (an in-memory database would
+hide the cost of commits), then ``--concurrency`` threads each send book
+create requests through Django's test ``Client``:
+
+- direct: every request commits its own transaction, as today
+- coalesced MAX_BATCH=n: writes go through the single writer thread
+  (api/write_queue.py), committing up to n writes per transaction
+
+Throughput, p50/p99 latency, failed requests (e.g. "database is locked")
+and the average number of writes per committed batch are written as JSON.
+
+Usage:
+    python manage.py benchmark_write_queue --requests 2000 --concurrency 16 --max-batch 1 16 100
+"""
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import percentile
+from api.models import Author
+from api.write_queue import write_queue
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent book writes with and without the write coalescing queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Create requests per configuration.')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 16, 100],
+                            help='MAX_BATCH values to run the coalesced path with.')
+        parser.add_argument('--flush-interval', type=float, default=0.002)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        directory = tempfile.mkdtemp(prefix='write-queue-benchmark-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user('write-benchmark', password='unused')
+            token = Token.objects.create(user=user)
+            author = Author.objects.create(name='Write Benchmark')
+            results = {'direct': self.measure(token, author, options, None)}
+            for max_batch in options['max_batch']:
+                results[f'coalesced MAX_BATCH={max_batch}'] = self.measure(token, author, options, max_batch)
+        finally:
+            write_queue.stop()
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def measure(self, token, author, options, max_batch):
+        coalescing = {
+            'ENABLED': max_batch is not None,
+            'MAX_BATCH': max_batch or 1,
+            'FLUSH_INTERVAL': options['flush_interval'],
+        }
+        per_worker = options['requests'] // options['concurrency']
+        stats_before = dict(write_queue.stats)
+
+        def worker(index):
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}', raise_request_exception=False)
+            timings, statuses = [], []
+            try:
+                for i in range(per_worker):
+                    start = time.perf_counter()
+                    response = client.post('/api/books/create/', {
+                        'title': f'Write {max_batch} {index}-{i}',
+                        'publication_year': 2000,
+                        'author': author.pk,
+                    }, content_type='application/json')
+                    timings.append((time.perf_counter() - start) * 1000)
+                    statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+            return timings, statuses
+
+        with override_settings(API_WRITE_COALESCING=coalescing,
+                               API_THROTTLING={'ENABLED': False},
+                               API_PROFILING={'ENABLED': False}):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                outcomes = list(pool.map(worker, range(options['concurrency'])))
+            elapsed = time.perf_counter() - start
+            write_queue.stop()
+
+        timings = [timing for worker_timings, _ in outcomes for timing in worker_timings]
+        statuses = [code for _, worker_statuses in outcomes for code in worker_statuses]
+        batches = write_queue.stats['batches'] - stats_before['batches']
+        writes = write_queue.stats['writes'] - stats_before['writes']
+        return {
+            'requests': len(statuses),
+            'errors': sum(1 for code in statuses if code != 201),
+            'throughput_rps': round(len(statuses) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'writes_per_commit': round(writes / batches, 2) if batches else 1.0,
+        }
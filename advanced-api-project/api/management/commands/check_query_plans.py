@@ -0,0 +1,57 @@
+"""
+EXPLAIN every filter/ordering combination of the list views and flag full scans.
+
+Usage:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --verbose-plans --strict
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.query_plans import check_view
+from api.views import AuthorListView, BookListView
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the list views\' filter/ordering combinations and flag full table scans.'
+
+    views = {'books': BookListView, 'authors': AuthorListView}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--view', choices=sorted(self.views), action='append', dest='view_names',
+                            help='Only check this view (repeatable).')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the plan of every flagged combination.')
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error if an unexpected full scan is found.')
+
+    def handle(self, *args, **options):
+        unexpected = 0
+        for name in options['view_names'] or sorted(self.views):
+            results = check_view(self.views[name], database=options['database'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({len(results)} combinations)'))
+            for result in results:
+                if result['full_scans']:
+                    tables = ', '.join(sorted(set(result['full_scans'])))
+                    if result['expected']:
+                        status = self.style.WARNING(f"full scan of {tables} ({result['expected']})")
+                    else:
+                        status = self.style.ERROR(f'FULL SCAN of {tables}')
+                        unexpected += 1
+                elif result['temp_sort']:
+                    status = self.style.WARNING('temp sort')
+                else:
+                    status = self.style.SUCCESS('ok')
+                self.stdout.write(f"  {result['filter']:<28} ordering={result['ordering']:<20} {status}")
+                if options['verbose_plans'] and (result['full_scans'] or result['temp_sort']):
+                    for line in result['plan'].splitlines():
+                        self.stdout.write(f'      {line}')
+
+        if unexpected:
+            message = f'{unexpected} combinations scan a full table unexpectedly.'
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No unexpected full table scans.'))
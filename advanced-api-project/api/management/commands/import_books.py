@@ -0,0 +1,98 @@
+"""
+Import books from a CSV or NDJSON file (see api/importer.py).
+
+Importing is idempotent: books already stored under the same title, author
+and publication year are skipped, so an import can be re-run safely. After
+each committed batch the byte offset reached is saved to the checkpoint
+file; ``--resume`` continues from it after an interruption. The checkpoint
+is removed once the whole file has been imported.
+
+With ``--workers N`` records are parsed and validated by N processes and
+written by this one (see api/parallel_import.py); book ids then do not
+follow the file order.
+
+Progress lines go to stderr; the final report (counters, rows/s and the
+first invalid records) is written to stdout as JSON.
+
+Usage:
+    python manage.py import_books books.csv --batch-size 1000
+    python manage.py import_books books.ndjson --resume
+    python manage.py import_books books.csv --workers 4
+"""
+
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import FORMATS, ImportFileError, import_file, load_checkpoint
+from api.parallel_import import import_parallel
+
+
+class Command(BaseCommand):
+    help = 'Stream books from a CSV/NDJSON file into the database, skipping existing ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (title,author,publication_year header) or NDJSON file.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Records per transaction.')
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file (default: <path>.checkpoint).')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue from the offset saved in the checkpoint.')
+        parser.add_argument('--offset', type=int,
+                            help='Start at this byte offset (a record boundary).')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Parse/validate processes (0: parse in this process).')
+        parser.add_argument('--no-create-authors', action='store_false', dest='create_authors',
+                            help='Reject records whose author does not exist instead of creating it.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'{path} does not exist.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+
+        start, ranges = options['offset'], None
+        if options['resume']:
+            checkpoint = load_checkpoint(checkpoint_path)
+            if checkpoint is None:
+                raise CommandError(f'No checkpoint found at {checkpoint_path}.')
+            if checkpoint['path'] != os.path.abspath(path):
+                raise CommandError(f'{checkpoint_path} belongs to {checkpoint["path"]}.')
+            if 'ranges' in checkpoint:
+                ranges = checkpoint['ranges']
+                self.stderr.write(f'Resuming {len(ranges)} ranges.')
+            else:
+                start = checkpoint['offset']
+                self.stderr.write(f'Resuming at byte {start}.')
+
+        def progress(report):
+            self.stderr.write(
+                f"{report['read']} read, {report['created']} created, {report['existing']} existing, "
+                f"{report['invalid']} invalid ({report['rows_per_s']} rows/s)"
+            )
+
+        arguments = {
+            'input_format': options['format'],
+            'batch_size': options['batch_size'],
+            'start': start,
+            'create_authors': options['create_authors'],
+            'checkpoint_path': checkpoint_path,
+            'progress': progress if options['verbosity'] > 1 else None,
+        }
+        try:
+            if options['workers'] > 0 or ranges is not None:
+                report = import_parallel(path, workers=options['workers'] or None, ranges=ranges, **arguments)
+            else:
+                report = import_file(path, **arguments)
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,119 @@
+"""
+Load test the async read views against their sync counterparts.
+
+A test database is created and seeded (as for ``benchmark_api``), then the
+same list of read URLs is requested concurrently through both paths:
+
+- sync: ``/api/books/`` etc. with Django's test ``Client`` from a thread
+  pool of ``--concurrency`` workers (one request per thread at a time,
+  like a threaded WSGI server)
+- async: ``/api/async/books/`` etc. with ``AsyncClient`` and
+  ``--concurrency`` in-flight requests on one event loop (like an ASGI
+  server)
+
+Both clients run the full middleware stack in-process, so the numbers
+compare the request handling, not a network server. Throughput and
+p50/p99 latency per path are written as JSON.
+
+Usage:
+    python manage.py load_test_async --books 10000 --requests 500 --concurrency 20
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from api.benchmarks import percentile, seed_dataset
+from api.models import Author, Book
+
+
+def build_paths(prefix, book_id, author_id):
+    """Return the read URLs requested on each path, under ``prefix``."""
+    return [
+        f'{prefix}books/',
+        f'{prefix}books/?publication_year_min=1990&publication_year_max=2000',
+        f'{prefix}books/?ordering=-publication_year&page=3',
+        f'{prefix}books/?pagination=cursor',
+        f'{prefix}books/{book_id}/',
+        f'{prefix}authors/',
+        f'{prefix}authors/?fields=id,name',
+        f'{prefix}authors/{author_id}/',
+    ]
+
+
+def summarize(timings, elapsed, statuses):
+    return {
+        'requests': len(timings),
+        'errors': sum(1 for code in statuses if code != 200),
+        'throughput_rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and latency of the async and sync read views under concurrency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Requests per path (spread over the read URLs).')
+        parser.add_argument('--concurrency', type=int, default=10)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed_dataset(options['books'], log=self.stderr.write)
+            book_id = Book.objects.order_by('pk').values_list('pk', flat=True).first()
+            author_id = Author.objects.order_by('pk').values_list('pk', flat=True).first()
+            with override_settings(API_RESPONSE_CACHE={'ENABLED': False},
+                                   API_PROFILING={'ENABLED': False}):
+                results = {
+                    'sync': self.run_sync(build_paths('/api/', book_id, author_id), options),
+                    'async': asyncio.run(
+                        self.run_async(build_paths('/api/async/', book_id, author_id), options)
+                    ),
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        results['concurrency'] = options['concurrency']
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_sync(self, paths, options):
+        def request(i):
+            client = Client()
+            start = time.perf_counter()
+            response = client.get(paths[i % len(paths)])
+            duration = (time.perf_counter() - start) * 1000
+            connections.close_all()
+            return duration, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            outcomes = list(executor.map(request, range(options['requests'])))
+        elapsed = time.perf_counter() - start
+        return summarize([t for t, _ in outcomes], elapsed, [s for _, s in outcomes])
+
+    async def run_async(self, paths, options):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                return (time.perf_counter() - start) * 1000, response.status_code
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(request(i) for i in range(options['requests'])))
+        elapsed = time.perf_counter() - start
+        return summarize([t for t, _ in outcomes], elapsed, [s for _, s in outcomes])
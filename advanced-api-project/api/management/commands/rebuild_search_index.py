@@ -0,0 +1,32 @@
+"""
+Rebuild the full-text search index for books.
+
+Usage:
+    python manage.py rebuild_search_index [--database default]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import search
+from api.signals import invalidate_model
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the FTS5 book search index from the Book and Author tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to rebuild')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        search.reset_fts_cache()
+        if not search.fts_available(alias):
+            raise CommandError(
+                f'No full-text index on database "{alias}" (SQLite with FTS5 is required; run migrate first).'
+            )
+        with transaction.atomic(using=alias):
+            count = search.rebuild_index(alias)
+            # Search results may change, so drop cached book responses
+            invalidate_model('book')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} books.'))
@@ -0,0 +1,23 @@
+"""
+Recompute the denormalized Author.book_count column.
+
+Usage:
+    python manage.py recompute_book_counts
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import recompute_book_counts
+from api.signals import invalidate_model
+
+
+class Command(BaseCommand):
+    help = 'Recompute Author.book_count from the Book table and report drifted rows.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = recompute_book_counts()
+            if fixed:
+                invalidate_model('author')
+        self.stdout.write(self.style.SUCCESS(f'Fixed book_count on {fixed} authors.'))
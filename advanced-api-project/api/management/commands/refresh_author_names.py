@@ -0,0 +1,20 @@
+"""
+Rewrite the denormalized Book.author_name snapshot from the Author table.
+
+Usage:
+    python manage.py refresh_author_names
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.snapshots import refresh_author_names
+
+
+class Command(BaseCommand):
+    help = 'Rewrite Book.author_name from the Author table and report drifted rows.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = refresh_author_names()
+        self.stdout.write(self.style.SUCCESS(f'Fixed author_name on {fixed} books.'))
@@ -0,0 +1,63 @@
+"""
+Copy the primary SQLite database into the replica files.
+
+A stand-in for database replication when trying read replicas locally
+(see api/replicas.py): each replica alias in ``API_READ_REPLICAS`` that
+uses SQLite receives a consistent snapshot of the primary through SQLite's
+online backup API, so it can run while the API is serving requests. With
+``--interval`` the copy repeats, and the replicas lag behind the primary
+by at most about one interval (keep STICKY_SECONDS above that).
+
+Usage:
+    python manage.py replicate_db
+    python manage.py replicate_db --interval 2
+"""
+
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from api.replicas import replica_aliases
+
+
+def sqlite_path(alias):
+    if connections[alias].vendor != 'sqlite':
+        raise CommandError(f"Database '{alias}' is not SQLite; use the database's own replication.")
+    return str(connections[alias].settings_dict['NAME'])
+
+
+def replicate(source, target):
+    """Copy the SQLite database at ``source`` into ``target`` (pages, not rows)."""
+    primary, replica = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        primary.backup(replica)
+    finally:
+        primary.close()
+        replica.close()
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the configured read replica files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Repeat the copy every INTERVAL seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError('No replica aliases are configured in API_READ_REPLICAS.')
+        source = sqlite_path(DEFAULT_DB_ALIAS)
+        targets = {alias: sqlite_path(alias) for alias in aliases}
+
+        while True:
+            start = time.perf_counter()
+            for alias, target in targets.items():
+                replicate(source, target)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"Replicated to {', '.join(targets)} in {elapsed:.1f} ms.")
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-17 10:05
+
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    """Create and populate the FTS5 index for book search (SQLite only)."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS api_book_fts "
+            "USING fts5(title, author_name, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            "INSERT INTO api_book_fts (rowid, title, author_name) "
+            "SELECT b.id, b.title, a.name FROM api_book b JOIN api_author a ON a.id = b.author_id"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS api_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_author_updated_at_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
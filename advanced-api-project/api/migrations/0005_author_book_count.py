@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_book_count(apps, schema_editor):
+    Author = apps.get_model('api', 'Author')
+    Book = apps.get_model('api', 'Book')
+    counts = Book.objects.filter(author=OuterRef('pk')).order_by().values('author').annotate(
+        total=Count('pk')
+    ).values('total')
+    Author.objects.update(book_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_book_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='book_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, help_text='Number of books by this author'),
+        ),
+        migrations.RunPython(populate_book_count, migrations.RunPython.noop),
+    ]
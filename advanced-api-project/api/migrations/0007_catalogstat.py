@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_catalog_stats(apps, schema_editor):
+    Author = apps.get_model('api', 'Author')
+    Book = apps.get_model('api', 'Book')
+    CatalogStat = apps.get_model('api', 'CatalogStat')
+    stats = [
+        CatalogStat(dimension='books', value=0, count=Book.objects.count()),
+        CatalogStat(dimension='authors', value=0, count=Author.objects.count()),
+    ]
+    years = Book.objects.order_by().values_list('publication_year').annotate(total=Count('pk'))
+    stats.extend(CatalogStat(dimension='year', value=year, count=total) for year, total in years)
+    CatalogStat.objects.bulk_create(stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_book_author_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('books', 'Total books'), ('authors', 'Total authors'), ('year', 'Books per publication year')], help_text='What is counted', max_length=16)),
+                ('value', models.IntegerField(default=0, help_text='The publication year for per-year rows, 0 for totals')),
+                ('count', models.BigIntegerField(default=0, help_text='The current count')),
+            ],
+            options={
+                'verbose_name': 'Catalog statistic',
+                'verbose_name_plural': 'Catalog statistics',
+                'ordering': ['dimension', 'value'],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='catalog_stat_dimension_value_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_catalog_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:05
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_author_names(apps, schema_editor):
+    Author = apps.get_model('api', 'Author')
+    Book = apps.get_model('api', 'Book')
+    Book.objects.update(author_name=Subquery(Author.objects.filter(pk=OuterRef('author_id')).values('name')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_catalogstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='author_name',
+            field=models.CharField(blank=True, default='', editable=False, help_text="Snapshot of the author's name", max_length=100),
+        ),
+        migrations.RunPython(populate_author_names, migrations.RunPython.noop),
+    ]
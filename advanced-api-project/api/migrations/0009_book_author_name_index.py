@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_book_author_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author_name', 'id'], name='book_author_name_id_idx'),
+        ),
+    ]
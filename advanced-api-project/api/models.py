@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Author(models.Model):
     """
@@ -7,8 +7,14 @@ class Author(models.Model):
     This model stores basic information about authors who write books.
     It has a one-to-many relationship with the Book model, meaning
     one author can have multiple books.
+    
+    ``book_count`` is a denormalized count of the author's books, maintained
+    by the Book signal handlers and bulk writes (see api/counters.py) so that
+    filtering, ordering and the admin never need a COUNT/GROUP BY.
     """
     name = models.CharField(max_length=100, help_text="The full name of the author")
+    book_count = models.PositiveIntegerField(default=0, db_index=True, editable=False, help_text="Number of books by this author")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the author was last modified")
     
     def __str__(self):
         return self.name
@@ -17,6 +23,10 @@ class Author(models.Model):
         ordering = ['name']
         verbose_name = "Author"
         verbose_name_plural = "Authors"
+        indexes = [
+            # Default ordering and keyset pagination over (name, id)
+            models.Index(fields=['name', 'id'], name='author_name_id_idx'),
+        ]
 
 
 class Book(models.Model):
@@ -26,6 +36,10 @@ class Book(models.Model):
     This model stores information about books including title, publication year,
     and a foreign key relationship to the Author model. The relationship
     establishes that each book has one author, but an author can have multiple books.
+    
+    ``author_name`` is a snapshot of the author's name, maintained by the
+    Book/Author signal handlers and bulk writes (see api/snapshots.py), so
+    that ``__str__`` and the admin changelist never fetch the author.
     """
     title = models.CharField(max_length=200, help_text="The title of the book")
     publication_year = models.IntegerField(help_text="The year the book was published", default=2020)
@@ -35,11 +49,68 @@ class Book(models.Model):
         related_name='books',
         help_text="The author who wrote this book"
     )
+    author_name = models.CharField(max_length=100, blank=True, default='', editable=False, help_text="Snapshot of the author's name")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the book was last modified")
     
     def __str__(self):
-        return f"{self.title} by {self.author.name} ({self.publication_year})"
+        return f"{self.title} by {self.author_name} ({self.publication_year})"
+    
+    def save(self, *args, **kwargs):
+        # Run the save and the author book_count update in one transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
     
     class Meta:
         ordering = ['title']
         verbose_name = "Book"
-        verbose_name_plural = "Books"
\ No newline at end of file
+        verbose_name_plural = "Books"
+        indexes = [
+            # Year filters/ordering and keyset pagination over (year, id)
+            models.Index(fields=['publication_year', 'id'], name='book_year_id_idx'),
+            # Default ordering, exact title filter and keyset over (title, id)
+            models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+            # An author's books in title order (nested books, author filter)
+            models.Index(fields=['author', 'title'], name='book_author_title_idx'),
+            # Ordering and keyset pagination by author name (on the snapshot)
+            models.Index(fields=['author_name', 'id'], name='book_author_name_id_idx'),
+        ]
+
+class CatalogStat(models.Model):
+    """
+    Precomputed catalog statistics served by the /api/stats/ endpoint.
+    
+    One row per statistic: the total number of books, the total number of
+    authors, and the number of books published in each year. Rows are
+    adjusted incrementally by the Book and Author signal handlers and bulk
+    writes (see api/stats.py), so reading the statistics never scans the
+    catalog. ``python manage.py rebuild_catalog_stats`` repairs drift.
+    """
+    BOOKS = 'books'
+    AUTHORS = 'authors'
+    YEAR = 'year'
+    DIMENSION_CHOICES = [
+        (BOOKS, 'Total books'),
+        (AUTHORS, 'Total authors'),
+        (YEAR, 'Books per publication year'),
+    ]
+    
+    dimension = models.CharField(max_length=16, choices=DIMENSION_CHOICES, help_text="What is counted")
+    value = models.IntegerField(default=0, help_text="The publication year for per-year rows, 0 for totals")
+    count = models.BigIntegerField(default=0, help_text="The current count")
+    
+    def __str__(self):
+        if self.dimension == self.YEAR:
+            return f"{self.value}: {self.count} books"
+        return f"{self.get_dimension_display()}: {self.count}"
+    
+    class Meta:
+        ordering = ['dimension', 'value']
+        verbose_name = "Catalog statistic"
+        verbose_name_plural = "Catalog statistics"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='catalog_stat_dimension_value_uniq'),
+        ]
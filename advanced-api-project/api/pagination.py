@@ -0,0 +1,385 @@
+"""
+Custom pagination classes for the API views.
+This module provides page-number and keyset (cursor) pagination for the
+Book and Author list endpoints.
+"""
+
+import base64
+import json
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import ESTIMATE, EXACT, count_results
+from .search import ordering_column
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a ``(ordering field, id)`` pair.
+
+    Instead of ``OFFSET n`` this pagination filters on the last row that was
+    returned, e.g. ``WHERE (title, id) > (:title, :id)``, so every page costs
+    the same regardless of how deep the client has paged. No ``COUNT(*)`` is
+    issued. The ordering field is taken from the ``ordering`` query parameter
+    (or the view's default ``ordering``) and must be one of the view's
+    ``ordering_fields``; the primary key is always used as the tie-breaker.
+
+    Cursors are opaque base64 strings that encode the last seen key, the
+    direction of travel and the ordering they were issued for. A cursor used
+    with a different ordering is rejected.
+
+    Response format:
+    {
+        "next": "http://.../api/books/?pagination=cursor&cursor=...",
+        "previous": null,
+        "results": [...]
+    }
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None, max_page_size=None):
+        self.page_size = page_size or settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+        self.max_page_size = max_page_size or settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return one page of results positioned after (or before) the cursor.
+
+        Args:
+            queryset: The filtered queryset to paginate
+            request: The current request
+            view: The list view being paginated
+
+        Returns:
+            list: The objects on the requested page
+        """
+        return self.finish_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async variant of ``paginate_queryset`` (see api/async_views.py)."""
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        return self.finish_page([obj async for obj in page_queryset.aiterator(chunk_size=self.page_size + 1)])
+
+    def get_page_queryset(self, queryset, request, view):
+        """
+        Build the sliced queryset for the requested page.
+
+        One row more than the page size is fetched to find out whether
+        another page follows.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = ordering_column(view, self.ordering.lstrip('-'))
+        self.descending = self.ordering.startswith('-')
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['r'])
+
+        # Walking backwards means flipping the sort and the comparison operator
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+
+        if self.cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            try:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}': self.cursor['v']}) |
+                    Q(**{self.field: self.cursor['v'], f'pk__{lookup}': self.cursor['pk']})
+                )
+            except (TypeError, ValueError, ValidationError):
+                # The key does not fit the ordering field (e.g. text for a year)
+                raise NotFound(self.invalid_cursor_message)
+
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        """Trim the look-ahead row and work out the next/previous links."""
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        """Return the requested page size, clamped to ``max_page_size``."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Resolve the single ordering term the keyset is built on.
+
+        Only the first term of the requested ordering is used. It must be one
+        of the view's declared ``ordering_fields`` (or the primary key).
+        """
+        ordering = OrderingFilter().get_ordering(request, queryset, view) or ['pk']
+        ordering = ordering[0]
+        allowed = set(getattr(view, 'ordering_fields', None) or []) | {'id', 'pk'}
+        if ordering.lstrip('-') not in allowed:
+            raise NotFound(f'Keyset pagination does not support ordering by "{ordering}".')
+        return ordering
+
+    def get_key(self, obj):
+        """Return the ordering field value of ``obj``, following ``__`` relations."""
+        value = obj
+        for attr in self.field.split('__'):
+            value = getattr(value, attr)
+        return value
+
+    def encode_cursor(self, obj, reverse):
+        """Build an opaque cursor pointing at ``obj``."""
+        payload = {'o': self.ordering, 'v': self.get_key(obj), 'pk': obj.pk, 'r': int(reverse)}
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor sent by the client.
+
+        Returns:
+            dict or None: The decoded cursor, or None on the first page
+
+        Raises:
+            NotFound: If the cursor is malformed or was issued for another ordering
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor, dict) or not {'o', 'v', 'pk', 'r'} <= cursor.keys():
+            raise NotFound(self.invalid_cursor_message)
+        if cursor['o'] != self.ordering:
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors are client input: the key must be a scalar, the id an integer
+        if isinstance(cursor['v'], (dict, list)) or type(cursor['pk']) is not int or cursor['r'] not in (0, 1):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   self.encode_cursor(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class EstimatedPage(Page):
+    """A page whose ``has_next()`` comes from a look-ahead row, not the count."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CountedPaginator(DjangoPaginator):
+    """
+    Django paginator that can reuse a row count computed elsewhere.
+
+    Args:
+        count: Known number of rows in ``object_list``; if None the
+            paginator counts them itself
+        estimated: True if ``count`` is only an estimate. Page numbers are
+            then not checked against it: a page exists if it has rows, and
+            whether another page follows is decided by reading one extra row.
+    """
+
+    def __init__(self, object_list, per_page, count=None, estimated=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.estimated = estimated
+        if count is not None:
+            # Prime the cached_property so no COUNT(*) query is issued
+            self.__dict__['count'] = count
+
+    def validate_number(self, number):
+        if not self.estimated:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if not self.estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class CatalogPagination(PageNumberPagination):
+    """
+    Pagination used by the Book and Author list views.
+
+    By default responses keep the page-number envelope
+    (``count``/``next``/``previous``/``results``). Clients that page through
+    large result sets can switch to keyset pagination per request with
+    ``?pagination=cursor`` (or by sending a ``cursor`` obtained from a
+    previous keyset response), which skips the ``COUNT(*)`` query and the
+    ``OFFSET`` scan.
+
+    Query Parameters:
+    - page: Page number (page-number mode)
+    - page_size: Number of items per page (max 100)
+    - pagination: ``page`` (default) or ``cursor``
+    - cursor: Opaque cursor from a previous keyset response
+
+    In page-number mode ``count`` is exact up to a threshold and estimated
+    above it (see ``api/counting.py``); ``count_type`` says which
+    (``"exact"`` or ``"estimate"``). With an estimated count, ``next`` is
+    based on whether more rows exist, not on the count, and ``?page=last``
+    is only as good as the estimate.
+
+    If the view has already counted the filtered queryset (see
+    ``api/conditional.py``) it can publish the number as
+    ``view.result_count`` (and ``view.count_type``) and the page-number
+    mode reuses it.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE', 100)
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+        self.count_type = EXACT
+
+    def is_keyset_request(self, request):
+        """Return True if the client asked for keyset pagination."""
+        mode = request.query_params.get(self.mode_query_param)
+        if mode is not None:
+            return mode == 'cursor'
+        return self.keyset_class.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_keyset_request(request):
+            self.keyset = self.keyset_class(page_size=self.page_size, max_page_size=self.max_page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        count, self.count_type = self.get_count(queryset, request, view)
+        self.django_paginator_class = partial(
+            CountedPaginator, count=count, estimated=self.count_type == ESTIMATE,
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset, request, view):
+        """Return ``(count, count_type)``, reusing the view's count if it has one."""
+        count = getattr(view, 'result_count', None)
+        if count is not None:
+            return count, getattr(view, 'count_type', EXACT)
+        return count_results(queryset, view=view, request=request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async variant of ``paginate_queryset`` (see api/async_views.py).
+
+        The count and the page are fetched with the async ORM; the response
+        envelope is the same as in the sync path.
+        """
+        if self.is_keyset_request(request):
+            self.keyset = self.keyset_class(page_size=self.page_size, max_page_size=self.max_page_size)
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        self.keyset = None
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        # Counting may read the shared cache and EXPLAIN, so it runs in a thread
+        count, self.count_type = await sync_to_async(self.get_count)(queryset, request, view)
+        paginator = CountedPaginator(queryset, page_size, count=count, estimated=self.count_type == ESTIMATE)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            if paginator.estimated:
+                # The page and its look-ahead row are read together
+                self.page = await sync_to_async(paginator.page)(page_number)
+            else:
+                self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if not paginator.estimated:
+            self.page.object_list = [
+                obj async for obj in self.page.object_list.aiterator(chunk_size=page_size)
+            ]
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return Response({
+            'count': self.page.paginator.count,
+            'count_type': self.count_type,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_type'] = {'type': 'string', 'enum': [EXACT, ESTIMATE]}
+        return response_schema
@@ -0,0 +1,261 @@
+"""
+Multiprocess variant of the book import (api/importer.py).
+
+Parsing and validating records is CPU-bound and independent per record,
+but SQLite accepts one writer at a time. The work is therefore split as
+follows:
+
+- The data section of the file is cut into byte ranges that start on
+  record boundaries (``split_ranges``), several per worker so that faster
+  workers pick up more of the file.
+- Worker processes take one range at a time from a task queue, parse and
+  validate it and put batches of validated records on a bounded queue.
+  When the writer falls behind, the queue fills up and the workers block
+  instead of buffering the whole file in memory.
+- The calling process is the only database writer: it takes batches off
+  the queue and upserts each in one transaction with ``BookImporter``,
+  exactly as the serial import does.
+
+Batches from different ranges are written in arrival order, so the book
+ids do not follow the file order. The natural key check runs in the
+writer, so duplicates across ranges are still skipped.
+
+The checkpoint records, for every range, the offset up to which its
+records are committed; a resumed import re-reads each range from there.
+
+The writer watches the workers while it waits for batches: if one dies
+(e.g. killed by the OOM killer), the messages of its range never arrive,
+so the import fails with ``ImportFileError`` instead of waiting forever.
+The committed batches stay in the checkpoint for a resumed run.
+
+Workers are forked (on platforms without ``fork`` the default start
+method is used, which requires Django to be importable in the children).
+"""
+
+import multiprocessing
+import os
+import queue
+
+import django
+from django.db import connections
+
+from .importer import (
+    BookImporter,
+    ImportFileError,
+    check_format,
+    iter_batches,
+    iter_records,
+    read_header,
+    save_checkpoint,
+    validate_records,
+)
+
+
+# Ranges per worker (more ranges balance uneven workers)
+RANGES_PER_WORKER = 4
+
+# Validated batches allowed in flight per worker before workers block
+QUEUE_BATCHES_PER_WORKER = 2
+
+# Bytes read at a time while looking for range boundaries
+BLOCK_SIZE = 1 << 20
+
+# Seconds the writer waits for a batch before checking on the workers
+POLL_SECONDS = 1
+
+_output = None
+
+
+def split_ranges(path, input_format, parts, start=None):
+    """
+    Split the records from ``start`` to the end of the file into byte ranges.
+
+    Each boundary is the first record start at or after an even split
+    point. For CSV, quotes are counted from ``start`` so that a newline
+    inside a quoted field is never taken as a boundary (this is a scan of
+    the file with ``bytes.count``, not a parse).
+
+    Args:
+        path: Input file
+        input_format: 'csv' or 'ndjson'
+        parts: Number of ranges wanted (fewer are returned for small files)
+        start: Byte offset of a record start (default: the first record)
+
+    Returns:
+        list: ``[start, end]`` pairs covering the records, in file order
+    """
+    data_start = read_header(path, input_format)[1]
+    start = data_start if start is None else max(start, data_start)
+    size = os.path.getsize(path)
+    if start >= size:
+        return []
+    targets = [start + (size - start) * i // parts for i in range(1, parts)]
+    boundaries = [start]
+    parity = 0  # Quotes seen since start, modulo 2 (odd: inside a quoted field)
+    position = start
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        for target in targets:
+            if target <= position:
+                continue
+            while position < target:
+                block = stream.read(min(BLOCK_SIZE, target - position))
+                if not block:
+                    break
+                if input_format == 'csv':
+                    parity ^= block.count(b'"') & 1
+                position += len(block)
+            while True:
+                line = stream.readline()
+                position += len(line)
+                if input_format == 'csv':
+                    parity ^= line.count(b'"') & 1
+                if not line or not parity:
+                    break
+            if position < size:
+                boundaries.append(position)
+    return [[begin, end] for begin, end in zip(boundaries, boundaries[1:] + [size]) if begin < end]
+
+
+def init_worker(output):
+    """Worker initializer: keep the output queue and make Django importable."""
+    global _output
+    _output = output
+    django.setup()
+
+
+def run_worker(tasks, output, path, input_format, header, batch_size, current_year):
+    """
+    Worker process: parse ranges from ``tasks`` until a None sentinel.
+
+    Tasks are ``(index, start, end)`` tuples.
+    """
+    init_worker(output)
+    for task in iter(tasks.get, None):
+        index, start, end = task
+        parse_range(index, path, input_format, header, start, end, batch_size, current_year)
+
+
+def parse_range(index, path, input_format, header, start, end, batch_size, current_year=None):
+    """
+    Parse and validate the records of one range onto the output queue.
+
+    Puts ``('batch', index, validated records, offset after the batch)``
+    tuples, then ``('done', index, None, end)``, or ``('failed', index,
+    error message, None)`` if reading the range failed.
+    """
+    try:
+        records = validate_records(
+            iter_records(path, input_format, start=start, end=end, header=header), current_year
+        )
+        for batch, offset in iter_batches(records, batch_size):
+            _output.put(('batch', index, batch, offset))
+    except Exception as exc:
+        _output.put(('failed', index, f'{type(exc).__name__}: {exc}', None))
+    else:
+        _output.put(('done', index, None, end))
+
+
+def check_workers(processes, exited):
+    """
+    Fail if the workers cannot finish the remaining ranges.
+
+    Args:
+        processes: The worker processes
+        exited: Whether every worker had exited before the last, empty, wait
+
+    Raises:
+        ImportFileError: If a worker died, or all exited with ranges left
+    """
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise ImportFileError(f'A worker process exited with code {process.exitcode}; '
+                                  f'resume the import to finish the remaining ranges.')
+    if exited:
+        raise ImportFileError('The worker processes exited before every range was read.')
+
+
+def import_parallel(path, input_format=None, workers=None, batch_size=1000, start=None, ranges=None,
+                    create_authors=True, checkpoint_path=None, progress=None):
+    """
+    Import a CSV/NDJSON file with parsing spread over worker processes.
+
+    Args:
+        path: Input file
+        input_format: 'csv' or 'ndjson' (default: from the extension)
+        workers: Parse/validate processes (default: the number of CPUs)
+        batch_size: Records per transaction
+        start: Byte offset to start at (default: the first record)
+        ranges: ``[start, end, committed offset]`` triples from a
+            checkpoint, to resume an earlier parallel import
+        create_authors: Create authors missing from the database
+        checkpoint_path: File updated with the range offsets after each batch
+        progress: Optional callable receiving a stats dict after each batch
+
+    Returns:
+        dict: Counters, elapsed seconds, throughput, worker count and the
+        first errors
+    """
+    input_format = check_format(path, input_format)
+    workers = workers or os.cpu_count() or 1
+    header = read_header(path, input_format)[0]
+    if ranges is None:
+        ranges = [[begin, end, begin] for begin, end in
+                  split_ranges(path, input_format, workers * RANGES_PER_WORKER, start)]
+    pending = [index for index, (_, end, committed) in enumerate(ranges) if committed < end]
+    importer = BookImporter(create_authors=create_authors)
+
+    def on_batch():
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, {
+                'path': os.path.abspath(path), 'ranges': ranges, 'stats': importer.report(),
+            })
+        if progress is not None:
+            progress(importer.report())
+
+    # Forked children must not inherit open database connections (those
+    # inside a transaction are left alone; the children never use them)
+    for connection in connections.all():
+        if not connection.in_atomic_block:
+            connection.close()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    tasks = context.Queue()
+    for index in pending:
+        _, end, committed = ranges[index]
+        tasks.put((index, committed, end))
+    output = context.Queue(maxsize=workers * QUEUE_BATCHES_PER_WORKER)
+    # The same year rule for every worker, as in a serial run
+    args = (tasks, output, path, input_format, header, batch_size, importer.current_year)
+    processes = [context.Process(target=run_worker, args=args, daemon=True) for _ in range(workers)]
+    for process in processes:
+        tasks.put(None)
+        process.start()
+    try:
+        remaining = len(pending)
+        while remaining:
+            # Workers flush their messages before exiting, so an empty wait
+            # after all of them had exited means nothing more will arrive
+            exited = all(process.exitcode is not None for process in processes)
+            try:
+                kind, index, payload, offset = output.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                check_workers(processes, exited)
+                continue
+            if kind == 'failed':
+                raise ImportFileError(f'Reading bytes {ranges[index][0]}-{ranges[index][1]} failed: {payload}')
+            if kind == 'done':
+                ranges[index][2] = offset
+                remaining -= 1
+                continue
+            cleaned = importer.accept(payload)
+            if cleaned:
+                importer.write_batch(cleaned)
+            ranges[index][2] = offset
+            on_batch()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    return {**importer.report(errors=True), 'workers': workers}
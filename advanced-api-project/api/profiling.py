@@ -0,0 +1,252 @@
+"""
+Per-request profiling for the API.
+
+``ProfilingMiddleware`` records, for every API request:
+
+- the number of SQL queries and the total time spent in the database
+- the time spent building serializer ``.data`` (see ``profile_section``)
+- the time spent rendering the response
+- the remaining application time (routing, filtering, pagination, ...)
+
+The numbers are sent back as a ``Server-Timing`` header (visible in the
+browser's network panel) and logged as one JSON line on the
+``api.profiling`` logger. Requests slower than ``SLOW_REQUEST_MS`` are
+sampled (``SLOW_SAMPLE_RATE``) and logged with their SQL on the
+``api.profiling.slow`` logger for offline analysis. Statement parameters
+are left out of the sample unless ``SLOW_LOG_PARAMS`` is set, since they
+carry token keys, passwords and other request data.
+
+Settings (``API_PROFILING``):
+    ENABLED: Turn the middleware on or off
+    PATH_PREFIXES: Only requests under these paths are profiled
+    SLOW_REQUEST_MS: Threshold for slow request sampling
+    SLOW_SAMPLE_RATE: Fraction of slow requests logged with their SQL
+    SLOW_LOG_PARAMS: Include the statement parameters in slow samples
+    MAX_QUERIES: Maximum number of statements kept per request
+    SERVER_TIMING: Send the ``Server-Timing`` header
+
+Streaming responses are profiled up to the point the response is returned;
+queries run while the body is streamed are not included.
+"""
+
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'PATH_PREFIXES': ('/api/',),
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_SAMPLE_RATE': 1.0,
+    'SLOW_LOG_PARAMS': False,
+    'MAX_QUERIES': 1000,
+    'SERVER_TIMING': True,
+}
+
+logger = logging.getLogger('api.profiling')
+slow_logger = logging.getLogger('api.profiling.slow')
+
+_current_profile = ContextVar('api_request_profile', default=None)
+
+
+def get_profiling_settings():
+    """Return the profiling settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_PROFILING', {})}
+
+
+class RequestProfile:
+    """Timings collected while handling one request."""
+
+    def __init__(self, max_queries):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.queries = []
+        self.max_queries = max_queries
+        self.sections = {}
+        self._depth = {}
+
+    def execute(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook timing every statement."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.sql_time += duration
+            if len(self.queries) < self.max_queries:
+                self.queries.append((sql, params, many, duration))
+
+    def add(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def as_dict(self, total):
+        """Return the profile in milliseconds."""
+        sections = {name: seconds * 1000 for name, seconds in self.sections.items()}
+        accounted = self.sql_time * 1000 + sum(sections.values())
+        return {
+            'total_ms': round(total * 1000, 3),
+            'db_ms': round(self.sql_time * 1000, 3),
+            'queries': self.query_count,
+            'serialize_ms': round(sections.get('serialize', 0.0), 3),
+            'render_ms': round(sections.get('render', 0.0), 3),
+            'app_ms': round(max(total * 1000 - accounted, 0.0), 3),
+        }
+
+    def sql(self, params=False):
+        """
+        Return the recorded statements for a slow request sample.
+
+        Parameters are only included when ``params`` is true.
+        """
+        statements = []
+        for sql, query_params, many, duration in self.queries:
+            statement = {'sql': sql, 'many': many, 'ms': round(duration * 1000, 3)}
+            if params:
+                statement['params'] = (
+                    repr(query_params) if many else [repr(param) for param in query_params or ()]
+                )
+            statements.append(statement)
+        return statements
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Time a block of the current request under ``name``.
+
+    SQL run inside the block is excluded (it is already counted as ``db``),
+    and nested sections with the same name are only counted once. Outside a
+    profiled request this does nothing.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    depth = profile._depth.get(name, 0)
+    profile._depth[name] = depth + 1
+    start, sql_before = time.perf_counter(), profile.sql_time
+    try:
+        yield
+    finally:
+        profile._depth[name] = depth
+        if depth == 0:
+            elapsed = time.perf_counter() - start - (profile.sql_time - sql_before)
+            profile.add(name, max(elapsed, 0.0))
+
+
+def server_timing(metrics):
+    """Format profile metrics as a ``Server-Timing`` header value."""
+    return ', '.join([
+        f'db;dur={metrics["db_ms"]};desc="{metrics["queries"]} queries"',
+        f'serialize;dur={metrics["serialize_ms"]}',
+        f'render;dur={metrics["render_ms"]}',
+        f'app;dur={metrics["app_ms"]}',
+        f'total;dur={metrics["total_ms"]}',
+    ])
+
+
+class ProfilingMiddleware:
+    """
+    Record SQL, serializer and render time of API requests.
+
+    Place it first in ``MIDDLEWARE`` so the total covers the whole stack.
+    The middleware is sync and async capable, so it does not force a thread
+    switch in front of the async views under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def should_profile(self, request, options):
+        return options['ENABLED'] and request.path.startswith(tuple(options['PATH_PREFIXES']))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        options = get_profiling_settings()
+        if not self.should_profile(request, options):
+            return self.get_response(request)
+
+        profile, token = self.start(request, options)
+        try:
+            with self.wrap_connections(profile):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile, options)
+
+    async def __acall__(self, request):
+        options = get_profiling_settings()
+        if not self.should_profile(request, options):
+            return await self.get_response(request)
+
+        profile, token = self.start(request, options)
+        try:
+            with self.wrap_connections(profile):
+                response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile, options)
+
+    def start(self, request, options):
+        profile = RequestProfile(options['MAX_QUERIES'])
+        request.profile = profile
+        return profile, _current_profile.set(profile)
+
+    def wrap_connections(self, profile):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile.execute))
+        return stack
+
+    def finish(self, request, response, profile, options):
+        total = time.perf_counter() - profile.started
+        metrics = profile.as_dict(total)
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(metrics)
+        self.log(request, response, metrics, profile, options)
+        return response
+
+    def process_template_response(self, request, response):
+        """Time ``response.render()``, which Django calls right after this hook."""
+        profile = getattr(request, 'profile', None)
+        if profile is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: profile.add('render', time.perf_counter() - start)
+            )
+        return response
+
+    def log(self, request, response, metrics, profile, options):
+        match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **metrics,
+        }
+        logger.info(json.dumps(record))
+        if (metrics['total_ms'] >= options['SLOW_REQUEST_MS']
+                and slow_logger.isEnabledFor(logging.INFO)
+                and random.random() < options['SLOW_SAMPLE_RATE']):
+            slow_logger.info(json.dumps({
+                **record,
+                'query_string': request.META.get('QUERY_STRING', ''),
+                'sql': profile.sql(params=options['SLOW_LOG_PARAMS']),
+            }))
@@ -0,0 +1,149 @@
+"""
+EXPLAIN the queries behind the list views' filters and orderings.
+
+For every filter declared on a view's FilterSet (plus "no filter") combined
+with every entry of its ``ordering_fields`` (ascending and descending), the
+view's own ``filter_queryset()`` builds the queryset exactly as for a real
+request, the first page is sliced off and the database is asked for its
+plan. Plans that read a whole table, or sort it in a temporary structure,
+are flagged. An unfiltered query whose plan needs no sort is not flagged:
+walking the table in order stops after the first page.
+
+Some scans are reported as expected rather than as problems:
+
+- Substring filters (``icontains``) cannot use a B-tree index on any
+  backend and only use the trigram indexes on PostgreSQL.
+- A range filter on one column ordered by another (e.g. authors with
+  ``book_count_min`` ordered by ``id``) cannot be served by one B-tree
+  index either: an index on the range column returns rows out of order
+  and needs a sort of every match. When the plan walks the table in the
+  requested order instead (no temporary sort), it stops after the first
+  page of matches, which is the better plan for the wide ranges these
+  filters usually select.
+"""
+
+import re
+
+import django_filters
+from django.db import connections
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+# Sample values per filter type; plans do not depend on the exact value
+SAMPLE_VALUES = {
+    django_filters.NumberFilter: '2000',
+    django_filters.CharFilter: 'potter',
+}
+
+SUBSTRING_LOOKUPS = {'icontains', 'contains'}
+
+RANGE_LOOKUPS = {'gt', 'gte', 'lt', 'lte'}
+
+# Reasons reported for expected scans
+SUBSTRING_MATCH = 'substring match'
+RANGE_IN_ORDER = 'range walked in order'
+
+# SQLite: "SCAN api_book" reads the whole table; "SCAN ... USING INDEX"
+# walks an index in order (fine for ORDER BY ... LIMIT) and FTS5 tables
+# answer MATCH from their own index
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX| VIRTUAL TABLE)(?:\s|$)')
+SQLITE_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def is_range_filter(name, declared):
+    """Return True for filters selecting a range (including ``*_min``/``*_max`` methods)."""
+    if isinstance(declared, django_filters.RangeFilter) or declared.lookup_expr in RANGE_LOOKUPS:
+        return True
+    return declared.method is not None and name.endswith(('_min', '_max'))
+
+
+def filter_params(filterset_class):
+    """
+    Yield ``(label, query params, kind)`` for each declared filter.
+
+    ``kind`` is ``SUBSTRING_MATCH`` for substring and free-text filters,
+    ``RANGE_IN_ORDER`` for range filters and None otherwise.
+    """
+    yield 'no filter', {}, None
+    for name, declared in filterset_class.base_filters.items():
+        if isinstance(declared, django_filters.RangeFilter):
+            yield name, {f'{name}_min': '1990', f'{name}_max': '2000'}, RANGE_IN_ORDER
+            continue
+        value = SAMPLE_VALUES.get(type(declared), 'potter')
+        # Text filters implemented as methods (author name, search) match substrings
+        text_method = declared.method is not None and isinstance(declared, django_filters.CharFilter)
+        if declared.lookup_expr in SUBSTRING_LOOKUPS or text_method:
+            kind = SUBSTRING_MATCH
+        elif is_range_filter(name, declared):
+            kind = RANGE_IN_ORDER
+        else:
+            kind = None
+        yield name, {name: value}, kind
+
+
+def ordering_params(view_class):
+    """Yield the ``ordering`` values declared on ``view_class``."""
+    for field in view_class.ordering_fields:
+        yield field
+        yield f'-{field}'
+
+
+def build_queryset(view_class, params):
+    """Return the first-page queryset the view would run for ``params``."""
+    factory = APIRequestFactory()
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = Request(factory.get('/', params))
+    view.headers = {}
+    queryset = view.filter_queryset(view.get_queryset())
+    page_size = view.paginator.get_page_size(view.request) if view.paginator else 10
+    return queryset[:page_size or 10]
+
+
+def find_problems(vendor, plan):
+    """
+    Return the full scans and temporary sorts found in an EXPLAIN output.
+
+    Returns:
+        tuple: (list of fully scanned tables, bool temp sort)
+    """
+    if vendor == 'sqlite':
+        return SQLITE_FULL_SCAN.findall(plan), SQLITE_TEMP_SORT in plan
+    if vendor == 'postgresql':
+        return POSTGRES_FULL_SCAN.findall(plan), False
+    return [], False
+
+
+def check_view(view_class, database='default'):
+    """
+    EXPLAIN every filter/ordering combination of a list view.
+
+    Returns:
+        list: One dict per combination with ``filter``, ``ordering``,
+        ``full_scans``, ``temp_sort``, ``expected`` (the reason a scan is
+        expected, or None) and ``plan``
+    """
+    vendor = connections[database].vendor
+    results = []
+    for label, params, kind in filter_params(view_class.filterset_class):
+        for ordering in ordering_params(view_class):
+            queryset = build_queryset(view_class, {**params, 'ordering': ordering})
+            plan = queryset.using(database).explain()
+            full_scans, temp_sort = find_problems(vendor, plan)
+            if not params and not temp_sort:
+                # Unfiltered and already in order: the walk stops after one page
+                full_scans = []
+            expected = kind
+            if kind == RANGE_IN_ORDER and temp_sort:
+                # Walking in order was not chosen; the scan is a real problem
+                expected = None
+            results.append({
+                'filter': label,
+                'ordering': ordering,
+                'full_scans': full_scans,
+                'temp_sort': temp_sort,
+                'expected': expected,
+                'plan': plan,
+            })
+    return results
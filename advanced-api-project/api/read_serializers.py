@@ -0,0 +1,126 @@
+"""
+Compiled read-only serializers for the list and detail views.
+
+DRF resolves every field of every object through a ``Field`` instance
+(``get_attribute`` + ``to_representation``). For the simple fields used by
+BookSerializer and AuthorSerializer that work is known in advance, so this
+module compiles a serializer class once into a *plan*: a tuple of
+``(key, getter)`` pairs built from ``operator.attrgetter``. Representing an
+object is then a single dict comprehension.
+
+Fields that the compiler does not understand keep using the DRF field, so
+the output is always identical to the original serializer (see
+``ReadSerializerParityTestCase``).
+"""
+
+from operator import attrgetter
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .profiling import profile_section
+
+
+# Field classes whose to_representation() is the identity for the model
+# values they read (str columns for CharField, int columns for IntegerField).
+# Subclasses are not included: they may override to_representation().
+PASSTHROUGH_FIELDS = {
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+}
+
+_plans = {}
+
+
+def fast_reads_enabled():
+    """Return True if views should use compiled read serializers."""
+    return getattr(settings, 'API_FAST_READ_SERIALIZERS', False)
+
+
+def _field_getter(field):
+    """Return a callable obj -> representation for a bound DRF field."""
+    if field.source == '*':
+        return field.to_representation
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and len(field.source_attrs) == 1:
+        # Same shortcut as DRF's use_pk_only_optimization: read the FK column
+        attname = f'{field.source_attrs[0]}_id'
+        return attrgetter(attname)
+
+    if isinstance(field, serializers.ListSerializer) and len(field.source_attrs) == 1:
+        child = compile_plan(field.child.__class__)
+        related = attrgetter(field.source_attrs[0])
+        return lambda obj: [child(item) for item in related(obj).all()]
+
+    if type(field) in PASSTHROUGH_FIELDS:
+        return attrgetter('.'.join(field.source_attrs))
+
+    # Anything else goes through the DRF field as usual
+    def fallback(obj):
+        attribute = field.get_attribute(obj)
+        return None if attribute is None else field.to_representation(attribute)
+    return fallback
+
+
+def compile_plan(serializer_class, fields=None):
+    """
+    Compile ``serializer_class`` into a function ``obj -> dict``.
+
+    Args:
+        serializer_class: The serializer to compile
+        fields: Optional subset of field names (sparse fieldsets)
+
+    Plans are cached per serializer class and field subset.
+    """
+    key = (serializer_class, fields and tuple(fields))
+    if key not in _plans:
+        kwargs = {'fields': fields} if fields is not None else {}
+        steps = tuple(
+            (name, _field_getter(field))
+            for name, field in serializer_class(**kwargs).fields.items()
+            if not field.write_only
+        )
+
+        def represent(obj):
+            return {name: getter(obj) for name, getter in steps}
+
+        _plans[key] = represent
+    return _plans[key]
+
+
+class CompiledReadSerializer:
+    """
+    Read-only drop-in for ``serializer_class(instance, many=...)``.
+
+    Only ``.data`` is supported; it produces exactly the same structure as
+    the DRF serializer for the compiled fields.
+    """
+
+    def __init__(self, serializer_class, instance=None, many=False, fields=None, **kwargs):
+        self.serializer_class = serializer_class
+        self.instance = instance
+        self.many = many
+        self.fields = fields
+
+    @property
+    def data(self):
+        represent = compile_plan(self.serializer_class, self.fields)
+        with profile_section('serialize'):
+            if self.many:
+                return [represent(obj) for obj in self.instance]
+            return represent(self.instance)
+
+
+class FastReadMixin:
+    """
+    Mixin for read-only generic views that serializes with a compiled plan.
+
+    Active when ``settings.API_FAST_READ_SERIALIZERS`` is True; otherwise the
+    view's regular serializer is used.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if fast_reads_enabled() and 'data' not in kwargs and self.request.method in ('GET', 'HEAD'):
+            return CompiledReadSerializer(self.get_serializer_class(), *args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,189 @@
+"""
+Streaming JSON rendering for large list responses.
+
+``JSONRenderer`` builds the whole body as one ``str`` and then encodes it to
+``bytes``. For a 100-author page with nested books that body (and, with
+compression, its compressed copy) is held in memory several times over.
+``StreamingJSONRenderer.iter_render()`` produces the same bytes in chunks
+instead: list results are encoded item by item with the C JSON encoder and
+emitted every ``CHUNK_SIZE`` characters, so the process only ever holds one chunk
+of output and the compression middleware compresses it as it goes.
+
+``StreamingListMixin`` turns the list views' responses into a
+``StreamingHttpResponse`` once they carry at least ``MIN_ITEMS`` results.
+The data is cached before that happens (see ``CachedResponseMixin``), and
+the headers (``ETag``, ``Vary``, ``X-Cache``, ...) are kept. Smaller pages,
+error responses and the browsable API are rendered as usual.
+
+Settings (``API_STREAMING_JSON``):
+    ENABLED: Stream large list responses
+    MIN_ITEMS: Fewest results for which a response is streamed
+    CHUNK_SIZE: Approximate size (in characters) of each streamed chunk
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MIN_ITEMS': 50,
+    'CHUNK_SIZE': 16384,
+}
+
+# Separators JSONRenderer uses without indentation
+SHORT_SEPARATORS = (',', ':')
+LONG_SEPARATORS = (', ', ': ')
+
+
+def get_streaming_settings():
+    """Return the streaming settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_STREAMING_JSON', {})}
+
+
+def escape_separators(text):
+    """Escape U+2028/U+2029 like JSONRenderer, keeping the output a JavaScript subset."""
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that can also render its output as a sequence of chunks.
+
+    ``render()`` is unchanged. ``iter_render()`` yields ``bytes`` chunks
+    whose concatenation is byte-for-byte what ``render()`` returns.
+    """
+
+    def get_encoder(self, separators):
+        return self.encoder_class(
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=separators,
+        )
+
+    def iter_render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render ``data`` into JSON, yielding bytestrings.
+
+        A top-level list and the list values of a top-level dict (such as
+        ``results`` in a paginated response) are encoded one item at a time.
+        Everything else, and indented output, is encoded in one piece.
+        """
+        renderer_context = renderer_context or {}
+        if data is None:
+            return
+        if self.get_indent(accepted_media_type, renderer_context) is not None or not self.is_streamable(data):
+            yield self.render(data, accepted_media_type, renderer_context)
+            return
+
+        separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        encoder = self.get_encoder(separators)
+        chunk_size = get_streaming_settings()['CHUNK_SIZE']
+        buffer, size = [], 0
+        for piece in self.iter_pieces(data, encoder, separators):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield escape_separators(''.join(buffer)).encode()
+                buffer, size = [], 0
+        if buffer:
+            yield escape_separators(''.join(buffer)).encode()
+
+    def is_streamable(self, data):
+        if isinstance(data, list):
+            return True
+        return isinstance(data, dict) and all(isinstance(key, str) for key in data)
+
+    def iter_pieces(self, data, encoder, separators):
+        """Yield the JSON text of ``data`` in pieces (one per list item)."""
+        item_separator, key_separator = separators
+        if isinstance(data, list):
+            yield from self.iter_list(data, encoder, item_separator)
+            return
+
+        yield '{'
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                yield item_separator
+            yield encoder.encode(key) + key_separator
+            if isinstance(value, list):
+                yield from self.iter_list(value, encoder, item_separator)
+            else:
+                yield encoder.encode(value)
+        yield '}'
+
+    def iter_list(self, items, encoder, item_separator):
+        yield '['
+        for index, item in enumerate(items):
+            if index:
+                yield item_separator
+            yield encoder.encode(item)
+        yield ']'
+
+
+def count_items(data):
+    """Return the number of list results in ``data`` (0 if it has none)."""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return len(data['results'])
+    return 0
+
+
+def should_stream(data, options=None):
+    """Return True if a response body with ``data`` is large enough to stream."""
+    options = options or get_streaming_settings()
+    return options['ENABLED'] and count_items(data) >= options['MIN_ITEMS']
+
+
+def streaming_response(response):
+    """
+    Convert a finalized DRF ``Response`` into a ``StreamingHttpResponse``.
+
+    Args:
+        response: A response whose accepted renderer has ``iter_render()``
+
+    Returns:
+        StreamingHttpResponse: Same status and headers, rendered lazily
+    """
+    renderer = response.accepted_renderer
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    streamed = StreamingHttpResponse(
+        renderer.iter_render(response.data, response.accepted_media_type, response.renderer_context),
+        status=response.status_code,
+        content_type=content_type,
+    )
+    for name, value in response.items():
+        if name.lower() != 'content-type':
+            streamed[name] = value
+    return streamed
+
+
+async def aiter_render(data, renderer=None):
+    """Async iterator over ``iter_render()`` chunks for async streaming responses."""
+    renderer = renderer or StreamingJSONRenderer()
+    for chunk in renderer.iter_render(data):
+        yield chunk
+
+
+class StreamingListMixin:
+    """
+    Mixin for list views that streams responses with many results.
+
+    Only successful GET responses whose negotiated renderer supports
+    ``iter_render()`` (``StreamingJSONRenderer``) are streamed.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (isinstance(response, Response)
+                and response.status_code == 200
+                and request.method in ('GET', 'HEAD')
+                and hasattr(response.accepted_renderer, 'iter_render')
+                and should_stream(response.data)):
+            return streaming_response(response)
+        return response
@@ -0,0 +1,193 @@
+"""
+Read-replica routing for the Book and Author read views.
+
+Only views that opt in read from a replica. ``ReplicaRoutingMixin`` marks
+the current request (a context variable, so it is thread- and async-safe)
+while a GET/HEAD of a read view is handled, and ``ReadReplicaRouter`` sends
+the reads made during that time to one of the replica aliases. Every other
+query goes to the primary: writes, reads inside write views, the admin,
+management commands and signal handlers.
+
+Replicas lag behind the primary. After a successful write through a view
+with the mixin, the client is pinned to the primary for ``STICKY_SECONDS``
+so that it reads its own writes. The pin is kept in two places:
+
+- a cookie (works across processes without shared state), and
+- the cache ``CACHE_ALIAS``, keyed by user, for clients that drop cookies
+  (use a shared cache such as Redis when running several processes).
+
+Set ``STICKY_SECONDS`` above the worst replication lag.
+
+Other clients may read a lagging replica right after a write. Their
+responses are not cached (see ``reading_from_replica()``): the write has
+already bumped the cache generations, and a stale page stored under the
+new generation would be served to everyone until it expires. Responses and
+counts read from the primary are cached as before, and cache hits are
+served to replica readers too.
+
+For local testing, the 'replica' alias in settings.py points to a second
+SQLite file. ``manage.py replicate_db`` copies the primary into it, once
+or every few seconds, and stands in for real replication.
+
+Settings (``API_READ_REPLICAS``):
+    ENABLED: Route the read views to the replicas
+    ALIASES: Database aliases of the replicas (aliases missing from
+        DATABASES are ignored)
+    STICKY_SECONDS: How long a client reads from the primary after a write
+    COOKIE_NAME: Cookie holding the pin
+    CACHE_ALIAS: Cache holding the per-user pins
+"""
+
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'ALIASES': ['replica'],
+    'STICKY_SECONDS': 5,
+    'COOKIE_NAME': 'api_primary_pin',
+    'CACHE_ALIAS': 'default',
+}
+
+# Alias the reads of the current request go to (None: the primary)
+_read_alias = contextvars.ContextVar('api_read_alias', default=None)
+
+
+def get_replica_settings():
+    """Return the read replica settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_READ_REPLICAS', {})}
+
+
+def replica_aliases():
+    """Return the configured replica aliases that exist in DATABASES."""
+    return [alias for alias in get_replica_settings()['ALIASES'] if alias in settings.DATABASES]
+
+
+def choose_replica():
+    """Return a replica alias to read from, or None when routing is off."""
+    aliases = replica_aliases()
+    if not get_replica_settings()['ENABLED'] or not aliases:
+        return None
+    return random.choice(aliases)
+
+
+def use_replica(alias):
+    """
+    Route the following reads of this context to ``alias``.
+
+    Returns:
+        A token for ``reset_replica()``
+    """
+    return _read_alias.set(alias)
+
+
+def reset_replica(token):
+    """Undo the matching ``use_replica()`` call."""
+    _read_alias.reset(token)
+
+
+def reading_from_replica():
+    """
+    Return True while the reads of this context go to a replica.
+
+    Results read then may lag behind the primary, so they must not be
+    stored in caches keyed by the primary's state (the response cache and
+    the count cache are keyed by the cache generations, which writes bump
+    on the primary before the replicas catch up).
+    """
+    return _read_alias.get() is not None
+
+
+def _pin_key(user):
+    return f'api:replica-pin:user:{user.pk}'
+
+
+def pin_to_primary(request, response):
+    """Pin the client of ``request`` to the primary for STICKY_SECONDS."""
+    options = get_replica_settings()
+    seconds = options['STICKY_SECONDS']
+    if seconds <= 0:
+        return
+    response.set_cookie(options['COOKIE_NAME'], '1', max_age=seconds, httponly=True, samesite='Lax')
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        caches[options['CACHE_ALIAS']].set(_pin_key(user), True, seconds)
+
+
+def is_pinned(request, user=None):
+    """
+    Return True if the client recently wrote and must read from the primary.
+
+    Args:
+        request: The Django or DRF request (its cookies are checked)
+        user: The authenticated user, if known (its cached pin is checked)
+    """
+    options = get_replica_settings()
+    if options['COOKIE_NAME'] in request.COOKIES:
+        return True
+    if user is not None and user.is_authenticated:
+        return bool(caches[options['CACHE_ALIAS']].get(_pin_key(user)))
+    return False
+
+
+class ReplicaRoutingMixin:
+    """
+    Mixin for DRF views: GETs read from a replica, successful writes pin.
+
+    Read views route their safe requests to a replica unless the client is
+    pinned; the choice is made after authentication, so a user's pin is
+    honoured for token clients too. Write views pin the client after every
+    successful unsafe request.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._replica_token = None
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request, request.user):
+            alias = choose_replica()
+            if alias is not None:
+                self._replica_token = use_replica(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            reset_replica(token)
+            self._replica_token = None
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
+
+
+class ReadReplicaRouter:
+    """
+    Database router sending marked reads to a replica.
+
+    Reads go to the alias chosen by ``ReplicaRoutingMixin`` for the current
+    request, when there is one; writes always go to the primary. Replicas
+    are copies of the primary, so relations between them are allowed, and
+    they are never migrated directly.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_settings()['ALIASES']:
+            return False
+        return None
@@ -0,0 +1,303 @@
+"""
+Full-text search for books.
+
+On SQLite the ``search`` parameter is answered from an FTS5 virtual table
+(``api_book_fts``, created by migration 0004) that indexes each book's
+title and author name under the book's id. The table is kept in sync by the
+signal handlers in ``api/signals.py``. On PostgreSQL a ``tsvector`` built
+from the same two columns is used. Results are annotated with
+``search_rank`` (lower is better) so they can be ordered by relevance.
+
+If no index is available (another backend, FTS5 not compiled in, or
+``settings.API_FULL_TEXT_SEARCH`` is False) the original ``icontains``
+OR-join is used.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import Author, Book
+
+
+FTS_TABLE = 'api_book_fts'
+
+# Per-database cache of "does the FTS table exist?"
+_fts_available = {}
+
+
+def fts_available(alias):
+    """
+    Return True if the FTS5 index exists on database ``alias``.
+
+    The answer is cached per process; call ``reset_fts_cache()`` after
+    creating or dropping the table outside of migrations.
+    """
+    if alias not in _fts_available:
+        connection = connections[alias]
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+                )
+                available = cursor.fetchone() is not None
+        _fts_available[alias] = available
+    return _fts_available[alias]
+
+
+def reset_fts_cache():
+    """Forget cached FTS availability (used by migrations and tests)."""
+    _fts_available.clear()
+
+
+def full_text_enabled():
+    """Return False if full-text search was switched off in settings."""
+    return getattr(settings, 'API_FULL_TEXT_SEARCH', True)
+
+
+def build_fts_query(value):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so ``harry pot`` matches
+    "Harry Potter" and user input can never inject FTS5 operators.
+
+    Returns:
+        str or None: The MATCH expression, or None if ``value`` has no words
+    """
+    terms = re.findall(r'\w+', value.lower())
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def icontains_search(queryset, value):
+    """The original search: case-insensitive contains on title or author name."""
+    return queryset.filter(
+        Q(title__icontains=value) |
+        Q(author__name__icontains=value)
+    )
+
+
+def search_books(queryset, value):
+    """
+    Filter a Book queryset by free text, using the best available index.
+
+    Args:
+        queryset: Book queryset to filter
+        value: The search text
+
+    Returns:
+        QuerySet: Matching books annotated with ``search_rank`` when an
+        index was used
+    """
+    value = value.strip()
+    if not value:
+        return queryset
+    if not full_text_enabled():
+        return icontains_search(queryset, value)
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        return postgres_search(queryset, value)
+    if fts_available(queryset.db):
+        match = build_fts_query(value)
+        if match is None:
+            return icontains_search(queryset, value)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {Book._meta.db_table}.id',
+                [match],
+            )
+        )
+    return icontains_search(queryset, value)
+
+
+def postgres_search(queryset, value):
+    """Search with a tsvector over title and author name (PostgreSQL only)."""
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    vector = SearchVector('title', weight='A') + SearchVector('author__name', weight='B')
+    query = SearchQuery(value, search_type='websearch')
+    return queryset.annotate(
+        search_vector=vector,
+        search_rank=-SearchRank(F('search_vector'), query),
+    ).filter(search_vector=query)
+
+
+def index_books(books):
+    """
+    Insert or replace the index rows of the given books.
+
+    Args:
+        books: Iterable of Book instances (their ``author_name`` snapshot,
+            or their ``author`` when it is missing, is read)
+    """
+    books = list(books)
+    if not books:
+        return
+    alias = router.db_for_write(Book)
+    if not fts_available(alias):
+        return
+    names = {book.author_id: book.author_name for book in books if book.author_name}
+    names.update((book.author_id, book.author.name) for book in books if Book.author.is_cached(book))
+    missing = {book.author_id for book in books} - names.keys()
+    if missing:
+        names.update(Author.objects.using(alias).filter(pk__in=missing).values_list('pk', 'name'))
+    with connections[alias].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(book.pk,) for book in books],
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, author_name) VALUES (%s, %s, %s)',
+            [(book.pk, book.title, names.get(book.author_id, '')) for book in books],
+        )
+
+
+def index_book(book):
+    """Insert or replace the index row of a single book."""
+    alias = router.db_for_write(Book)
+    if not fts_available(alias):
+        return
+    author_name = book.author.name if Book.author.is_cached(book) else (
+        Author.objects.using(alias).filter(pk=book.author_id).values_list('name', flat=True).first() or ''
+    )
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [book.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, author_name) VALUES (%s, %s, %s)',
+            [book.pk, book.title, author_name],
+        )
+
+
+def unindex_book(book_id):
+    """Remove a book from the index."""
+    alias = router.db_for_write(Book)
+    if not fts_available(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [book_id])
+
+
+def unindex_books(book_ids):
+    """Remove several books from the index."""
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    alias = router.db_for_write(Book)
+    if not fts_available(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(book_id,) for book_id in book_ids],
+        )
+
+
+def reindex_author(author):
+    """Propagate an author's (possibly new) name to all of their books."""
+    alias = router.db_for_write(Author)
+    if not fts_available(alias):
+        return
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET author_name = %s WHERE rowid IN '
+            f'(SELECT id FROM {Book._meta.db_table} WHERE author_id = %s)',
+            [author.name, author.pk],
+        )
+
+
+def rebuild_index(alias='default'):
+    """
+    Rebuild the whole FTS index from the Book table.
+
+    Returns:
+        int: The number of books indexed
+    """
+    if not fts_available(alias):
+        return 0
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, author_name) '
+            f'SELECT b.id, b.title, a.name FROM {Book._meta.db_table} b '
+            f'JOIN {Author._meta.db_table} a ON a.id = b.author_id'
+        )
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter that answers ``?search=`` from the full-text index.
+
+    Falls back to DRF's ``icontains`` search over ``search_fields`` when no
+    index is available. If the queryset was already searched (BookFilter's
+    ``search`` filter shares the parameter), it is left untouched.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, '')
+        if not value.strip() or 'search_rank' in queryset.query.annotations:
+            return queryset
+        searched = search_books(queryset, value)
+        if 'search_rank' not in searched.query.annotations:
+            # No index: keep DRF's own search semantics
+            return super().filter_queryset(request, queryset, view)
+        return searched
+
+
+def ordering_column(view, field):
+    """
+    Return the column the ordering term ``field`` (without '-') sorts on.
+
+    Views map public ordering names to cheaper columns with an
+    ``ordering_columns`` dict, e.g. ``{'author__name': 'author_name'}``
+    sorts on the indexed snapshot instead of joining every author.
+    """
+    return getattr(view, 'ordering_columns', {}).get(field, field)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that orders full-text results by relevance.
+
+    When the queryset carries a ``search_rank`` annotation and the client did
+    not ask for an explicit ``ordering``, results are ordered by rank (best
+    first) instead of the view's default ordering. Ordering terms are
+    translated through the view's ``ordering_columns`` (see
+    ``ordering_column()``).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if term.startswith('-') else '') + ordering_column(view, term.lstrip('-'))
+            for term in ordering
+        ]
+
+    def filter_queryset(self, request, queryset, view):
+        if ('search_rank' in queryset.query.annotations
+                and not self.get_requested_ordering(request, queryset, view)):
+            return queryset.order_by('search_rank', 'pk')
+        return super().filter_queryset(request, queryset, view)
+
+    def get_requested_ordering(self, request, queryset, view):
+        """Return the valid ordering terms sent by the client, if any."""
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return []
+        fields = [param.strip() for param in params.split(',')]
+        return self.remove_invalid_fields(queryset, fields, view, request)
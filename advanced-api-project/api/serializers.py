@@ -1,16 +1,226 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from .models import Author, Book
+from .counters import adjust_book_counts, count_created, count_moved
+from .stats import adjust_stats, count_changed_years, count_created_books
+from .snapshots import snapshot_author_names
+from .profiling import profile_section
 from datetime import datetime
 
 
-class BookSerializer(serializers.ModelSerializer):
+class TimedDataMixin:
+    """
+    Serializer mixin that reports the time spent building ``.data``.
+    
+    The time shows up as ``serialize`` in the request profile (see
+    api/profiling.py); outside a profiled request it costs nothing.
+    """
+    
+    @property
+    def data(self):
+        with profile_section('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """ListSerializer whose ``.data`` is timed by the request profiler."""
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin that accepts a ``fields`` argument.
+    
+    ``BookSerializer(book, fields=('id', 'title'))`` drops every other field
+    from the output. ``fields=None`` keeps all of them. Used by the sparse
+    fieldset support of the read views (see ``api/fieldsets.py``).
+    """
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class AuthorPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Author foreign key field that can resolve ids from a preloaded map.
+    
+    When the serializer context contains an ``authors`` dict (id -> Author),
+    as set up by BookListSerializer for bulk writes, ids are looked up there
+    instead of issuing one query per row.
+    """
+    
+    def to_internal_value(self, data):
+        authors = self.context.get('authors')
+        if authors is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return authors[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BookListSerializer(TimedListSerializer):
+    """
+    List serializer used by BookSerializer(many=True) for bulk writes.
+    
+    Unlike the default ListSerializer, items are validated one by one so that
+    invalid rows are reported by index instead of rejecting the whole batch.
+    Shared lookups (the current year and every referenced author) are done
+    once per batch, and valid rows are written with bulk_create/bulk_update
+    in chunked transactions.
+    """
+    chunk_size = 1000
+    
+    def get_batch_context(self, items):
+        """
+        Build the serializer context shared by every item of the batch.
+        
+        Args:
+            items (list): Raw items from the request
+            
+        Returns:
+            dict: The context with ``current_year`` and ``authors`` set
+        """
+        author_ids = set()
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    author_ids.add(int(item.get('author')))
+                except (TypeError, ValueError):
+                    pass
+        return {
+            **self.context,
+            'current_year': datetime.now().year,
+            'authors': Author.objects.in_bulk(author_ids),
+        }
+    
+    def validate_items(self, items, instances=None, partial=False):
+        """
+        Validate every item independently.
+        
+        Args:
+            items (list): Raw items from the request
+            instances (dict): For updates, existing books keyed by id
+            partial (bool): Whether missing fields are allowed (PATCH)
+            
+        Returns:
+            tuple: (valid, errors) where ``valid`` is a list of
+            ``(index, instance, validated_data)`` and ``errors`` a list of
+            ``{'index': i, 'errors': ...}``
+        """
+        context = self.get_batch_context(items)
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an object.']}})
+                continue
+            instance = None
+            if instances is not None:
+                instance = instances.get(self.get_item_id(item))
+                if instance is None:
+                    errors.append({'index': index, 'errors': {'id': ['Book not found.']}})
+                    continue
+            child = self.child.__class__(instance, data=item, partial=partial, context=context)
+            if child.is_valid():
+                valid.append((index, instance, child.validated_data))
+            else:
+                errors.append({'index': index, 'errors': child.errors})
+        return valid, errors
+    
+    @staticmethod
+    def get_item_id(item):
+        """Return the integer id of an update item, or None."""
+        try:
+            return int(item.get('id'))
+        except (TypeError, ValueError):
+            return None
+    
+    def chunks(self, rows):
+        """Yield ``rows`` in slices of ``chunk_size``."""
+        for start in range(0, len(rows), self.chunk_size):
+            yield rows[start:start + self.chunk_size]
+    
+    def bulk_create(self, items):
+        """
+        Validate and insert a batch of new books.
+        
+        Returns:
+            tuple: (created books, per-item errors)
+        """
+        valid, errors = self.validate_items(items)
+        created = []
+        for chunk in self.chunks(valid):
+            books = [Book(**data) for _, _, data in chunk]
+            snapshot_author_names(books)
+            try:
+                with transaction.atomic():
+                    books = Book.objects.bulk_create(books)
+                    adjust_book_counts(count_created(books))
+                    adjust_stats(count_created_books(books))
+                created.extend(books)
+            except IntegrityError as exc:
+                errors.extend({'index': index, 'errors': {'non_field_errors': [str(exc)]}} for index, _, _ in chunk)
+        return created, sorted(errors, key=lambda error: error['index'])
+    
+    def bulk_update(self, items, partial=False):
+        """
+        Validate and update a batch of existing books identified by ``id``.
+        
+        Returns:
+            tuple: (updated books, per-item errors)
+        """
+        ids = {self.get_item_id(item) for item in items if isinstance(item, dict)}
+        instances = Book.objects.in_bulk(ids - {None})
+        valid, errors = self.validate_items(items, instances=instances, partial=partial)
+        updated = []
+        now = timezone.now()
+        for chunk in self.chunks(valid):
+            fields = {'updated_at'}
+            books, moves, year_changes = [], [], []
+            for _, book, data in chunk:
+                new_author_id = data['author'].pk if 'author' in data else book.author_id
+                moves.append((book.author_id, new_author_id))
+                year_changes.append((book.publication_year, data.get('publication_year', book.publication_year)))
+                for attr, value in data.items():
+                    setattr(book, attr, value)
+                if 'author' in data:
+                    book.author_name = data['author'].name
+                    fields.add('author_name')
+                # bulk_update() bypasses auto_now, so stamp the rows explicitly
+                book.updated_at = now
+                fields.update(data)
+                books.append(book)
+            try:
+                with transaction.atomic():
+                    Book.objects.bulk_update(books, sorted(fields))
+                    adjust_book_counts(count_moved(moves))
+                    adjust_stats(count_changed_years(year_changes))
+                updated.extend(books)
+            except IntegrityError as exc:
+                errors.extend({'index': index, 'errors': {'non_field_errors': [str(exc)]}} for index, _, _ in chunk)
+        return updated, sorted(errors, key=lambda error: error['index'])
+
+
+class BookSerializer(TimedDataMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     BookSerializer handles serialization of Book model instances.
     
     This serializer includes all fields of the Book model and implements
     custom validation to ensure the publication_year is not in the future.
     The author field is serialized as a foreign key relationship.
+    
+    With ``many=True`` it is backed by BookListSerializer for bulk writes.
+    Pass ``fields`` to serialize only some of the fields.
     """
+    author = AuthorPrimaryKeyField(queryset=Author.objects.all(), help_text="The author who wrote this book")
     
     def validate_publication_year(self, value):
         """
@@ -25,7 +235,8 @@ class BookSerializer(serializers.ModelSerializer):
         Raises:
             serializers.ValidationError: If the publication year is in the future
         """
-        current_year = datetime.now().year
+        # Bulk writes compute the year once per batch (see BookListSerializer)
+        current_year = self.context.get('current_year') or datetime.now().year
         if value > current_year:
             raise serializers.ValidationError(
                 f"Publication year cannot be in the future. Current year is {current_year}."
@@ -36,9 +247,10 @@ class BookSerializer(serializers.ModelSerializer):
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
         read_only_fields = ['id']
+        list_serializer_class = BookListSerializer
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedDataMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     AuthorSerializer handles serialization of Author model instances.
     
@@ -53,3 +265,4 @@ class AuthorSerializer(serializers.ModelSerializer):
         model = Author
         fields = ['id', 'name', 'books']
         read_only_fields = ['id']
+        list_serializer_class = TimedListSerializer
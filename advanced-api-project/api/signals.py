@@ -0,0 +1,192 @@
+"""
+Signal handlers for the api app.
+
+Writes to Book and Author (from the API views, the admin or the shell) go
+through ``post_save``/``post_delete``, so cache invalidation and search
+index maintenance, the ``Author.book_count`` counter, the ``Book.author_name``
+snapshot (see ``api/snapshots.py``) and the catalog statistics (see
+``api/stats.py``) live here rather than in each view. Token
+and User changes invalidate the authentication cache (see
+``api/authentication.py``). Bulk writes, which bypass these signals, call
+``books_bulk_written()`` or ``books_bulk_deleted()`` and adjust the
+counters themselves.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import search
+from .authentication import revoke_cached_tokens, token_cache
+from .cache import bump_generation
+from .counters import adjust_book_counts, count_moved
+from .models import Author, Book, CatalogStat
+from .snapshots import propagate_author_name
+from .stats import adjust_stats, count_changed_years, count_created_books, count_deleted_books
+
+
+def invalidate_model(label):
+    """
+    Bump the cache generation for ``label`` now and again after commit.
+
+    The immediate bump makes the write visible to later reads in the same
+    transaction; the on-commit bump discards anything a concurrent request
+    cached from pre-commit data while the transaction was still open.
+    """
+    bump_generation(label)
+    transaction.on_commit(lambda: bump_generation(label))
+
+
+def books_bulk_written(books):
+    """
+    Run the post-write bookkeeping for books saved with bulk_create/bulk_update.
+    
+    Args:
+        books: The created or updated Book instances
+    """
+    search.index_books(books)
+    invalidate_model('book')
+
+
+def books_bulk_deleted(book_ids):
+    """
+    Run the post-delete bookkeeping for books deleted without their signals.
+    
+    Args:
+        book_ids: The primary keys of the deleted books
+    """
+    search.unindex_books(book_ids)
+    invalidate_model('book')
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_cache(sender, **kwargs):
+    """Invalidate cached responses that include book data."""
+    invalidate_model('book')
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_cache(sender, **kwargs):
+    """Invalidate cached responses that include author data."""
+    invalidate_model('author')
+
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, raw=False, **kwargs):
+    """Keep the full-text index row of a saved book up to date."""
+    if not raw:
+        search.index_book(instance)
+
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, **kwargs):
+    """Drop a deleted book from the full-text index."""
+    search.unindex_book(instance.pk)
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, created=False, raw=False, **kwargs):
+    """Propagate author renames to the full-text index."""
+    if not created and not raw:
+        search.reindex_author(instance)
+
+
+@receiver(pre_save, sender=Book)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    """Record the author and year a book had before this save (for the counters)."""
+    instance._previous_author_id = instance._previous_year = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    previous = Book.objects.filter(pk=instance.pk).values_list('author_id', 'publication_year').first()
+    if previous is not None:
+        instance._previous_author_id, instance._previous_year = previous
+
+
+@receiver(pre_save, sender=Book)
+def snapshot_author_name(sender, instance, raw=False, **kwargs):
+    """Copy the author's name onto a book whose author is new or changed."""
+    if raw:
+        return
+    if Book.author.is_cached(instance):
+        instance.author_name = instance.author.name
+    elif not instance.author_name or instance.author_id != instance._previous_author_id:
+        instance.author_name = Author.objects.filter(pk=instance.author_id).values_list('name', flat=True).first() or ''
+
+
+@receiver(post_save, sender=Author)
+def propagate_renamed_author(sender, instance, created=False, raw=False, **kwargs):
+    """Rewrite the author_name snapshot of a renamed author's books."""
+    if not created and not raw:
+        propagate_author_name(instance)
+
+
+@receiver(post_save, sender=Book)
+def update_author_book_count(sender, instance, created=False, raw=False, **kwargs):
+    """Keep Author.book_count in step with created and re-assigned books."""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_author_id', None)
+    if previous is None:
+        adjust_book_counts({instance.author_id: 1})
+    else:
+        adjust_book_counts(count_moved([(previous, instance.author_id)]))
+
+
+@receiver(post_delete, sender=Book)
+def decrement_author_book_count(sender, instance, **kwargs):
+    """Decrement Author.book_count when a book is deleted."""
+    adjust_book_counts({instance.author_id: -1})
+
+
+@receiver(post_save, sender=Book)
+def update_book_stats(sender, instance, created=False, raw=False, **kwargs):
+    """Count a created book, or move a book whose year changed, in the catalog statistics."""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_year', None)
+    if previous is None:
+        adjust_stats(count_created_books([instance]))
+    else:
+        adjust_stats(count_changed_years([(previous, instance.publication_year)]))
+
+
+@receiver(post_delete, sender=Book)
+def discount_deleted_book(sender, instance, **kwargs):
+    """Remove a deleted book from the catalog statistics."""
+    adjust_stats(count_deleted_books([instance]))
+
+
+@receiver(post_save, sender=Author)
+def count_created_author(sender, instance, created=False, raw=False, **kwargs):
+    """Count a new author in the catalog statistics."""
+    if created and not raw:
+        adjust_stats({(CatalogStat.AUTHORS, 0): 1})
+
+
+@receiver(post_delete, sender=Author)
+def discount_deleted_author(sender, instance, **kwargs):
+    """Remove a deleted author from the catalog statistics."""
+    adjust_stats({(CatalogStat.AUTHORS, 0): -1})
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted (e.g. rotated) token from the auth cache."""
+    revoke_cached_tokens()
+    transaction.on_commit(revoke_cached_tokens)
+
+
+@receiver(post_save, sender=User)
+def refresh_cached_user(sender, instance, raw=False, **kwargs):
+    """Revoke a deactivated user's tokens and drop stale cached users."""
+    if raw:
+        return
+    if not instance.is_active:
+        revoke_cached_tokens()
+        transaction.on_commit(revoke_cached_tokens)
+    else:
+        token_cache.discard_user(instance.pk)
@@ -0,0 +1,62 @@
+"""
+Maintenance of the denormalized ``Book.author_name`` snapshot.
+
+``Book.__str__`` and the admin changelist show the author's name for every
+book. Reading it from the snapshot instead of ``book.author`` avoids one
+query per book wherever books are printed without ``select_related``
+(admin widgets, logging, the shell).
+
+The snapshot is written together with the book (the ``pre_save`` handler
+in api/signals.py and the bulk writes in api/serializers.py), and all of an
+author's books are rewritten with one ``UPDATE`` when the author is renamed.
+"""
+
+from django.db.models import OuterRef, Subquery
+
+from .models import Author, Book
+
+
+def author_names(author_ids):
+    """Return ``{author id: name}`` for ``author_ids`` in one query."""
+    return dict(Author.objects.filter(pk__in=author_ids).values_list('pk', 'name'))
+
+
+def snapshot_author_names(books):
+    """
+    Set ``author_name`` on ``books`` before they are bulk written.
+
+    Authors already loaded on a book are used as is; the names of the
+    others are read in one query.
+    """
+    missing = {book.author_id for book in books if not Book.author.is_cached(book)}
+    names = author_names(missing) if missing else {}
+    for book in books:
+        if Book.author.is_cached(book):
+            book.author_name = book.author.name
+        else:
+            book.author_name = names.get(book.author_id, '')
+
+
+def propagate_author_name(author):
+    """
+    Rewrite the snapshot on ``author``'s books after a rename.
+
+    Returns:
+        int: The number of books updated
+    """
+    return Book.objects.filter(author=author).exclude(author_name=author.name).update(author_name=author.name)
+
+
+def refresh_author_names():
+    """
+    Rewrite every book's snapshot from the Author table.
+
+    Returns:
+        int: The number of books whose snapshot was wrong
+    """
+    current = Author.objects.filter(pk=OuterRef('author_id')).values('name')[:1]
+    drifted = Book.objects.exclude(author_name=Subquery(current))
+    fixed = drifted.count()
+    if fixed:
+        Book.objects.update(author_name=Subquery(current))
+    return fixed
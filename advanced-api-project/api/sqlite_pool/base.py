@@ -0,0 +1,224 @@
+"""
+SQLite database backend with a process-wide connection pool.
+
+Use it as ``'ENGINE': 'api.sqlite_pool'``. It behaves like Django's SQLite
+backend; only opening and closing connections change.
+
+Django keeps one connection per thread. With ``CONN_MAX_AGE = 0`` it
+closes that connection after every request, and with a positive value it
+keeps it for that long. Under ASGI, requests run in short-lived threads,
+so persistent connections pile up or are reopened constantly. Opening an
+SQLite connection is not free: Django registers its SQL functions, and
+the pragmas in ``init_command`` run every time, while the page cache
+starts cold.
+
+With ``OPTIONS['pool']`` set, a closed connection is handed back to a
+pool shared by all threads of the process instead of being closed, and
+the next connection request takes it from there:
+
+- A connection closed in the middle of a transaction is rolled back
+  before it is pooled.
+- Connections older than ``MAX_AGE`` seconds are closed instead of reused.
+- With ``HEALTH_CHECKS``, a pooled connection is tested with ``SELECT 1``
+  before it is handed out; broken ones are discarded.
+- At most ``MAX_SIZE`` idle connections are kept.
+- Check-out and check-in hold a lock, so threads (including the ones
+  ``sync_to_async`` runs ORM calls in) never share a connection.
+- A forked child (e.g. a pre-forking server or the parallel importer)
+  starts with an empty pool instead of inheriting the parent's
+  connections.
+
+In-memory databases are never pooled (closing them would lose the data,
+so Django never closes them). Creating or destroying a test database
+closes the idle connections, so none points to a replaced file.
+
+Options (``OPTIONS['pool']``, ``True`` for the defaults):
+    MAX_SIZE: Idle connections kept per database
+    MAX_AGE: Seconds a connection is reused before it is closed (None: no limit)
+    HEALTH_CHECKS: Test pooled connections before handing them out
+"""
+
+import os
+import threading
+import time
+from collections import Counter, deque
+
+from django.db.backends.sqlite3 import base
+from django.utils.asyncio import async_unsafe
+
+
+DEFAULTS = {
+    'MAX_SIZE': 8,
+    'MAX_AGE': 300,
+    'HEALTH_CHECKS': True,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Idle SQLite connections of one database, shared by the threads of a process.
+
+    Attributes:
+        max_size: Idle connections kept
+        max_age: Seconds a connection is reused (None: no limit)
+        health_checks: Test connections before handing them out
+        stats: Counters of ``created``, ``reused`` and ``discarded`` connections
+    """
+
+    def __init__(self, max_size=8, max_age=300, health_checks=True):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.health_checks = health_checks
+        self.stats = Counter()
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def expired(self, created):
+        return self.max_age is not None and time.monotonic() - created >= self.max_age
+
+    def healthy(self, connection):
+        try:
+            connection.execute('SELECT 1').fetchone()
+        except base.Database.Error:
+            return False
+        return True
+
+    def discard(self, connection):
+        self.stats['discarded'] += 1
+        try:
+            connection.close()
+        except base.Database.Error:
+            pass
+
+    def checkout(self):
+        """
+        Take a usable idle connection.
+
+        Returns:
+            tuple: ``(connection, creation time)``, or None if none is idle
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                # Most recently used first: its page cache is the warmest
+                connection, created = self._idle.pop()
+            if self.expired(created) or (self.health_checks and not self.healthy(connection)):
+                self.discard(connection)
+                continue
+            self.stats['reused'] += 1
+            return connection, created
+
+    def checkin(self, connection, created):
+        """Return a connection to the pool (or close it if it cannot be kept)."""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except base.Database.Error:
+            self.discard(connection)
+            return
+        if self.expired(created):
+            self.discard(connection)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((connection, created))
+                return
+        self.discard(connection)
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def __len__(self):
+        return len(self._idle)
+
+
+def get_pool(name, options):
+    """Return the pool of the database file ``name``, creating it on first use."""
+    key = str(name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**DEFAULTS, **(options if isinstance(options, dict) else {})}
+            pool = _pools[key] = ConnectionPool(
+                max_size=options['MAX_SIZE'],
+                max_age=options['MAX_AGE'],
+                health_checks=options['HEALTH_CHECKS'],
+            )
+        return pool
+
+
+def close_pools():
+    """Close the idle connections of every pool (e.g. before a database file is removed)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.clear()
+
+
+def _forget_pools():
+    # The child must not use (or close) connections shared with its parent
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pools)
+
+
+class DatabaseCreation(base.DatabaseCreation):
+    """Test database creation that drops pooled connections to replaced files."""
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        close_pools()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        return super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Django's SQLite backend, taking and returning connections through a pool."""
+
+    creation_class = DatabaseCreation
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    @property
+    def pool(self):
+        """The pool of this database, or None when pooling is off."""
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options or self.is_in_memory_db():
+            return None
+        return get_pool(self.settings_dict['NAME'], options)
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is not None:
+            pooled = pool.checkout()
+            if pooled is not None:
+                connection, self._pool_created = pooled
+                return connection
+            pool.stats['created'] += 1
+        connection = super().get_new_connection(conn_params)
+        self._pool_created = time.monotonic()
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        pool.checkin(self.connection, self._pool_created)
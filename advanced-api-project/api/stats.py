@@ -0,0 +1,147 @@
+"""
+Maintenance and reads of the ``CatalogStat`` summary table.
+
+The table holds the total number of books and authors and a histogram of
+books per publication year. Per-author counts are the denormalized
+``Author.book_count`` column (see api/counters.py), read through its index.
+
+Like the author counters, statistics are adjusted with relative ``UPDATE
+... SET count = count + n`` statements inside the transaction that writes
+the books, so concurrent writers never lose each other's changes. A row is
+created the first time a year (or total) is counted.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+
+from .models import Author, Book, CatalogStat
+
+
+def book_key(book):
+    """Return the per-year statistic key of ``book``."""
+    return (CatalogStat.YEAR, book.publication_year)
+
+
+def count_created_books(books):
+    """Return the statistic deltas for newly created ``books``."""
+    deltas = Counter(book_key(book) for book in books)
+    deltas[(CatalogStat.BOOKS, 0)] += len(books)
+    return deltas
+
+
+def count_deleted_books(books):
+    """Return the statistic deltas for deleted ``books``."""
+    return Counter({key: -delta for key, delta in count_created_books(books).items()})
+
+
+def count_changed_years(changes):
+    """
+    Return the statistic deltas for books whose publication year changed.
+
+    Args:
+        changes: Iterable of ``(old year, new year)`` pairs
+    """
+    deltas = Counter()
+    for old, new in changes:
+        if old != new:
+            deltas[(CatalogStat.YEAR, old)] -= 1
+            deltas[(CatalogStat.YEAR, new)] += 1
+    return deltas
+
+
+def adjust_stats(deltas):
+    """
+    Apply statistic changes.
+
+    Args:
+        deltas: Mapping of ``(dimension, value)`` -> change in count
+
+    Keys sharing the same delta are updated with a single statement. If some
+    rows do not exist yet (first book of a year), they are inserted with a
+    zero count, ignoring rows a concurrent writer just created, and the
+    update is repeated.
+    """
+    by_delta = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(key)
+    for delta, keys in by_delta.items():
+        condition = Q()
+        for dimension, value in keys:
+            condition |= Q(dimension=dimension, value=value)
+        stats = CatalogStat.objects.filter(condition)
+        if stats.update(count=F('count') + delta) < len(keys):
+            # Undo the partial update, create the missing rows, then redo it
+            stats.update(count=F('count') - delta)
+            CatalogStat.objects.bulk_create(
+                [CatalogStat(dimension=dimension, value=value) for dimension, value in keys],
+                ignore_conflicts=True,
+            )
+            stats.update(count=F('count') + delta)
+
+
+def compute_stats():
+    """Return the actual statistics as a ``(dimension, value) -> count`` dict."""
+    stats = {
+        (CatalogStat.BOOKS, 0): Book.objects.count(),
+        (CatalogStat.AUTHORS, 0): Author.objects.count(),
+    }
+    years = Book.objects.order_by().values_list('publication_year').annotate(total=Count('pk'))
+    stats.update(((CatalogStat.YEAR, year), total) for year, total in years)
+    return stats
+
+
+def rebuild_stats():
+    """
+    Rebuild the summary table from the Book and Author tables.
+
+    Returns:
+        int: The number of statistics that had drifted (wrong, missing or stale)
+    """
+    actual = compute_stats()
+    stored = {
+        (dimension, value): count
+        for dimension, value, count in CatalogStat.objects.values_list('dimension', 'value', 'count')
+    }
+    drifted = {key for key in actual.keys() | stored.keys() if actual.get(key, 0) != stored.get(key, 0)}
+    if drifted:
+        CatalogStat.objects.all().delete()
+        CatalogStat.objects.bulk_create(
+            CatalogStat(dimension=dimension, value=value, count=count)
+            for (dimension, value), count in sorted(actual.items())
+        )
+    return len(drifted)
+
+
+def get_catalog_stats(authors_limit=10):
+    """
+    Return the statistics for the /api/stats/ endpoint.
+
+    Two small queries regardless of catalog size: the summary rows (one per
+    publication year plus two totals) and the top authors by book count.
+
+    Args:
+        authors_limit: Number of authors to include, most books first
+    """
+    totals = {CatalogStat.BOOKS: 0, CatalogStat.AUTHORS: 0}
+    per_year = []
+    for dimension, value, count in CatalogStat.objects.values_list('dimension', 'value', 'count'):
+        if dimension == CatalogStat.YEAR:
+            if count:
+                per_year.append({'publication_year': value, 'books': count})
+        else:
+            totals[dimension] = count
+    per_year.sort(key=lambda row: row['publication_year'])
+    top_authors = Author.objects.filter(book_count__gt=0).order_by('-book_count', 'pk').values(
+        'id', 'name', 'book_count'
+    )[:authors_limit]
+    return {
+        'totals': {
+            'books': totals[CatalogStat.BOOKS],
+            'authors': totals[CatalogStat.AUTHORS],
+            'publication_years': len(per_year),
+        },
+        'books_per_year': per_year,
+        'top_authors': list(top_authors),
+    }
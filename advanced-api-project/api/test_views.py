@@ -15,15 +15,66 @@ Test Categories:
 5. Error Handling & Edge Cases
 """
 
-from django.test import TestCase
-from django.urls import reverse
+import base64
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase, APIClient
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from django.db import transaction
-from .models import Author, Book
-import json
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from . import compression
+from .authentication import token_cache
+from .benchmarks import (
+    UNBENCHMARKED_ROUTES,
+    BenchmarkRunner,
+    compare_results,
+    percentile,
+    route_names,
+    seed_dataset,
+)
+from .cache import get_response_cache
+from .compression import negotiate_encoding
+from .filters import BookFilter
+from .importer import ImportFileError, iter_records, load_checkpoint
+from .management.commands.benchmark_token_auth import Command as TokenBenchmarkCommand
+from .management.commands.replicate_db import replicate
+from .models import Author, Book, CatalogStat
+from .parallel_import import import_parallel, split_ranges
+from .query_plans import check_view, find_problems
+from .read_serializers import compile_plan
+from .renderers import StreamingJSONRenderer
+from .replicas import ReadReplicaRouter, reset_replica, use_replica
+from .search import FTS_TABLE, index_books
+from .serializers import AuthorSerializer, BookSerializer
+from .snapshots import refresh_author_names
+from .sqlite_pool.base import ConnectionPool, DatabaseWrapper as PooledDatabaseWrapper
+from .stats import compute_stats, rebuild_stats
+from .throttling import LocalWindowStore, SlidingWindowThrottle, local_store, parse_rate, retry_after
+from .views import AuthorListView, BookListView
+from .write_queue import WriteJob, WriteQueue, WriteQueueTimeout, run_write, write_queue
 
 
 class BookCRUDTestCase(APITestCase):
@@ -758,3 +809,2884 @@ class PerformanceTestCase(APITestCase):
         # Test that we get results (page_size may not be respected due to small dataset)
         self.assertGreater(len(response.data['results']), 0)
         self.assertEqual(response.data['count'], 15)  # Total count should be 15
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """
+    Test cases for keyset (cursor) pagination.
+    
+    Tests:
+    - Walking forwards and backwards through pages
+    - Ordering by (title, id) and (publication_year, id)
+    - Count query is skipped
+    - Invalid cursors are rejected
+    """
+    
+    def setUp(self):
+        """Set up books with duplicate years to exercise the id tie-breaker."""
+        self.author = Author.objects.create(name='Keyset Author')
+        for i in range(7):
+            Book.objects.create(
+                title=f'Book {i:02d}',
+                publication_year=2000 + (i % 3),
+                author=self.author
+            )
+        
+        self.client = APIClient()
+        
+    def collect_pages(self, params):
+        """Follow 'next' links until the last page, returning all result ids."""
+        url = reverse('book-list')
+        response = self.client.get(url, params)
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(book['id'] for book in response.data['results'])
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+        
+    def test_keyset_envelope_has_no_count(self):
+        """Test that keyset responses omit the count."""
+        url = reverse('book-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 3})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        
+    def test_keyset_walk_by_title(self):
+        """Test that following next links visits every book once in title order."""
+        ids, _ = self.collect_pages({'pagination': 'cursor', 'page_size': 3})
+        
+        expected = list(Book.objects.order_by('title', 'pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        
+    def test_keyset_walk_by_publication_year_desc(self):
+        """Test descending (publication_year, id) ordering with duplicate years."""
+        ids, _ = self.collect_pages({'pagination': 'cursor', 'page_size': 2, 'ordering': '-publication_year'})
+        
+        expected = list(Book.objects.order_by('-publication_year', '-pk').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+        
+    def test_keyset_previous_link(self):
+        """Test that the previous link returns the preceding page."""
+        url = reverse('book-list')
+        first = self.client.get(url, {'pagination': 'cursor', 'page_size': 3})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        
+        self.assertEqual(back.status_code, status.HTTP_200_OK)
+        self.assertEqual(back.data['results'], first.data['results'])
+        
+    def test_keyset_skips_count_query(self):
+        """Test that a keyset page is a single query."""
+        url = reverse('book-list')
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'pagination': 'cursor'})
+            
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_keyset_author_list(self):
+        """Test keyset pagination on the author list."""
+        url = reverse('author-list')
+        response = self.client.get(url, {'pagination': 'cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor returns 404."""
+        url = reverse('book-list')
+        response = self.client.get(url, {'cursor': 'not-a-cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+    def test_forged_cursor_rejected(self):
+        """Test that cursors with values of the wrong type return 404, not 500."""
+        url = reverse('book-list')
+        for ordering, payload in [
+            ('title', {'o': 'title', 'v': 'x', 'pk': 'abc', 'r': 0}),
+            ('publication_year', {'o': 'publication_year', 'v': 'zzz', 'pk': 1, 'r': 0}),
+            ('publication_year', {'o': 'publication_year', 'v': None, 'pk': 1, 'r': 0}),
+            ('title', {'o': 'title', 'v': ['x'], 'pk': 1, 'r': 0}),
+            ('title', {'o': 'title', 'v': 'x', 'pk': 1, 'r': 'back'}),
+        ]:
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+            with self.subTest(payload=payload):
+                response = self.client.get(url, {'cursor': cursor, 'ordering': ordering})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                
+    def test_cursor_from_other_ordering_rejected(self):
+        """Test that a cursor cannot be reused with a different ordering."""
+        url = reverse('book-list')
+        first = self.client.get(url, {'pagination': 'cursor', 'page_size': 3})
+        cursor = first.data['next'].split('cursor=')[1].split('&')[0]
+        response = self.client.get(url, {'cursor': cursor, 'ordering': 'publication_year'})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ResponseCacheTestCase(APITestCase):
+    """
+    Test cases for the read-only response cache.
+    
+    Tests:
+    - Repeated GETs are served from the cache
+    - Query string normalization
+    - Invalidation on API and model writes
+    - Hit/miss counters
+    """
+    
+    def setUp(self):
+        """Set up test data, an admin user and an empty cache."""
+        get_response_cache().clear()
+        self.user = User.objects.create_superuser(
+            username='admin',
+            password='adminpass123',
+            email='admin@example.com'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.author = Author.objects.create(name='Cached Author')
+        self.book = Book.objects.create(
+            title='Cached Book',
+            publication_year=2001,
+            author=self.author
+        )
+        
+        self.client = APIClient()
+        
+    def test_second_request_is_cached(self):
+        """Test that a repeated GET hits the cache without database queries."""
+        url = reverse('book-list')
+        first = self.client.get(url, {'ordering': 'title'})
+        
+        with self.assertNumQueries(0):
+            second = self.client.get(url, {'ordering': 'title'})
+            
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        
+    def test_query_string_is_normalized(self):
+        """Test that parameter order and empty values share one entry."""
+        url = reverse('book-list')
+        self.client.get(url + '?ordering=title&publication_year=2001')
+        response = self.client.get(url + '?title=&publication_year=2001&ordering=title')
+        
+        self.assertEqual(response['X-Cache'], 'HIT')
+        
+    def test_api_write_invalidates_list_and_detail(self):
+        """Test that updating a book through the API invalidates cached reads."""
+        list_url = reverse('book-list')
+        detail_url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.client.patch(
+            reverse('book-update', kwargs={'pk': self.book.pk}),
+            {'title': 'Renamed Book'},
+            format='json'
+        )
+        
+        list_response = self.client.get(list_url)
+        detail_response = self.client.get(detail_url)
+        self.assertEqual(list_response['X-Cache'], 'MISS')
+        self.assertEqual(list_response.data['results'][0]['title'], 'Renamed Book')
+        self.assertEqual(detail_response['X-Cache'], 'MISS')
+        self.assertEqual(detail_response.data['title'], 'Renamed Book')
+        
+    def test_author_write_invalidates_book_list(self):
+        """Test that renaming an author (e.g. from the admin) invalidates book lists."""
+        url = reverse('book-list')
+        self.client.get(url, {'author_name': 'Cached'})
+        
+        self.author.name = 'Renamed Author'
+        self.author.save()
+        
+        response = self.client.get(url, {'author_name': 'Cached'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 0)
+        
+    def test_author_write_keeps_book_detail(self):
+        """Test that book detail does not depend on author writes."""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        self.client.get(url)
+        
+        self.author.name = 'Renamed Author'
+        self.author.save()
+        
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        
+    def test_book_delete_invalidates_author_detail(self):
+        """Test that deleting a book invalidates the author's nested books."""
+        url = reverse('author-detail', kwargs={'pk': self.author.pk})
+        self.client.get(url)
+        
+        self.book.delete()
+        
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['books'], [])
+        
+    def test_conditional_get_served_from_cache(self):
+        """Test that a cached response answers If-None-Match without queries."""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        etag = self.client.get(url)['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_cache_stats(self):
+        """Test that hit/miss counters are exposed to admins."""
+        url = reverse('author-list')
+        self.client.get(url)
+        self.client.get(url)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse('cache-stats'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['author-list'], {'hits': 1, 'misses': 1})
+        
+    def test_cache_stats_requires_admin(self):
+        """Test that cache stats are not public."""
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(API_RESPONSE_CACHE={'ALIAS': 'api', 'ENABLED': False})
+class ConditionalGetTestCase(APITestCase):
+    """
+    Test cases for ETag / Last-Modified conditional GETs.
+    
+    Tests:
+    - Validators on detail and list responses
+    - 304 answers without serializing
+    - Validators change after writes
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Conditional Author')
+        self.book = Book.objects.create(
+            title='Conditional Book',
+            publication_year=2005,
+            author=self.author
+        )
+        
+        self.client = APIClient()
+        
+    def test_detail_if_none_match(self):
+        """Test that a matching ETag on book detail returns 304 in one query."""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_detail_etag_changes_after_update(self):
+        """Test that updating a book changes its ETag."""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        etag = self.client.get(url)['ETag']
+        
+        self.book.title = 'Changed Title'
+        self.book.save()
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        
+    def test_list_if_none_match(self):
+        """Test that a list 304 costs only the aggregate query."""
+        url = reverse('book-list')
+        etag = self.client.get(url, {'ordering': 'title'})['ETag']
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'ordering': 'title'}, HTTP_IF_NONE_MATCH=etag)
+            
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_list_etag_depends_on_query(self):
+        """Test that different filters produce different ETags."""
+        url = reverse('book-list')
+        first = self.client.get(url, {'publication_year': 2005})
+        second = self.client.get(url, {'publication_year': 1990})
+        
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        
+    def test_list_etag_changes_after_delete(self):
+        """Test that deleting a book changes the list ETag."""
+        Book.objects.create(title='Second Book', publication_year=2006, author=self.author)
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        
+        Book.objects.get(title='Second Book').delete()
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_author_detail_etag_changes_with_books(self):
+        """Test that adding a book changes the author's ETag."""
+        url = reverse('author-detail', kwargs={'pk': self.author.pk})
+        etag = self.client.get(url)['ETag']
+        
+        Book.objects.create(title='Another Book', publication_year=2007, author=self.author)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['books']), 2)
+        
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since in the future returns 304."""
+        url = reverse('book-detail', kwargs={'pk': self.book.pk})
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+    def test_lists_send_etag_only(self):
+        """Test that lists and author details carry no Last-Modified."""
+        for url in (reverse('book-list'), reverse('author-list'),
+                    reverse('author-detail', kwargs={'pk': self.author.pk})):
+            response = self.client.get(url)
+            self.assertIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+            
+    def test_if_modified_since_after_delete(self):
+        """Test that If-Modified-Since alone cannot hide a deleted book."""
+        second = Book.objects.create(title='Second Book', publication_year=2006, author=self.author)
+        since = http_date(time.time() + 60)
+        
+        second.delete()
+        
+        for url in (reverse('book-list'), reverse('author-detail', kwargs={'pk': self.author.pk})):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('book-list')).data['count'], 1)
+        
+    def test_missing_object_still_404(self):
+        """Test that conditional handling does not hide 404s."""
+        url = reverse('book-detail', kwargs={'pk': 999})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"anything"')
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BookBulkTestCase(APITestCase):
+    """
+    Test cases for the bulk book endpoint.
+    
+    Tests:
+    - Bulk create from JSON arrays and NDJSON
+    - Per-item errors without aborting the batch
+    - Bulk update and delete
+    - Query count independent of batch size
+    """
+    
+    def setUp(self):
+        """Set up test data and authentication."""
+        self.user = User.objects.create_user(username='bulkuser', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.author = Author.objects.create(name='Bulk Author')
+        self.other_author = Author.objects.create(name='Other Author')
+        
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('book-bulk')
+        
+    def test_bulk_create(self):
+        """Test creating several books in one request."""
+        data = [
+            {'title': f'Bulk Book {i}', 'publication_year': 2000 + i, 'author': self.author.pk}
+            for i in range(5)
+        ]
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertEqual(response.data['errors'], [])
+        self.assertTrue(all(book['id'] for book in response.data['data']))
+        self.assertEqual(Book.objects.count(), 5)
+        
+    def test_bulk_create_ndjson(self):
+        """Test creating books from an NDJSON body."""
+        body = '\n'.join(
+            json.dumps({'title': f'Line {i}', 'publication_year': 1999, 'author': self.author.pk})
+            for i in range(3)
+        ) + '\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Book.objects.count(), 3)
+        
+    def test_bulk_create_partial_failure(self):
+        """Test that invalid items are reported by index and valid ones saved."""
+        data = [
+            {'title': 'Good Book', 'publication_year': 2001, 'author': self.author.pk},
+            {'title': 'Future Book', 'publication_year': 3000, 'author': self.author.pk},
+            {'title': 'Orphan Book', 'publication_year': 2001, 'author': 999},
+            'not an object',
+        ]
+        response = self.client.post(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertIn('publication_year', response.data['errors'][0]['errors'])
+        self.assertIn('author', response.data['errors'][1]['errors'])
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Good Book'])
+        
+    def test_bulk_create_all_invalid(self):
+        """Test that a batch with no valid items returns 400."""
+        response = self.client.post(self.url, [{'title': ''}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    def test_bulk_create_requires_list(self):
+        """Test that a single object is rejected."""
+        data = {'title': 'Single', 'publication_year': 2000, 'author': self.author.pk}
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+    def test_bulk_create_query_count(self):
+        """Test that validation and insert do not query per row."""
+        data = [
+            {'title': f'Book {i}', 'publication_year': 2000, 'author': (self.author.pk, self.other_author.pk)[i % 2]}
+            for i in range(50)
+        ]
+        Book.objects.create(title='Existing', publication_year=2000, author=self.author)
+        # token lookup + one author lookup + savepoint, insert, release
+        # + search index delete/insert (one executemany each)
+        # + one book_count UPDATE for both authors
+        # + one catalog statistics UPDATE (the year's row already exists)
+        with self.assertNumQueries(9):
+            response = self.client.post(self.url, data, format='json')
+            
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+    def test_bulk_update(self):
+        """Test partially updating several books by id."""
+        books = [Book.objects.create(title=f'Old {i}', publication_year=2000, author=self.author) for i in range(3)]
+        data = [{'id': book.pk, 'title': f'New {i}'} for i, book in enumerate(books)]
+        data.append({'id': 999, 'title': 'Missing'})
+        response = self.client.patch(self.url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['errors'], [{'index': 3, 'errors': {'id': ['Book not found.']}}])
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', flat=True)),
+            ['New 0', 'New 1', 'New 2']
+        )
+        
+    def test_bulk_update_stamps_updated_at(self):
+        """Test that bulk updates move updated_at forward."""
+        book = Book.objects.create(title='Stamped', publication_year=2000, author=self.author)
+        before = book.updated_at
+        self.client.patch(self.url, [{'id': book.pk, 'publication_year': 2001}], format='json')
+        
+        book.refresh_from_db()
+        self.assertGreater(book.updated_at, before)
+        
+    def test_bulk_delete(self):
+        """Test deleting several books by id."""
+        books = [Book.objects.create(title=f'Gone {i}', publication_year=2000, author=self.author) for i in range(3)]
+        ids = [book.pk for book in books] + [999]
+        response = self.client.delete(self.url, {'ids': ids}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['deleted'], sorted(book.pk for book in books))
+        self.assertEqual(response.data['errors'][0]['index'], 3)
+        self.assertFalse(Book.objects.exists())
+        
+    def test_bulk_delete_query_count(self):
+        """Test that deletes keep counters, statistics and the index in step without per-row queries."""
+        books = Book.objects.bulk_create(
+            Book(title=f'Gone {i}', publication_year=2000, author=(self.author, self.other_author)[i % 2])
+            for i in range(50)
+        )
+        index_books(books)
+        Author.objects.update(book_count=25)
+        CatalogStat.objects.update_or_create(dimension=CatalogStat.BOOKS, value=0, defaults={'count': 50})
+        CatalogStat.objects.update_or_create(dimension=CatalogStat.YEAR, value=2000, defaults={'count': 50})
+        kept = Book.objects.create(title='Kept Gone', publication_year=2001, author=self.author)
+        # token lookup + savepoint, select, delete, release
+        # + search index delete (one executemany)
+        # + one book_count UPDATE for both authors
+        # + one catalog statistics UPDATE for the total and the year
+        with self.assertNumQueries(8):
+            response = self.client.delete(self.url, [book.pk for book in books], format='json')
+            
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Book.objects.all()), [kept])
+        self.assertEqual(Author.objects.get(pk=self.author.pk).book_count, 1)
+        self.assertEqual(Author.objects.get(pk=self.other_author.pk).book_count, 0)
+        self.assertEqual(CatalogStat.objects.get(dimension=CatalogStat.BOOKS).count, 1)
+        self.assertEqual(CatalogStat.objects.get(dimension=CatalogStat.YEAR, value=2000).count, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {FTS_TABLE}')
+            self.assertEqual(cursor.fetchall(), [(kept.pk,)])
+        
+    def test_bulk_create_invalidates_cache(self):
+        """Test that bulk creates invalidate cached lists."""
+        get_response_cache().clear()
+        list_url = reverse('book-list')
+        self.client.get(list_url)
+        
+        self.client.post(self.url, [{'title': 'Cached', 'publication_year': 2000, 'author': self.author.pk}], format='json')
+        
+        response = self.client.get(list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+        
+    def test_bulk_unauthorized(self):
+        """Test that bulk writes require authentication."""
+        self.client.credentials()
+        response = self.client.post(self.url, [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class FullTextSearchTestCase(APITestCase):
+    """
+    Test cases for the full-text book search.
+    
+    Tests:
+    - Index kept in sync on create, update, delete and author rename
+    - Prefix matching and relevance ordering
+    - icontains fallback when full-text search is disabled
+    - Index rebuild command
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        self.stone = Book.objects.create(
+            title='Harry Potter and the Philosopher\'s Stone',
+            publication_year=1997,
+            author=self.rowling
+        )
+        self.hobbit = Book.objects.create(
+            title='The Hobbit',
+            publication_year=1937,
+            author=self.tolkien
+        )
+        
+        self.client = APIClient()
+        self.url = reverse('book-list')
+        
+    def search(self, value, **params):
+        response = self.client.get(self.url, {'search': value, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book['title'] for book in response.data['results']]
+        
+    def test_search_by_title_prefix(self):
+        """Test that partial words match (search-as-you-type)."""
+        self.assertEqual(self.search('harr pot'), [self.stone.title])
+        
+    def test_search_by_author_name(self):
+        """Test that author names are searchable."""
+        self.assertEqual(self.search('tolkien'), ['The Hobbit'])
+        
+    def test_search_tracks_updates_and_deletes(self):
+        """Test that the index follows book writes."""
+        self.hobbit.title = 'There and Back Again'
+        self.hobbit.save()
+        self.assertEqual(self.search('hobbit'), [])
+        self.assertEqual(self.search('back again'), ['There and Back Again'])
+        
+        self.hobbit.delete()
+        self.assertEqual(self.search('back again'), [])
+        
+    def test_search_tracks_author_rename(self):
+        """Test that renaming an author updates their books in the index."""
+        self.rowling.name = 'Robert Galbraith'
+        self.rowling.save()
+        
+        self.assertEqual(self.search('galbraith'), [self.stone.title])
+        self.assertEqual(self.search('rowling'), [])
+        
+    def test_search_ranked_by_relevance(self):
+        """Test that results are ordered by rank unless ordering is given."""
+        Book.objects.create(title='Potter Potter Potter', publication_year=2000, author=self.tolkien)
+        
+        self.assertEqual(self.search('potter')[0], 'Potter Potter Potter')
+        self.assertEqual(
+            self.search('potter', ordering='title'),
+            [self.stone.title, 'Potter Potter Potter']
+        )
+        
+    def test_search_operators_are_escaped(self):
+        """Test that FTS5 syntax in user input is treated as text."""
+        self.assertEqual(self.search('hobbit OR "'), [])
+        self.assertEqual(self.search('"hobbit"'), ['The Hobbit'])
+        
+    @override_settings(API_FULL_TEXT_SEARCH=False)
+    def test_icontains_fallback(self):
+        """Test the icontains search when full-text search is disabled."""
+        self.assertEqual(self.search('obbi'), ['The Hobbit'])
+        
+    def test_rebuild_command(self):
+        """Test that the rebuild command repairs a drifted index."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM api_book_fts')
+        self.assertEqual(self.search('hobbit'), [])
+        
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        
+        self.assertIn('Indexed 2 books', out.getvalue())
+        self.assertEqual(self.search('hobbit'), ['The Hobbit'])
+
+
+class AuthorBookCountTestCase(APITestCase):
+    """
+    Test cases for the denormalized Author.book_count column.
+    
+    Tests:
+    - Counter maintenance on create, delete, author change and bulk writes
+    - Drifted-low counters are clamped at zero
+    - Filters and ordering read the column
+    - Recompute command
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='counter', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.author1 = Author.objects.create(name='First Author')
+        self.author2 = Author.objects.create(name='Second Author')
+        self.book = Book.objects.create(title='Counted', publication_year=2000, author=self.author1)
+        
+        self.client = APIClient()
+        
+    def counts(self):
+        return dict(Author.objects.values_list('name', 'book_count'))
+        
+    def test_create_and_delete(self):
+        """Test that creating and deleting books adjusts the count."""
+        Book.objects.create(title='Another', publication_year=2000, author=self.author1)
+        self.assertEqual(self.counts(), {'First Author': 2, 'Second Author': 0})
+        
+        self.book.delete()
+        self.assertEqual(self.counts(), {'First Author': 1, 'Second Author': 0})
+        
+    def test_author_change(self):
+        """Test that moving a book to another author moves the count."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.client.patch(
+            reverse('book-update', kwargs={'pk': self.book.pk}),
+            {'author': self.author2.pk},
+            format='json'
+        )
+        
+        self.assertEqual(self.counts(), {'First Author': 0, 'Second Author': 1})
+        
+    def test_queryset_delete(self):
+        """Test that queryset deletes (e.g. the admin action) adjust the count."""
+        Book.objects.create(title='Another', publication_year=2000, author=self.author2)
+        Book.objects.all().delete()
+        
+        self.assertEqual(self.counts(), {'First Author': 0, 'Second Author': 0})
+        
+    def test_delete_with_drifted_count(self):
+        """Test that deleting a book whose author's count drifted to zero does not fail."""
+        Author.objects.update(book_count=0)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.delete(reverse('book-delete', kwargs={'pk': self.book.pk}))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.counts(), {'First Author': 0, 'Second Author': 0})
+        
+    def test_bulk_writes(self):
+        """Test that bulk create and update adjust the count."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = reverse('book-bulk')
+        response = self.client.post(url, [
+            {'title': f'Bulk {i}', 'publication_year': 2000, 'author': self.author2.pk}
+            for i in range(3)
+        ], format='json')
+        self.assertEqual(self.counts(), {'First Author': 1, 'Second Author': 3})
+        
+        moved = [{'id': book['id'], 'author': self.author1.pk} for book in response.data['data'][:2]]
+        self.client.patch(url, moved, format='json')
+        self.assertEqual(self.counts(), {'First Author': 3, 'Second Author': 1})
+        
+    def test_filters_use_column(self):
+        """Test that book count filters read the column without a join."""
+        url = reverse('author-list')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'book_count_min': 1})
+            
+        self.assertEqual([author['name'] for author in response.data['results']], ['First Author'])
+        self.assertFalse(any('GROUP BY' in query['sql'] for query in queries.captured_queries))
+        
+    def test_ordering_by_book_count(self):
+        """Test ordering authors by book count."""
+        url = reverse('author-list')
+        response = self.client.get(url, {'ordering': '-book_count'})
+        
+        self.assertEqual(response.data['results'][0]['name'], 'First Author')
+        
+    def test_recompute_command(self):
+        """Test that the recompute command repairs drifted counts."""
+        Author.objects.update(book_count=7)
+        out = StringIO()
+        call_command('recompute_book_counts', stdout=out)
+        
+        self.assertIn('Fixed book_count on 2 authors', out.getvalue())
+        self.assertEqual(self.counts(), {'First Author': 1, 'Second Author': 0})
+
+
+class BookExportTestCase(APITestCase):
+    """
+    Test cases for the streaming catalog export.
+    
+    Tests:
+    - NDJSON and CSV output
+    - Filters, search and ordering are honored
+    - The response is streamed from a single query
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Export Author')
+        self.books = [
+            Book.objects.create(title=f'Export {i}', publication_year=1990 + i, author=self.author)
+            for i in range(5)
+        ]
+        
+        self.client = APIClient()
+        self.url = reverse('book-export')
+        
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+        
+    def test_ndjson_export(self):
+        """Test the default NDJSON export matches the serializer fields."""
+        response = self.client.get(self.url)
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0], {
+            'id': self.books[0].pk,
+            'title': 'Export 0',
+            'publication_year': 1990,
+            'author': self.author.pk,
+        })
+        
+    def test_csv_export(self):
+        """Test CSV export with a header row."""
+        response = self.client.get(self.url, {'export_format': 'csv'})
+        lines = self.read(response).splitlines()
+        
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('books.csv', response['Content-Disposition'])
+        self.assertEqual(lines[0], 'id,title,publication_year,author')
+        self.assertEqual(len(lines), 6)
+        
+    def test_export_honors_filters_and_ordering(self):
+        """Test that BookFilter parameters and ordering apply to the export."""
+        response = self.client.get(self.url, {
+            'publication_year_min': 1992,
+            'ordering': '-publication_year',
+        })
+        years = [json.loads(line)['publication_year'] for line in self.read(response).splitlines()]
+        
+        self.assertEqual(years, [1994, 1993, 1992])
+        
+    def test_export_honors_search(self):
+        """Test that search applies to the export."""
+        response = self.client.get(self.url, {'search': 'export 3'})
+        lines = self.read(response).splitlines()
+        
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Export 3'])
+        
+    def test_export_single_query(self):
+        """Test that the export runs one query regardless of size."""
+        response = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.read(response)
+            
+    def test_invalid_export_format(self):
+        """Test that an unknown format is rejected."""
+        response = self.client.get(self.url, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class ReadSerializerParityTestCase(APITestCase):
+    """
+    Test cases for the compiled read serializers.
+    
+    Tests:
+    - Compiled plans produce the same data as the DRF serializers
+    - List and detail responses are identical with the fast path on and off
+    - Writes still use the DRF serializers
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Parity Author')
+        self.other = Author.objects.create(name='Ünïcode Author')
+        self.books = [
+            Book.objects.create(title=f'Parity {i}', publication_year=1980 + i, author=self.author)
+            for i in range(3)
+        ]
+        Book.objects.create(title='Ñoño', publication_year=2001, author=self.other)
+        
+        self.user = User.objects.create_user(username='parity', password='parity123')
+        self.client = APIClient()
+        
+    def test_book_plan_matches_serializer(self):
+        """Test the compiled Book plan against BookSerializer."""
+        represent = compile_plan(BookSerializer)
+        for book in Book.objects.all():
+            self.assertEqual(represent(book), BookSerializer(book).data)
+            
+    def test_author_plan_matches_serializer(self):
+        """Test the compiled Author plan (with nested books) against AuthorSerializer."""
+        represent = compile_plan(AuthorSerializer)
+        for author in Author.objects.prefetch_related('books'):
+            self.assertEqual(represent(author), AuthorSerializer(author).data)
+            
+    def assertSameResponses(self, url, params=None):
+        with self.settings(API_FAST_READ_SERIALIZERS=True):
+            fast = self.client.get(url, params)
+        with self.settings(API_FAST_READ_SERIALIZERS=False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        
+    def test_list_responses_identical(self):
+        """Test that list responses are byte-for-byte identical."""
+        self.assertSameResponses(reverse('book-list'))
+        self.assertSameResponses(reverse('book-list'), {'ordering': '-publication_year', 'page_size': 2})
+        self.assertSameResponses(reverse('book-list'), {'pagination': 'cursor'})
+        self.assertSameResponses(reverse('author-list'))
+        
+    def test_detail_responses_identical(self):
+        """Test that detail responses are byte-for-byte identical."""
+        self.assertSameResponses(reverse('book-detail', kwargs={'pk': self.books[0].pk}))
+        self.assertSameResponses(reverse('author-detail', kwargs={'pk': self.author.pk}))
+        
+    def test_browsable_api_renders(self):
+        """Test that the HTML renderer works with the compiled serializer."""
+        response = self.client.get(reverse('book-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_writes_use_drf_serializer(self):
+        """Test that validation still runs on writes."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('book-create'), {
+            'title': 'Future',
+            'publication_year': 3000,
+            'author': self.author.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('publication_year', response.data)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class SparseFieldsetTestCase(APITestCase):
+    """
+    Test cases for ?fields=, ?expand= and ?books_limit=.
+    
+    Tests:
+    - Narrowed book and author representations
+    - Nested books are only prefetched when requested
+    - Windowed prefetch caps books per author
+    - Invalid parameters are rejected
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Sparse Author')
+        self.other = Author.objects.create(name='Other Sparse Author')
+        for i in range(4):
+            Book.objects.create(title=f'Sparse {i}', publication_year=2000 + i, author=self.author)
+        Book.objects.create(title='Lonely', publication_year=1999, author=self.other)
+        
+        self.client = APIClient()
+        
+    def test_book_fields(self):
+        """Test that only the requested book fields are returned."""
+        response = self.client.get(reverse('book-list'), {'fields': 'id,title'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+        
+    def test_book_fields_load_only_columns(self):
+        """Test that the SQL is narrowed with only()."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('book-list'), {'fields': 'title'})
+        select = [q['sql'] for q in queries.captured_queries if 'LIMIT' in q['sql']][-1]
+        
+        self.assertIn('"title"', select)
+        self.assertNotIn('publication_year', select)
+        
+    def test_book_detail_fields(self):
+        """Test sparse fieldsets on the detail endpoint."""
+        book = Book.objects.get(title='Lonely')
+        response = self.client.get(reverse('book-detail', kwargs={'pk': book.pk}), {'fields': 'author'})
+        self.assertEqual(response.data, {'author': self.other.pk})
+        
+    def test_author_fields_skip_prefetch(self):
+        """Test that authors without books are served without touching the book table."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('author-list'), {'fields': 'id,name'})
+        prefetches = [q for q in queries.captured_queries if 'FROM "api_book"' in q['sql']
+                      and 'COUNT' not in q['sql'].upper()]
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+        self.assertEqual(prefetches, [])
+        
+    def test_expand_books(self):
+        """Test that expand=books adds nested books to a narrowed response."""
+        response = self.client.get(reverse('author-list'), {'fields': 'name', 'expand': 'books'})
+        first = response.data['results'][1]
+        
+        self.assertEqual(set(first), {'name', 'books'})
+        self.assertEqual(len(first['books']), 4)
+        
+    def test_default_representation_unchanged(self):
+        """Test that authors still include all books by default."""
+        response = self.client.get(reverse('author-detail', kwargs={'pk': self.author.pk}))
+        
+        self.assertEqual(set(response.data), {'id', 'name', 'books'})
+        self.assertEqual([b['title'] for b in response.data['books']],
+                         ['Sparse 0', 'Sparse 1', 'Sparse 2', 'Sparse 3'])
+        
+    def test_books_limit(self):
+        """Test that books_limit caps nested books per author in one prefetch query."""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('author-list'), {'books_limit': 2})
+        books = {a['name']: [b['title'] for b in a['books']] for a in response.data['results']}
+        
+        self.assertEqual(books['Sparse Author'], ['Sparse 0', 'Sparse 1'])
+        self.assertEqual(books['Other Sparse Author'], ['Lonely'])
+        
+    def test_invalid_parameters(self):
+        """Test that unknown fields, expansions and limits return 400."""
+        url = reverse('author-list')
+        for params in ({'fields': 'id,secret'}, {'expand': 'publisher'},
+                       {'books_limit': 0}, {'books_limit': 'many'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class BenchmarkHarnessTestCase(APITestCase):
+    """
+    Test cases for the benchmark harness (api/benchmarks.py).
+    
+    Tests:
+    - Seeding produces a consistent catalog
+    - Every route is benchmarked and results are JSON serializable
+    - Percentiles and baseline comparison
+    """
+    
+    def test_seed_dataset(self):
+        """Test that seeding creates books, authors and denormalized counts."""
+        seed_dataset(25, books_per_author=10, batch_size=7)
+        
+        self.assertEqual(Book.objects.count(), 25)
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertEqual(sorted(Author.objects.values_list('book_count', flat=True)), [5, 10, 10])
+        
+    def test_runner_covers_every_route(self):
+        """Test a tiny run over all scenarios."""
+        seed_dataset(30, books_per_author=5)
+        results = BenchmarkRunner(repeat=2, warmup=0).run()
+        
+        json.dumps(results)
+        covered = {result['route'] for result in results['results']}
+        self.assertEqual(covered | set(UNBENCHMARKED_ROUTES), set(route_names()))
+        self.assertEqual(results['failed'], [])
+        for result in results['results']:
+            self.assertLess(result['status'], 300, result['name'])
+            if result['route'] != 'api-overview':
+                self.assertGreater(result['queries'], 0, result['name'])
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(results['meta']['books'], 30)
+        # Writes were rolled back
+        self.assertEqual(Book.objects.count(), 30)
+        
+    @override_settings(API_THROTTLING={'ENABLED': True, 'RATES': {'auth-token': '1/min', 'book-bulk': '1/min'}})
+    def test_runner_ignores_throttling(self):
+        """Test that throttle rates do not turn scenarios into 429s."""
+        seed_dataset(10, books_per_author=5)
+        results = BenchmarkRunner(repeat=3, warmup=1, only=['book-bulk', 'api_token_auth']).run()
+        
+        self.assertEqual(results['failed'], [])
+        self.assertTrue(all(result['status'] < 300 for result in results['results']))
+        
+    def test_runner_reports_failures(self):
+        """Test that a scenario answering with an error is listed as failed."""
+        seed_dataset(10, books_per_author=5)
+        messages = []
+        with mock.patch.object(BenchmarkRunner, 'request', return_value=mock.Mock(status_code=503, streaming=False)):
+            results = BenchmarkRunner(repeat=1, warmup=0, only=['book-list']).run(log=messages.append)
+            
+        self.assertTrue(results['failed'])
+        self.assertTrue(any(message.startswith('WARNING') for message in messages))
+        
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        
+    def test_compare_results(self):
+        """Test that slower or chattier scenarios are reported."""
+        baseline = {'results': [
+            {'name': 'books', 'p50_ms': 10.0, 'queries': 2},
+            {'name': 'authors', 'p50_ms': 10.0, 'queries': 3},
+        ]}
+        current = {'results': [
+            {'name': 'books', 'p50_ms': 11.0, 'queries': 2},
+            {'name': 'authors', 'p50_ms': 20.0, 'queries': 4},
+        ]}
+        regressions = compare_results(baseline, current, threshold=0.2)
+        
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(message.startswith('authors') for message in regressions))
+
+
+class QueryPlanTestCase(APITestCase):
+    """
+    Test cases for the composite indexes and the query plan check.
+    
+    Tests:
+    - Filters and orderings use the new indexes
+    - Full scans and temporary sorts are detected in EXPLAIN output
+    - The check_query_plans command reports every combination
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        author = Author.objects.create(name='Plan Author')
+        for i in range(20):
+            Book.objects.create(title=f'Plan {i}', publication_year=1990 + i, author=author)
+            
+    def get_result(self, results, filter_name, ordering):
+        return next(r for r in results if r['filter'] == filter_name and r['ordering'] == ordering)
+        
+    def test_book_plans_use_indexes(self):
+        """Test that year and title filters are answered from the composite indexes."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output differs per backend')
+        results = check_view(BookListView)
+        
+        year = self.get_result(results, 'publication_year', 'publication_year')
+        self.assertIn('book_year_id_idx', year['plan'])
+        self.assertFalse(year['full_scans'] or year['temp_sort'])
+        title = self.get_result(results, 'title_exact', 'title')
+        self.assertIn('book_title_id_idx', title['plan'])
+        self.assertFalse(self.get_result(results, 'no filter', 'title')['full_scans'])
+        
+    def test_author_name_ordering_uses_snapshot_index(self):
+        """Test that ordering by author name reads the (author_name, id) index."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output differs per backend')
+        results = check_view(BookListView)
+        
+        for ordering in ('author__name', '-author__name'):
+            result = self.get_result(results, 'no filter', ordering)
+            self.assertIn('book_author_name_id_idx', result['plan'])
+            self.assertFalse(result['full_scans'] or result['temp_sort'])
+            
+    def test_range_scans_in_order_expected(self):
+        """Test that book count ranges walked in id order are reported as expected."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output differs per backend')
+        results = check_view(AuthorListView)
+        
+        for name in ('book_count_min', 'book_count_max'):
+            result = self.get_result(results, name, 'id')
+            self.assertEqual(result['expected'], 'range walked in order')
+        self.assertFalse([r for r in results if r['full_scans'] and not r['expected']])
+        
+    def test_author_name_ordering_results(self):
+        """Test that page and keyset ordering by author name follow the snapshot."""
+        other = Author.objects.create(name='Another Author')
+        Book.objects.create(title='Other Plan', publication_year=2000, author=other)
+        url = reverse('book-list')
+        
+        response = self.client.get(url, {'ordering': 'author__name', 'page_size': 1})
+        self.assertEqual(response.data['results'][0]['title'], 'Other Plan')
+        
+        response = self.client.get(url, {'ordering': '-author__name', 'page_size': 20, 'pagination': 'cursor'})
+        self.assertEqual(response.data['results'][-1]['title'], 'Plan 0')
+        response = self.client.get(response.data['next'])
+        self.assertEqual([book['title'] for book in response.data['results']], ['Other Plan'])
+        
+    def test_find_problems(self):
+        """Test EXPLAIN parsing for SQLite and PostgreSQL."""
+        self.assertEqual(find_problems('sqlite', '2 0 0 SCAN api_book'), (['api_book'], False))
+        self.assertEqual(
+            find_problems('sqlite', '3 0 0 SCAN api_book USING INDEX book_title_id_idx\n'
+                                    '9 0 0 SCAN api_book_fts VIRTUAL TABLE INDEX 0:M1'),
+            ([], False),
+        )
+        self.assertEqual(
+            find_problems('sqlite', '5 0 0 SEARCH api_book USING INDEX x (a=?)\n'
+                                    '9 0 0 USE TEMP B-TREE FOR ORDER BY'),
+            ([], True),
+        )
+        self.assertEqual(find_problems('postgresql', 'Seq Scan on api_author  (cost=0.00..1.00)'),
+                         (['api_author'], False))
+        
+    def test_command_reports_every_combination(self):
+        """Test the check_query_plans command output."""
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        output = out.getvalue()
+        
+        filters = len(BookFilter.base_filters) + 1
+        self.assertIn(f'books ({filters * len(BookListView.ordering_fields) * 2} combinations)', output)
+        self.assertIn('authors (', output)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class ProfilingMiddlewareTestCase(APITestCase):
+    """
+    Test cases for the request profiling middleware.
+    
+    Tests:
+    - Server-Timing header with query count and timings
+    - Structured log line per request
+    - Slow requests are sampled with their SQL
+    - Statement parameters and token keys are left out of slow samples
+    - Non-API paths and the disabled setting are skipped
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        author = Author.objects.create(name='Profiled Author')
+        for i in range(3):
+            Book.objects.create(title=f'Profiled {i}', publication_year=2000 + i, author=author)
+            
+        self.client = APIClient()
+        
+    def parse_server_timing(self, header):
+        metrics = {}
+        for entry in header.split(', '):
+            name, *params = entry.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+        
+    def test_server_timing_header(self):
+        """Test that the header reports queries, db, serialize, render and total time."""
+        response = self.client.get(reverse('book-list'))
+        metrics = self.parse_server_timing(response['Server-Timing'])
+        
+        self.assertEqual(set(metrics), {'db', 'serialize', 'render', 'app', 'total'})
+        self.assertEqual(metrics['db']['desc'], '"2 queries"')
+        self.assertGreater(float(metrics['serialize']['dur']), 0)
+        self.assertGreater(float(metrics['render']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']), float(metrics['db']['dur']))
+        
+    def test_structured_log_line(self):
+        """Test that every profiled request logs one JSON line."""
+        with self.assertLogs('api.profiling', level='INFO') as logs:
+            self.client.get(reverse('author-list'))
+        record = json.loads(logs.records[0].getMessage())
+        
+        self.assertEqual(record['view'], 'author-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 3)
+        
+    @override_settings(API_PROFILING={'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 1.0})
+    def test_slow_request_sampled_with_sql(self):
+        """Test that slow requests are logged with their statements but no parameters."""
+        with self.assertLogs('api.profiling.slow', level='INFO') as logs:
+            self.client.get(reverse('book-list'), {'title': 'profiled'})
+        sample = json.loads(logs.records[0].getMessage())
+        
+        self.assertEqual(sample['query_string'], 'title=profiled')
+        self.assertEqual(len(sample['sql']), 2)
+        self.assertIn('SELECT', sample['sql'][-1]['sql'])
+        self.assertNotIn('params', sample['sql'][-1])
+        
+    @override_settings(API_PROFILING={'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 1.0, 'SLOW_LOG_PARAMS': True})
+    def test_slow_request_params_opt_in(self):
+        """Test that statement parameters are only logged when enabled."""
+        with self.assertLogs('api.profiling.slow', level='INFO') as logs:
+            self.client.get(reverse('book-list'), {'title': 'profiled'})
+        sample = json.loads(logs.records[0].getMessage())
+        
+        self.assertIn("'%profiled%'", sample['sql'][-1]['params'])
+        
+    @override_settings(API_PROFILING={'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 1.0})
+    def test_slow_samples_omit_token_keys(self):
+        """Test that token keys never appear in a slow sample."""
+        User.objects.create_user(username='profiled', password='profiledpass123')
+        with self.assertLogs('api.profiling.slow', level='INFO') as logs:
+            response = self.client.post(
+                reverse('api_token_auth'),
+                {'username': 'profiled', 'password': 'profiledpass123'},
+                format='json',
+            )
+            key = response.data['token']
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+            self.client.post(
+                reverse('book-create'),
+                {'title': 'Token Book', 'publication_year': 2001, 'author': Author.objects.get().pk},
+                format='json',
+            )
+            
+        self.assertEqual(len(logs.records), 2)
+        for record in logs.records:
+            self.assertNotIn(key, record.getMessage())
+            
+    def test_slow_samples_opt_in(self):
+        """Test that the logging config emits neither slow samples nor profile lines by default."""
+        self.assertFalse(logging.getLogger('api.profiling.slow').isEnabledFor(logging.INFO))
+        self.assertFalse(logging.getLogger('api.profiling').isEnabledFor(logging.INFO))
+        
+    @override_settings(API_PROFILING={'SLOW_REQUEST_MS': 0, 'SLOW_SAMPLE_RATE': 0.0})
+    def test_slow_sampling_rate(self):
+        """Test that a zero sample rate logs no slow samples."""
+        with self.assertNoLogs('api.profiling.slow', level='INFO'):
+            with self.assertLogs('api.profiling', level='INFO'):
+                self.client.get(reverse('book-list'))
+                
+    def test_skips_non_api_paths(self):
+        """Test that only API paths are profiled."""
+        response = self.client.get('/admin/login/')
+        self.assertNotIn('Server-Timing', response)
+        
+    @override_settings(API_PROFILING={'ENABLED': False})
+    def test_disabled(self):
+        """Test that the middleware can be switched off."""
+        response = self.client.get(reverse('book-list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(API_TOKEN_CACHE={'ENABLED': True, 'MAX_SIZE': 100, 'TIMEOUT': 60})
+class TokenCacheTestCase(APITestCase):
+    """
+    Test cases for CachedTokenAuthentication.
+    
+    Tests:
+    - Repeat requests with a token skip the token/user query
+    - Rotation, token deletion and deactivation revoke cached tokens
+    - The cache is bounded and can be disabled
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        token_cache.clear()
+        self.user = User.objects.create_user(username='cached', password='cached123', is_staff=True)
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('cache-stats')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        
+    def test_repeat_requests_skip_query(self):
+        """Test that the second request is authenticated without a query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+            
+    def test_rotation_revokes_old_token(self):
+        """Test that rotating through CustomObtainAuthToken invalidates the cached token."""
+        self.client.get(self.url)
+        response = APIClient().post(reverse('api_token_auth'), {
+            'username': 'cached', 'password': 'cached123', 'rotate': True,
+        }, format='json')
+        new_key = response.data['token']
+        
+        self.assertNotEqual(new_key, self.token.key)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {new_key}')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        
+    def test_token_without_rotation_is_reused(self):
+        """Test that obtaining a token without rotate returns the existing one."""
+        response = APIClient().post(reverse('api_token_auth'), {
+            'username': 'cached', 'password': 'cached123',
+        }, format='json')
+        self.assertEqual(response.data['token'], self.token.key)
+        
+    def test_deactivated_user_rejected(self):
+        """Test that deactivating a user revokes their cached token."""
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_user_changes_refresh_cache(self):
+        """Test that other user changes are picked up on the next request."""
+        self.client.get(self.url)
+        self.user.is_staff = False
+        self.user.save()
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        
+    def test_deleted_token_rejected(self):
+        """Test that deleting a token revokes it."""
+        self.client.get(self.url)
+        self.token.delete()
+        
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    @override_settings(API_TOKEN_CACHE={'MAX_SIZE': 1})
+    def test_cache_is_bounded(self):
+        """Test that the least recently used token is evicted."""
+        other = User.objects.create_user(username='other', password='other123', is_staff=True)
+        other_token = Token.objects.create(user=other)
+        self.client.get(self.url)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        self.client.get(self.url)
+        
+        self.assertEqual(len(token_cache), 1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+            
+    @override_settings(API_TOKEN_CACHE={'ENABLED': False})
+    def test_disabled(self):
+        """Test that a disabled cache queries on every request."""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+            
+    def test_benchmark_command(self):
+        """Test that the benchmark reports the query reduction."""
+        # The command builds its own database; only the measurement is run here
+        results = TokenBenchmarkCommand().measure(self.client, {'requests': 5, 'path': self.url}, enabled=True)
+        
+        self.assertEqual(results['status'], 200)
+        self.assertLess(results['queries_per_request'], 1)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class AsyncViewsTestCase(APITestCase):
+    """
+    Test cases for the async read views.
+    
+    Tests:
+    - Lists match the sync views for filters, search, ordering and pagination
+    - Detail views match and return 404 for missing objects
+    - Invalid parameters return the same errors as the sync views
+    - The views also run under AsyncClient
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Async Author')
+        self.other = Author.objects.create(name='Other Writer')
+        for i in range(15):
+            Book.objects.create(
+                title=f'Async Book {i:02d}',
+                publication_year=1990 + i,
+                author=self.author if i % 2 else self.other,
+            )
+            
+    def assertSameAsSync(self, path, params=None):
+        """Request the sync and async versions of ``path`` and compare them."""
+        sync = self.client.get(f'/api/{path}', params)
+        response = self.client.get(f'/api/async/{path}', params)
+        
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            response.content.decode().replace('/api/async/', '/api/'),
+            json.dumps(sync.json(), separators=(',', ':')),
+        )
+        return response
+        
+    def test_book_list_parity(self):
+        """Test book list variations against BookListView."""
+        for params in [
+            {},
+            {'page': 2},
+            {'page_size': 5},
+            {'publication_year_min': 1995, 'publication_year_max': 2000},
+            {'author_name': 'writer'},
+            {'search': 'Async'},
+            {'ordering': '-publication_year'},
+            {'fields': 'id,title'},
+            {'pagination': 'cursor', 'page_size': 4},
+            {'pagination': 'cursor', 'ordering': 'author__name'},
+        ]:
+            with self.subTest(params=params):
+                self.assertSameAsSync('books/', params)
+                
+    def test_cursor_pages_parity(self):
+        """Test that following async cursor links walks the same pages."""
+        params = {'pagination': 'cursor', 'page_size': 4, 'ordering': '-publication_year'}
+        response = self.assertSameAsSync('books/', params)
+        while response.json()['next']:
+            next_url = response.json()['next']
+            response = self.client.get(next_url)
+            sync = self.client.get(next_url.replace('/api/async/', '/api/'))
+            self.assertEqual(response.json()['results'], sync.json()['results'])
+            
+    def test_author_list_parity(self):
+        """Test author list variations against AuthorListView."""
+        for params in [{}, {'fields': 'id,name'}, {'books_limit': 2}, {'ordering': '-book_count'}]:
+            with self.subTest(params=params):
+                self.assertSameAsSync('authors/', params)
+                
+    def test_detail_parity(self):
+        """Test book and author detail views."""
+        book = Book.objects.first()
+        self.assertSameAsSync(f'books/{book.pk}/')
+        self.assertSameAsSync(f'authors/{self.author.pk}/')
+        self.assertSameAsSync(f'authors/{self.author.pk}/', {'fields': 'name,books'})
+        
+    def test_errors(self):
+        """Test 404s and invalid parameters."""
+        self.assertEqual(self.assertSameAsSync('books/9999/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.assertSameAsSync('authors/9999/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.assertSameAsSync('books/', {'page': 99}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.assertSameAsSync('books/', {'fields': 'nope'}).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        
+    def test_read_only(self):
+        """Test that the async views only accept reads."""
+        response = self.client.post('/api/async/books/', {'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        
+    async def test_async_client(self):
+        """Test the views end to end on the event loop."""
+        client = AsyncClient()
+        response = await client.get('/api/async/books/', {'publication_year': 1995})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['publication_year'] for book in response.json()['results']], [1995])
+        self.assertIn('Server-Timing', response)
+
+
+class CatalogStatsTestCase(APITestCase):
+    """
+    Test cases for the /api/stats/ endpoint and its summary table.
+    
+    Tests:
+    - Statistics follow creates, year changes, deletes and bulk writes
+    - The endpoint reads a constant number of queries
+    - Parameter validation
+    - Rebuild command
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(username='stats', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.author1 = Author.objects.create(name='Prolific Author')
+        self.author2 = Author.objects.create(name='Occasional Author')
+        self.books = [
+            Book.objects.create(title=f'Stat {i}', publication_year=1990 + i % 2, author=self.author1)
+            for i in range(3)
+        ]
+        self.url = reverse('catalog-stats')
+        self.client = APIClient()
+        
+    def stored(self):
+        """Return the non-zero stored statistics."""
+        return {
+            (dimension, value): count
+            for dimension, value, count in CatalogStat.objects.values_list('dimension', 'value', 'count')
+            if count
+        }
+        
+    def assertInSync(self):
+        actual = {key: count for key, count in compute_stats().items() if count}
+        self.assertEqual(self.stored(), actual)
+        
+    def test_endpoint(self):
+        """Test the statistics returned by the endpoint."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals'], {'books': 3, 'authors': 2, 'publication_years': 2})
+        self.assertEqual(response.data['books_per_year'], [
+            {'publication_year': 1990, 'books': 2},
+            {'publication_year': 1991, 'books': 1},
+        ])
+        self.assertEqual(response.data['top_authors'], [
+            {'id': self.author1.pk, 'name': 'Prolific Author', 'book_count': 3},
+        ])
+        
+    def test_constant_queries(self):
+        """Test that the endpoint cost does not depend on the catalog size."""
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        Book.objects.bulk_create([
+            Book(title=f'More {i}', publication_year=2000, author=self.author2) for i in range(50)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+            
+        self.assertEqual(len(small.captured_queries), 2)
+        self.assertEqual(len(large.captured_queries), 2)
+        self.assertFalse(any('api_book' in query['sql'] for query in large.captured_queries))
+        
+    def test_incremental_updates(self):
+        """Test single-object writes, including a year change and cascades."""
+        book = self.books[0]
+        book.publication_year = 2005
+        book.save()
+        self.assertInSync()
+        
+        self.books[1].delete()
+        self.assertInSync()
+        
+        Author.objects.create(name='New Author')
+        self.author1.delete()
+        self.assertInSync()
+        self.assertEqual(self.client.get(self.url).data['totals']['books'], 0)
+        
+    def test_bulk_writes(self):
+        """Test that bulk create, update and delete keep the statistics in sync."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = reverse('book-bulk')
+        response = self.client.post(url, [
+            {'title': f'Bulk {i}', 'publication_year': 1980 + i, 'author': self.author2.pk}
+            for i in range(4)
+        ], format='json')
+        self.assertInSync()
+        
+        ids = [book['id'] for book in response.data['data']]
+        self.client.patch(url, [{'id': pk, 'publication_year': 1990} for pk in ids[:2]], format='json')
+        self.assertInSync()
+        
+        self.client.delete(url, ids[2:], format='json')
+        self.assertInSync()
+        
+    def test_authors_limit(self):
+        """Test the authors_limit parameter."""
+        Book.objects.create(title='Single', publication_year=2000, author=self.author2)
+        response = self.client.get(self.url, {'authors_limit': 1})
+        self.assertEqual([author['name'] for author in response.data['top_authors']], ['Prolific Author'])
+        
+        for value in ['abc', '-1', '101']:
+            with self.subTest(value=value):
+                response = self.client.get(self.url, {'authors_limit': value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                
+    def test_rebuild_command(self):
+        """Test that the rebuild command repairs drifted statistics."""
+        CatalogStat.objects.filter(dimension=CatalogStat.BOOKS).update(count=99)
+        CatalogStat.objects.filter(dimension=CatalogStat.YEAR, value=1991).delete()
+        CatalogStat.objects.create(dimension=CatalogStat.YEAR, value=1700, count=4)
+        out = StringIO()
+        call_command('rebuild_catalog_stats', stdout=out)
+        
+        self.assertIn('Fixed 3 catalog statistics', out.getvalue())
+        self.assertInSync()
+
+
+@override_settings(
+    API_RESPONSE_CACHE={'ENABLED': False},
+    API_COUNT_ESTIMATES={'THRESHOLD': 5, 'TIMEOUT': 30, 'SAMPLE_WINDOWS': 2, 'SAMPLE_SIZE': 6},
+)
+class CountEstimateTestCase(APITestCase):
+    """
+    Test cases for exact and estimated page-number counts.
+    
+    Tests:
+    - Small results are counted exactly, large ones estimated
+    - Pages, next links and 404s do not depend on the estimate
+    - Counts are cached per filter and invalidated by writes
+    - Conditional GETs keep working for estimated lists
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Estimated Author')
+        for i in range(40):
+            Book.objects.create(title=f'Book {i:02d}', publication_year=2000 + i % 2, author=self.author)
+        self.url = reverse('book-list')
+        
+    def test_exact_below_threshold(self):
+        """Test that a small filtered list reports an exact count."""
+        response = self.client.get(self.url, {'title': 'Book 01'})
+        
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['count_type'], 'exact')
+        
+    def test_estimate_above_threshold(self):
+        """Test that a large list reports an estimate from the sampled id ranges."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count_type'], 'estimate')
+        self.assertEqual(response.data['count'], 40)
+        
+        response = self.client.get(self.url, {'publication_year': 2001})
+        self.assertEqual(response.data['count_type'], 'estimate')
+        self.assertAlmostEqual(response.data['count'], 20, delta=4)
+        
+    def test_paging_with_estimate(self):
+        """Test that next links follow the rows, not the estimate."""
+        titles, url = [], self.url + '?page_size=15'
+        while url:
+            response = self.client.get(url)
+            titles.extend(book['title'] for book in response.data['results'])
+            url = response.data['next']
+            
+        self.assertEqual(titles, sorted(f'Book {i:02d}' for i in range(40)))
+        self.assertEqual(self.client.get(self.url, {'page': 9}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url, {'page': 'x'}).status_code, status.HTTP_404_NOT_FOUND)
+        
+    def test_count_cached_per_filter(self):
+        """Test that repeated pages reuse the count and writes invalidate it."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'page': 2, 'ordering': '-title'})
+        self.assertEqual(response.data['count_type'], 'estimate')
+        self.assertEqual(len(queries.captured_queries), 1)
+        
+        Book.objects.filter(publication_year=2000).delete()
+        response = self.client.get(self.url)
+        self.assertEqual((response.data['count'], response.data['count_type']), (20, 'estimate'))
+        
+    def test_conditional_get(self):
+        """Test that estimated lists still answer If-None-Match."""
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        
+        Book.objects.create(title='New', publication_year=2000, author=self.author)
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+        
+    def test_async_view(self):
+        """Test that the async list reports the same count."""
+        response = self.client.get('/api/async/books/', {'page': 2})
+        
+        self.assertEqual(response.json()['count_type'], 'estimate')
+        self.assertEqual(len(response.json()['results']), 10)
+        
+    @override_settings(API_COUNT_ESTIMATES={'ENABLED': False})
+    def test_disabled(self):
+        """Test that counts are always exact when estimates are disabled."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual((response.data['count'], response.data['count_type']), (40, 'exact'))
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class BatchLookupTestCase(APITestCase):
+    """
+    Test cases for ?ids= batch lookups on the list views.
+    
+    Tests:
+    - Objects come back in the requested order with missing ids reported
+    - One query for books, one plus the books prefetch for authors
+    - Sparse fieldsets apply; filters and pagination do not
+    - Invalid, empty and oversized id lists are rejected
+    - ETags and the async views
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Batch Author')
+        self.other = Author.objects.create(name='Other Author')
+        self.books = [
+            Book.objects.create(title=f'Batch {i}', publication_year=2000 + i, author=self.author)
+            for i in range(5)
+        ]
+        self.url = reverse('book-list')
+        
+    def test_books_in_requested_order(self):
+        """Test that books come back in request order, with missing ids listed."""
+        ids = [self.books[3].pk, 999, self.books[0].pk, self.books[3].pk]
+        with self.assertNumQueries(2):  # ETag aggregate + in_bulk
+            response = self.client.get(self.url, {'ids': ','.join(map(str, ids))})
+            
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['id'] for book in response.data['results']], [self.books[3].pk, self.books[0].pk])
+        self.assertEqual(response.data['missing'], [999])
+        self.assertEqual(response.data['results'][0], BookSerializer(self.books[3]).data)
+        
+    def test_filters_and_pagination_ignored(self):
+        """Test that filter and page parameters do not narrow a batch lookup."""
+        ids = ','.join(str(book.pk) for book in self.books)
+        response = self.client.get(self.url, {'ids': ids, 'publication_year': 2001, 'page_size': 2})
+        
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertNotIn('count', response.data)
+        
+    def test_sparse_fields(self):
+        """Test that fields applies to batch lookups."""
+        response = self.client.get(self.url, {'ids': self.books[1].pk, 'fields': 'id,title'})
+        self.assertEqual(response.data['results'], [{'id': self.books[1].pk, 'title': 'Batch 1'}])
+        
+    def test_authors(self):
+        """Test author lookups with nested books in one prefetch."""
+        url = reverse('author-list')
+        with self.assertNumQueries(3):  # ETag aggregate + in_bulk + books prefetch
+            response = self.client.get(url, {'ids': f'{self.other.pk},{self.author.pk}'})
+            
+        self.assertEqual([author['name'] for author in response.data['results']], ['Other Author', 'Batch Author'])
+        self.assertEqual(len(response.data['results'][1]['books']), 5)
+        self.assertEqual(response.data['missing'], [])
+        
+    def test_invalid_ids(self):
+        """Test that malformed, empty and oversized id lists are rejected."""
+        too_many = ','.join(str(i) for i in range(1, 102))
+        for value in ['1,x', '0', '-3', ',', '1,²', '٣', '9' * 20, too_many]:
+            with self.subTest(value=value[:10]):
+                response = self.client.get(self.url, {'ids': value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ids', response.data)
+                
+    def test_etag_covers_requested_ids(self):
+        """Test that a change to a requested book changes the ETag."""
+        params = {'ids': f'{self.books[0].pk},{self.books[1].pk}'}
+        etag = self.client.get(self.url, params)['ETag']
+        self.assertEqual(
+            self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        
+        self.books[1].title = 'Renamed'
+        self.books[1].save()
+        self.assertNotEqual(self.client.get(self.url, params)['ETag'], etag)
+        
+    def test_async_views(self):
+        """Test that the async list views answer batch lookups the same way."""
+        params = {'ids': f'{self.books[2].pk},999'}
+        response = self.client.get('/api/async/books/', params)
+        
+        self.assertEqual(response.json(), json.loads(json.dumps(self.client.get(self.url, params).data)))
+        for value in ['x', '1,²']:
+            response = self.client.get('/api/async/authors/', {'ids': value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), {'ids': [f'Invalid id: {value[-1]}']})
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class CompressionTestCase(APITestCase):
+    """
+    Test cases for negotiated response compression.
+    
+    Tests:
+    - Accept-Encoding negotiation with q-values, wildcards and identity
+    - gzip bodies decompress to the uncompressed body (regular and streamed)
+    - Small bodies and clients without Accept-Encoding get identity bodies
+    - Brotli is only offered when the brotli package is installed
+    - ETags become weak and conditional GETs still match
+    - HTML pages and paths outside the API are never compressed
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Compressed Author')
+        for i in range(60):
+            Book.objects.create(title=f'Compressed Book {i:02d}', publication_year=1950 + i, author=self.author)
+        self.url = reverse('book-list')
+        
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+        
+    def test_negotiation(self):
+        """Test that the preferred acceptable encoding is chosen."""
+        supported = ['br', 'gzip']
+        for header, expected in [
+            ('gzip', 'gzip'),
+            ('gzip, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('*', 'br'),
+            ('br;q=0, *;q=0.1', 'gzip'),
+            ('gzip;q=0', None),
+            ('identity', None),
+            ('', None),
+            ('gzip;q=oops', None),
+        ]:
+            with self.subTest(header=header):
+                self.assertEqual(negotiate_encoding(header, supported), expected)
+                
+    def test_gzip_page(self):
+        """Test that a regular page is gzipped and decompresses to the same body."""
+        params = {'page_size': 20}
+        plain = self.client.get(self.url, params)
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        
+    def test_gzip_streamed_page(self):
+        """Test that a streamed page is gzipped chunk by chunk."""
+        params = {'page_size': 100}
+        plain = self.body(self.client.get(self.url, params))
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response)
+        self.assertEqual(gzip.decompress(self.body(response)), plain)
+        
+    def test_identity(self):
+        """Test that bodies are not compressed without a usable Accept-Encoding."""
+        for header in ['', 'identity', 'gzip;q=0']:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, {'page_size': 20}, HTTP_ACCEPT_ENCODING=header)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                
+    def test_small_body(self):
+        """Test that bodies below MIN_SIZE are sent as is."""
+        params = {'page_size': 3}
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), 1024)
+        self.assertNotIn('Content-Encoding', response)
+        
+        with override_settings(API_COMPRESSION={'MIN_SIZE': 100}):
+            response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        
+    def test_brotli_unavailable(self):
+        """Test that br is not chosen when no Brotli module is installed."""
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.client.get(self.url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='br')
+            self.assertNotIn('Content-Encoding', response)
+            response = self.client.get(self.url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='br, gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            
+    def test_html_not_compressed(self):
+        """Test that HTML pages with CSRF tokens are sent uncompressed."""
+        for url, params in [(reverse('admin:login'), {}), (self.url, {'page_size': 20, 'format': 'api'})]:
+            with self.subTest(url=url):
+                response = self.client.get(url, params, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response['Content-Type'].startswith('text/html'))
+                self.assertNotIn('Content-Encoding', response)
+                
+    def test_path_prefixes(self):
+        """Test that only responses under PATH_PREFIXES are compressed."""
+        with override_settings(API_COMPRESSION={'PATH_PREFIXES': ('/other/',)}):
+            response = self.client.get(self.url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        
+    @override_settings(API_COMPRESSION={'ENABLED': False})
+    def test_disabled(self):
+        """Test that compression can be turned off."""
+        response = self.client.get(self.url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        
+    def test_weak_etag(self):
+        """Test that compressed responses carry a weak ETag that still validates."""
+        params = {'page_size': 20}
+        etag = self.client.get(self.url, params)['ETag']
+        response = self.client.get(self.url, params, HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['ETag'], f'W/{etag}')
+        for validator in [etag, response['ETag']]:
+            with self.subTest(validator=validator):
+                response = self.client.get(
+                    self.url, params, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=validator
+                )
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+class StreamingJSONTestCase(APITestCase):
+    """
+    Test cases for streamed JSON list responses.
+    
+    Tests:
+    - iter_render() output is byte-identical to JSONRenderer.render()
+    - Lists with MIN_ITEMS or more results are streamed in chunks
+    - Small pages, the browsable API and errors are rendered as usual
+    - Headers (ETag, X-Cache) are kept on streamed responses
+    - The async list views stream as well
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.authors = [Author.objects.create(name=f'Streamed Author {i:02d}') for i in range(60)]
+        for i, author in enumerate(self.authors):
+            for j in range(3):
+                Book.objects.create(title=f'Streamed Book {i}-{j}', publication_year=1900 + i, author=author)
+        self.url = reverse('author-list')
+        
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+        
+    def test_renderer_parity(self):
+        """Test that the chunks join to exactly what JSONRenderer produces."""
+        data = {
+            'count': 2,
+            'next': None,
+            'results': [{'title': 'Line\u2028Separator', 'name': 'Émile'}, {'nested': [1, 2.5, None, True]}],
+            'empty': [],
+        }
+        for value in [data, data['results'], [], 'scalar', {1: 'int key'}]:
+            with self.subTest(value=value):
+                self.assertEqual(
+                    b''.join(StreamingJSONRenderer().iter_render(value)),
+                    JSONRenderer().render(value),
+                )
+        indented = b''.join(StreamingJSONRenderer().iter_render(data, 'application/json; indent=4'))
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=4'))
+        
+    @override_settings(API_STREAMING_JSON={'CHUNK_SIZE': 256})
+    def test_large_page_streamed(self):
+        """Test that a page_size=100 author page is streamed in several chunks."""
+        response = self.client.get(self.url, {'page_size': 100})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('ETag', response)
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 10)
+        
+        with override_settings(API_STREAMING_JSON={'ENABLED': False}):
+            plain = self.client.get(self.url, {'page_size': 100})
+        self.assertFalse(plain.streaming)
+        self.assertEqual(b''.join(chunks), plain.content)
+        self.assertEqual(len(json.loads(plain.content)['results']), 60)
+        
+    def test_small_page_not_streamed(self):
+        """Test that pages below MIN_ITEMS, the browsable API and errors are not streamed."""
+        self.assertFalse(self.client.get(self.url, {'page_size': 49}).streaming)
+        self.assertFalse(self.client.get(self.url, {'page_size': 100, 'format': 'api'}).streaming)
+        self.assertFalse(self.client.get(self.url, {'page_size': 100, 'book_count_min': 'x'}).streaming)
+        
+    def test_cached_response_streamed(self):
+        """Test that a cache hit is streamed with the same body."""
+        with override_settings(API_RESPONSE_CACHE={'ENABLED': True}):
+            get_response_cache().clear()
+            first = self.client.get(self.url, {'page_size': 100})
+            second = self.client.get(self.url, {'page_size': 100})
+            
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertTrue(second.streaming)
+        self.assertEqual(self.body(first), self.body(second))
+        
+    async def test_async_view_streamed(self):
+        """Test that the async author list streams the same body as the sync view."""
+        client = AsyncClient()
+        response = await client.get('/api/async/authors/', {'page_size': 100})
+        
+        self.assertTrue(response.streaming)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(json.loads(body)['results']), 60)
+
+
+THROTTLE_RATES = {'book-write': '3/min', 'book-bulk': '3/min', 'auth-token': '2/min'}
+
+
+@override_settings(API_THROTTLING={'ENABLED': True, 'BACKEND': 'local', 'RATES': THROTTLE_RATES})
+class ThrottlingTestCase(APITestCase):
+    """
+    Test cases for sliding-window rate limiting of the write endpoints.
+    
+    Tests:
+    - Rate parsing, the sliding-window estimate and Retry-After math
+    - Writes beyond the rate get 429 with Retry-After, per user and scope
+    - Rejected requests are not counted; the window slides
+    - The token endpoint is limited per client address, X-Forwarded-For is not trusted
+    - The shared-cache backend enforces the same limits
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        local_store.clear()
+        caches['default'].clear()
+        self.now = 60 * 16667 + 20.0  # 20 seconds into a minute window
+        patcher = mock.patch.object(SlidingWindowThrottle, 'timer', staticmethod(lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='throttled', password='throttled123')
+        self.other = User.objects.create_user(username='unthrottled', password='unthrottled123')
+        self.author = Author.objects.create(name='Throttle Author')
+        self.url = reverse('book-create')
+        
+    def create(self, user, title='Throttled'):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.url, {'title': title, 'publication_year': 2000, 'author': self.author.pk})
+        
+    def test_parse_rate(self):
+        """Test valid and invalid rate strings."""
+        self.assertEqual(parse_rate('120/min'), (120, 60))
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+        self.assertEqual(parse_rate('1000/hour'), (1000, 3600))
+        for rate in ['fast', '10/fortnight', 'x/min', None]:
+            with self.subTest(rate=rate):
+                with self.assertRaises(ImproperlyConfigured):
+                    parse_rate(rate)
+                    
+    def test_retry_after(self):
+        """Test the wait until the estimate leaves room for one more request."""
+        # 10 s into the window, 6 previous + 2 current, limit 5: the previous
+        # weight must drop to 2 (1/3 of 6), i.e. 2/3 into the window
+        self.assertAlmostEqual(retry_after(6, 2, 5, 1010.0 - 1010.0 % 60 + 10, 60), 30.0)
+        # Current window full: wait for the next window plus 1 - 4/5 of it
+        self.assertAlmostEqual(retry_after(0, 5, 5, 60 * 100 + 15, 60), 45 + 12)
+        
+    def test_local_store_windows(self):
+        """Test that counters roll into the previous window and stale ones are pruned."""
+        store = LocalWindowStore()
+        for _ in range(3):
+            store.hit('a', 100.0, 60)
+        self.assertEqual(store.hit('a', 130.0, 60), (3, 1))
+        self.assertEqual(store.hit('a', 250.0, 60), (0, 1))
+        store.hit('b', 250.0, 60)
+        store.prune(600.0)
+        self.assertEqual(store.hit('a', 600.0, 60, max_keys=1), (0, 1))
+        
+    def test_limit_per_user(self):
+        """Test that the fourth write in a minute gets 429 with Retry-After."""
+        for i in range(3):
+            self.assertEqual(self.create(self.user).status_code, status.HTTP_201_CREATED)
+        response = self.create(self.user)
+        
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(int(response['Retry-After']), 60 - 20 + 20)  # next window, 1 - 2/3 of it
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(self.create(self.other).status_code, status.HTTP_201_CREATED)
+        
+    def test_scope_shared_by_write_views(self):
+        """Test that create, update and delete share the 'book-write' scope."""
+        self.create(self.user)
+        self.create(self.user)
+        book = Book.objects.first()
+        response = self.client.patch(reverse('book-update', kwargs={'pk': book.pk}), {'title': 'Patched'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.delete(reverse('book-delete', kwargs={'pk': book.pk}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # The bulk endpoint has its own scope
+        self.assertNotEqual(
+            self.client.post(reverse('book-bulk'), [], format='json').status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+        
+    def test_window_slides(self):
+        """Test that rejected requests are not counted and capacity returns gradually."""
+        for _ in range(3):
+            self.create(self.user)
+        for _ in range(5):
+            self.assertEqual(self.create(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            
+        self.now += 60  # Same point of the next window: estimate 3 * 2/3 = 2
+        self.assertEqual(self.create(self.user).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.create(self.user).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.now += 20  # Estimate 3 * 1/3 + 1 = 2
+        self.assertEqual(self.create(self.user).status_code, status.HTTP_201_CREATED)
+        
+    def test_token_endpoint_per_address(self):
+        """Test that token requests are limited per client address, failed ones included."""
+        url = reverse('api_token_auth')
+        credentials = {'username': 'throttled', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, credentials).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url, credentials).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post(url, {'username': 'throttled', 'password': 'throttled123'},
+                                    REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+    def test_token_endpoint_ignores_forwarded_for(self):
+        """Test that a spoofed X-Forwarded-For does not reset the token limit."""
+        url = reverse('api_token_auth')
+        credentials = {'username': 'throttled', 'password': 'wrong'}
+        statuses = [
+            self.client.post(url, credentials, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [400, 400, 429])
+        
+    def test_cache_backend(self):
+        """Test that the shared-cache backend enforces the same limit."""
+        with override_settings(API_THROTTLING={'BACKEND': 'cache', 'RATES': THROTTLE_RATES}):
+            statuses = [self.create(self.user).status_code for _ in range(4)]
+            self.now += 60
+            statuses.append(self.create(self.user).status_code)
+        self.assertEqual(statuses, [201, 201, 201, 429, 201])
+        
+    @override_settings(API_THROTTLING={'ENABLED': False, 'RATES': THROTTLE_RATES})
+    def test_disabled(self):
+        """Test that no request is rejected when throttling is off."""
+        statuses = {self.create(self.user).status_code for _ in range(5)}
+        self.assertEqual(statuses, {status.HTTP_201_CREATED})
+        
+    def test_read_views_not_throttled(self):
+        """Test that views without a throttle scope are never limited."""
+        self.client.force_authenticate(user=self.user)
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('book-list')).status_code, status.HTTP_200_OK)
+
+
+COALESCING = {'ENABLED': True, 'MAX_BATCH': 100, 'FLUSH_INTERVAL': 0.002, 'TIMEOUT': 10}
+
+
+@override_settings(API_WRITE_COALESCING=COALESCING, API_THROTTLING={'ENABLED': False})
+class WriteQueueTestCase(APITransactionTestCase):
+    """
+    Test cases for the write coalescing queue.
+    
+    Tests:
+    - Queued writes are committed together, at most MAX_BATCH per transaction
+    - A failing write is rolled back alone and raises in its caller
+    - Create, update and delete views commit through the writer thread
+    - Writes inside a transaction, or with coalescing off, run inline
+    - A write that is not committed in time raises WriteQueueTimeout
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Queued Author')
+        self.user = User.objects.create_user(username='queued', password='queued123')
+        self.client.force_authenticate(user=self.user)
+        self.queue = WriteQueue()
+        self.addCleanup(self.queue.stop)
+        self.addCleanup(write_queue.stop)
+        
+    def enqueue(self, *funcs):
+        """Queue jobs before the writer starts, so they are drained together."""
+        jobs = [WriteJob(func, (), {}) for func in funcs]
+        for job in jobs:
+            self.queue._queue.put(job)
+        self.queue.start()
+        return [job.future for job in jobs]
+        
+    def create_book(self, title):
+        return lambda: Book.objects.create(title=title, publication_year=2000, author=self.author)
+        
+    def test_writes_share_a_transaction(self):
+        """Test that queued writes are committed in one batch."""
+        futures = self.enqueue(*(self.create_book(f'Queued {i}') for i in range(5)))
+        
+        self.assertEqual([future.result(5).title for future in futures], [f'Queued {i}' for i in range(5)])
+        self.assertEqual(self.queue.stats, {'batches': 1, 'writes': 5})
+        self.assertEqual(Book.objects.count(), 5)
+        
+    @override_settings(API_WRITE_COALESCING={**COALESCING, 'MAX_BATCH': 2})
+    def test_max_batch(self):
+        """Test that batches hold at most MAX_BATCH writes."""
+        futures = self.enqueue(*(self.create_book(f'Queued {i}') for i in range(5)))
+        for future in futures:
+            future.result(5)
+        self.assertEqual(self.queue.stats, {'batches': 3, 'writes': 5})
+        
+    def test_failing_write_isolated(self):
+        """Test that a failing write rolls back alone and raises in its caller."""
+        def duplicate():
+            Book.objects.create(title='Duplicate', publication_year=2000, author=self.author)
+            raise IntegrityError('duplicate')
+            
+        first, failing, last = self.enqueue(self.create_book('Kept 1'), duplicate, self.create_book('Kept 2'))
+        
+        first.result(5), last.result(5)
+        with self.assertRaises(IntegrityError):
+            failing.result(5)
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Kept 1', 'Kept 2'])
+        
+    def test_submit_from_threads(self):
+        """Test that concurrent submissions all commit and return their result."""
+        with ThreadPoolExecutor(8) as pool:
+            books = list(pool.map(lambda i: self.queue.submit(self.create_book(f'Thread {i}')), range(40)))
+        self.assertEqual(len({book.pk for book in books}), 40)
+        self.assertEqual(self.queue.stats['writes'], 40)
+        self.assertLessEqual(self.queue.stats['batches'], 40)
+        
+    def test_views_write_through_queue(self):
+        """Test that the write views commit through the writer thread."""
+        writes = write_queue.stats['writes']
+        response = self.client.post(reverse('book-create'), {
+            'title': 'Queued Create', 'publication_year': 2001, 'author': self.author.pk,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        book = Book.objects.get(pk=response.data['data']['id'])
+        
+        response = self.client.patch(reverse('book-update', kwargs={'pk': book.pk}), {'title': 'Queued Update'})
+        self.assertEqual(response.data['data']['title'], 'Queued Update')
+        response = self.client.post(reverse('book-create'), {'title': '', 'author': self.author.pk})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.delete(reverse('book-delete', kwargs={'pk': book.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        self.assertFalse(Book.objects.exists())
+        self.assertEqual(write_queue.stats['writes'] - writes, 3)
+        
+    def test_inline_writes(self):
+        """Test that writes inside a transaction or with coalescing off run inline."""
+        before = dict(write_queue.stats)
+        with transaction.atomic():
+            run_write(self.create_book('Inline'))
+        with override_settings(API_WRITE_COALESCING={'ENABLED': False}):
+            run_write(self.create_book('Direct'))
+        self.assertEqual(write_queue.stats, before)
+        self.assertEqual(Book.objects.count(), 2)
+        
+    @override_settings(API_WRITE_COALESCING={**COALESCING, 'TIMEOUT': 0.05})
+    def test_timeout(self):
+        """Test that a write not committed within TIMEOUT raises WriteQueueTimeout."""
+        with self.assertRaises(WriteQueueTimeout):
+            self.queue.submit(time.sleep, 0.3)
+
+
+class AuthorNameSnapshotTestCase(APITestCase):
+    """
+    Test cases for the Book.author_name snapshot and the scalable Book admin.
+    
+    Tests:
+    - __str__ reads the snapshot without querying the author
+    - The snapshot follows author changes, renames and bulk writes
+    - refresh_author_names repairs drifted snapshots
+    - The Book changelist query count does not grow with the page or author count
+    - Author filter choices are capped; the form uses the paginated autocomplete
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Snapshot Author')
+        self.other = Author.objects.create(name='Other Snapshot')
+        self.book = Book.objects.create(title='Snapshot Book', publication_year=2001, author=self.author)
+        self.admin = User.objects.create_superuser('snapshot-admin', 'admin@example.com', 'admin123')
+        
+    def test_str_without_author_query(self):
+        """Test that printing a book fetched without select_related runs no query."""
+        book = Book.objects.get(pk=self.book.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(book), 'Snapshot Book by Snapshot Author (2001)')
+            
+    def test_author_change(self):
+        """Test that reassigning a book (by id or instance) updates the snapshot."""
+        book = Book.objects.get(pk=self.book.pk)
+        book.author_id = self.other.pk
+        book.save()
+        self.assertEqual(Book.objects.get(pk=book.pk).author_name, 'Other Snapshot')
+        
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(reverse('book-update', kwargs={'pk': book.pk}), {'author': self.author.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.get(pk=book.pk).author_name, 'Snapshot Author')
+        
+    def test_author_rename(self):
+        """Test that renaming an author rewrites the snapshot of their books."""
+        self.author.name = 'Renamed Author'
+        self.author.save()
+        self.assertEqual(str(Book.objects.get(pk=self.book.pk)), 'Snapshot Book by Renamed Author (2001)')
+        
+    def test_bulk_writes(self):
+        """Test that bulk creates and updates write the snapshot."""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse('book-bulk'), [
+            {'title': 'Bulk Snapshot', 'publication_year': 2002, 'author': self.other.pk},
+        ], format='json')
+        self.assertEqual(Book.objects.get(title='Bulk Snapshot').author_name, 'Other Snapshot')
+        
+        self.client.patch(reverse('book-bulk'), [{'id': self.book.pk, 'author': self.other.pk}], format='json')
+        self.assertEqual(Book.objects.get(pk=self.book.pk).author_name, 'Other Snapshot')
+        
+    def test_refresh_author_names(self):
+        """Test that drifted snapshots are found and repaired."""
+        Book.objects.filter(pk=self.book.pk).update(author_name='Stale')
+        self.assertEqual(refresh_author_names(), 1)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).author_name, 'Snapshot Author')
+        self.assertEqual(refresh_author_names(), 0)
+        
+    def test_changelist_queries(self):
+        """Test that the changelist query count is independent of rows and authors."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:api_book_changelist')
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            
+        authors = Author.objects.bulk_create(Author(name=f'Many Author {i}') for i in range(60))
+        for i, author in enumerate(authors):
+            Book.objects.create(title=f'Many Book {i}', publication_year=1950 + i % 5, author=author)
+        rebuild_stats()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(large), len(small))
+        self.assertContains(response, 'Many Book 0')
+        author_filter = response.context['cl'].filter_specs[0]
+        self.assertEqual(len(author_filter.lookup_choices), author_filter.max_choices)
+        
+    def test_author_filter(self):
+        """Test filtering by an author outside the offered choices."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:api_book_changelist')
+        Book.objects.create(title='Other Book', publication_year=2003, author=self.other)
+        response = self.client.get(url, {'author__id__exact': self.other.pk, 'publication_year': 2003})
+        
+        self.assertContains(response, 'Other Book')
+        self.assertNotContains(response, 'Snapshot Book')
+        
+    def test_invalid_filter_values(self):
+        """Test that non-numeric filter values match nothing instead of failing."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:api_book_changelist')
+        for params in ({'author__id__exact': '²'}, {'author__id__exact': '9' * 30}, {'publication_year': '-²'}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotContains(response, 'Snapshot Book')
+                
+    def test_autocomplete(self):
+        """Test that the Book form uses the paginated author autocomplete."""
+        self.client.force_login(self.admin)
+        Author.objects.bulk_create(Author(name=f'Listed Author {i}') for i in range(30))
+        response = self.client.get(reverse('admin:api_book_add'))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Listed Author 1')
+        
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'api', 'model_name': 'book', 'field_name': 'author', 'term': 'Listed',
+        })
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertTrue(data['pagination']['more'])
+
+
+class ImportBooksTestCase(APITestCase):
+    """
+    Test cases for the import_books management command.
+    
+    Tests:
+    - CSV and NDJSON files are imported with authors resolved by name
+    - Re-running an import creates nothing (natural key upsert)
+    - Invalid records (including future years, as in the API) are counted
+      and reported, valid ones still imported
+    - Interrupted imports resume from the checkpoint offset
+    - Quoted CSV fields may span lines
+    - Counters, statistics, snapshots and the search index stay in sync
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.author = Author.objects.create(name='Ursula K. Le Guin')
+        Book.objects.create(title='The Dispossessed', publication_year=1974, author=self.author)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+        
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_books', *args, stdout=out, stderr=StringIO())
+        return json.loads(out.getvalue())
+        
+    def csv_file(self):
+        return self.write('books.csv', (
+            'title,author,publication_year\n'
+            'The Dispossessed,Ursula K. Le Guin,1974\n'
+            'The Left Hand of Darkness,Ursula K. Le Guin,1969\n'
+            'Dune,Frank Herbert,1965\n'
+            'Dune,Frank Herbert,1965\n'
+            '"Children of Dune, Part One",Frank Herbert,1976\n'
+        ))
+        
+    def test_csv_import(self):
+        """Test importing a CSV file with existing, new and repeated books."""
+        report = self.run_import(self.csv_file())
+        
+        self.assertEqual(
+            {key: report[key] for key in ('read', 'created', 'existing', 'invalid', 'authors_created')},
+            {'read': 5, 'created': 3, 'existing': 2, 'invalid': 0, 'authors_created': 1},
+        )
+        self.assertIn('rows_per_s', report)
+        herbert = Author.objects.get(name='Frank Herbert')
+        self.assertEqual(Book.objects.filter(author=herbert).count(), 2)
+        self.assertEqual(Book.objects.filter(author=self.author).count(), 2)
+        
+    def test_ndjson_import(self):
+        """Test importing an NDJSON file."""
+        path = self.write('books.ndjson', (
+            '{"title": "Lathe of Heaven", "author": "Ursula K. Le Guin", "publication_year": 1971}\n'
+            '\n'
+            '{"title": "Kindred", "author": "Octavia E. Butler", "publication_year": "1979"}\n'
+        ))
+        report = self.run_import(path)
+        
+        self.assertEqual((report['read'], report['created']), (2, 2))
+        self.assertEqual(Book.objects.get(title='Kindred').publication_year, 1979)
+        
+    def test_import_is_idempotent(self):
+        """Test that importing the same file twice creates nothing the second time."""
+        path = self.csv_file()
+        self.run_import(path)
+        books, authors = Book.objects.count(), Author.objects.count()
+        
+        report = self.run_import(path)
+        
+        self.assertEqual((report['created'], report['existing'], report['authors_created']), (0, 5, 0))
+        self.assertEqual((Book.objects.count(), Author.objects.count()), (books, authors))
+        
+    def test_invalid_records(self):
+        """Test that invalid records are reported without stopping the import."""
+        path = self.write('books.csv', (
+            'title,author,publication_year\n'
+            ',Nobody,2000\n'
+            'No Year,Somebody,soon\n'
+            'Too,Many,Columns,Here\n'
+            'Future Book,Somebody,3000\n'
+            'Valid Book,Ursula K. Le Guin,2000\n'
+        ))
+        report = self.run_import(path)
+        
+        self.assertEqual((report['invalid'], report['created']), (4, 1))
+        self.assertEqual(
+            [error['error'] for error in report['errors']],
+            ['title is required', 'publication_year must be an integer', 'Expected 3 columns, got 4',
+             f'publication_year cannot be in the future (current year is {datetime.now().year})'],
+        )
+        self.assertFalse(Book.objects.filter(title='Future Book').exists())
+        
+    def test_unknown_authors_rejected(self):
+        """Test that --no-create-authors rejects records of unknown authors."""
+        report = self.run_import(self.csv_file(), '--no-create-authors')
+        
+        self.assertEqual((report['created'], report['invalid']), (1, 3))
+        self.assertFalse(Author.objects.filter(name='Frank Herbert').exists())
+        
+    def test_resume_from_checkpoint(self):
+        """Test that a failed import resumes after the last committed batch."""
+        path = self.csv_file()
+        checkpoint = f'{path}.checkpoint'
+        original = Book.objects.bulk_create
+        calls = []
+        
+        def fail_second_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('Interrupted')
+            return original(*args, **kwargs)
+            
+        with mock.patch.object(Book.objects, 'bulk_create', side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, '--batch-size', '2')
+        self.assertEqual(Book.objects.filter(title='The Left Hand of Darkness').count(), 1)
+        self.assertFalse(Book.objects.filter(title='Dune').exists())
+        offset = load_checkpoint(checkpoint)['offset']
+        
+        report = self.run_import(path, '--resume', '--batch-size', '2')
+        
+        self.assertEqual((report['read'], report['created']), (3, 2))
+        self.assertEqual(Book.objects.filter(title='Dune').count(), 1)
+        self.assertFalse(os.path.exists(checkpoint))
+        with open(path, 'rb') as stream:
+            stream.seek(offset)
+            self.assertTrue(stream.readline().startswith(b'Dune,'))
+            
+    def test_multiline_csv_field(self):
+        """Test a quoted CSV field spanning lines, and record end offsets."""
+        path = self.write('books.csv', (
+            'title,author,publication_year\n'
+            '"A Title\nOn Two Lines",Someone,2000\n'
+            'Next,Someone,2001\n'
+        ))
+        records = list(iter_records(path, 'csv'))
+        
+        self.assertEqual([record['title'] for record, _, _ in records], ['A Title\nOn Two Lines', 'Next'])
+        self.assertEqual(records[-1][1], os.path.getsize(path))
+        
+    def test_derived_data_in_sync(self):
+        """Test book counts, statistics, snapshots and search after an import."""
+        self.run_import(self.csv_file())
+        herbert = Author.objects.get(name='Frank Herbert')
+        
+        self.assertEqual(herbert.book_count, 2)
+        self.assertEqual(Author.objects.get(pk=self.author.pk).book_count, 2)
+        stored = {
+            (dimension, value): count
+            for dimension, value, count in CatalogStat.objects.values_list('dimension', 'value', 'count')
+            if count
+        }
+        self.assertEqual(stored, {key: count for key, count in compute_stats().items() if count})
+        self.assertEqual(Book.objects.get(title='Dune').author_name, 'Frank Herbert')
+        response = self.client.get(reverse('book-list'), {'search': 'herbert'})
+        self.assertEqual(response.data['count'], 2)
+
+
+class ParallelImportTestCase(APITestCase):
+    """
+    Test cases for the multiprocess import (import_books --workers).
+    
+    Tests:
+    - Byte ranges start on record boundaries, also inside quoted CSV fields
+    - Parallel and serial imports store the same books
+    - Re-running a parallel import creates nothing
+    - A parallel import resumes the unfinished ranges of its checkpoint
+    - Workers reject future years; a dead worker fails the import
+    """
+    
+    def setUp(self):
+        """Set up test data."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'books.csv')
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            stream.write('title,author,publication_year\n')
+            for i in range(200):
+                title = f'"Long\nTitle {i}"' if i % 7 == 0 else f'Book {i}'
+                stream.write(f'{title},Author {i % 9},{1950 + i % 30}\n')
+                
+    def stored(self):
+        return sorted(Book.objects.values_list('title', 'author__name', 'publication_year'))
+        
+    def test_split_ranges(self):
+        """Test that ranges cover the file and each one parses on its own."""
+        ranges = split_ranges(self.path, 'csv', 8)
+        header = ['title', 'author', 'publication_year']
+        
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.path))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+        titles = [
+            record['title']
+            for start, end in ranges
+            for record, _, error in iter_records(self.path, 'csv', start=start, end=end, header=header)
+            if error is None
+        ]
+        self.assertEqual(titles, [record['title'] for record, _, _ in iter_records(self.path, 'csv')])
+        
+    def test_same_books_as_serial(self):
+        """Test that a parallel import stores what a serial import stores."""
+        out = StringIO()
+        call_command('import_books', self.path, stdout=out)
+        serial = self.stored()
+        Book.objects.all().delete()
+        
+        report = import_parallel(self.path, workers=2, batch_size=16)
+        
+        self.assertEqual((report['read'], report['created'], report['workers']), (200, 200, 2))
+        self.assertEqual(self.stored(), serial)
+        self.assertEqual(Author.objects.get(name='Author 0').book_count, 23)
+        
+    def test_rerun_is_idempotent(self):
+        """Test that a second parallel import finds every book."""
+        import_parallel(self.path, workers=2, batch_size=16)
+        report = import_parallel(self.path, workers=2, batch_size=16)
+        
+        self.assertEqual((report['created'], report['existing']), (0, 200))
+        self.assertEqual(Book.objects.count(), 200)
+        
+    def test_resume_ranges(self):
+        """Test resuming from a checkpoint with a finished and an unstarted range."""
+        ranges = split_ranges(self.path, 'csv', 2)
+        (first_start, first_end), (second_start, second_end) = ranges
+        checkpoint = f'{self.path}.checkpoint'
+        with open(checkpoint, 'w', encoding='utf-8') as stream:
+            json.dump({
+                'path': os.path.abspath(self.path),
+                'ranges': [[first_start, first_end, first_end], [second_start, second_end, second_start]],
+            }, stream)
+        expected = sum(1 for _ in iter_records(self.path, 'csv', start=second_start))
+        
+        out = StringIO()
+        call_command('import_books', self.path, '--resume', stdout=out, stderr=StringIO())
+        
+        self.assertEqual(json.loads(out.getvalue())['created'], expected)
+        self.assertEqual(Book.objects.count(), expected)
+        self.assertFalse(os.path.exists(checkpoint))
+        
+    def test_future_years_rejected(self):
+        """Test that workers apply the API's publication year rule."""
+        with open(self.path, 'a', encoding='utf-8') as stream:
+            stream.write('Future Book,Author 1,3000\n')
+            
+        report = import_parallel(self.path, workers=2, batch_size=16)
+        
+        self.assertEqual((report['created'], report['invalid']), (200, 1))
+        self.assertFalse(Book.objects.filter(title='Future Book').exists())
+        
+    def test_dead_worker_fails(self):
+        """Test that the import fails instead of hanging when a worker dies."""
+        def killed(*args, **kwargs):
+            os._exit(9)
+            
+        with mock.patch('api.parallel_import.parse_range', killed), \
+                mock.patch('api.parallel_import.POLL_SECONDS', 0.1):
+            with self.assertRaisesMessage(ImportFileError, 'exited with code 9'):
+                import_parallel(self.path, workers=2, batch_size=16)
+
+
+REPLICAS = {'ENABLED': True, 'ALIASES': ['replica'], 'STICKY_SECONDS': 5, 'CACHE_ALIAS': 'default'}
+
+
+@override_settings(API_READ_REPLICAS=REPLICAS, API_RESPONSE_CACHE={'ENABLED': False},
+                   API_THROTTLING={'ENABLED': False})
+class ReadReplicaTestCase(APITransactionTestCase):
+    """
+    Test cases for read-replica routing.
+    
+    The 'replica' alias mirrors the test database, so queries can be
+    attributed to an alias while reading the same rows.
+    
+    Tests:
+    - GETs of the read views (sync and async) query the replica only
+    - Writes, and reads made by write views, use the primary
+    - After a write the client reads from the primary (cookie or user pin)
+    - Routing is off unless enabled
+    - The router never migrates replicas; replicate_db copies the primary
+    """
+    databases = {'default', 'replica'}
+    
+    def setUp(self):
+        """Set up test data."""
+        caches['default'].clear()
+        self.author = Author.objects.create(name='Replica Author')
+        self.book = Book.objects.create(title='Replica Book', publication_year=2001, author=self.author)
+        self.user = User.objects.create_user(username='replica', password='replica123')
+        self.token = Token.objects.create(user=self.user)
+        
+    def queries(self, method, url, data=None, client=None):
+        """Return (response, primary query count, replica query count)."""
+        client = client or self.client
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(client, method)(url, data, format='json')
+        return response, len(primary), len(replica)
+        
+    def test_reads_use_replica(self):
+        """Test that list and detail GETs read from the replica only."""
+        for url in (reverse('book-list'), reverse('book-detail', kwargs={'pk': self.book.pk}),
+                    reverse('author-list'), reverse('author-detail', kwargs={'pk': self.author.pk})):
+            response, primary, replica = self.queries('get', url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+            
+    def test_async_reads_use_replica(self):
+        """Test that the async list view reads from the replica unless pinned."""
+        client = AsyncClient()
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = async_to_sync(client.get)(reverse('async-book-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(replica), 0)
+        
+        client.cookies['api_primary_pin'] = '1'
+        with CaptureQueriesContext(connections['replica']) as replica:
+            async_to_sync(client.get)(reverse('async-book-list'))
+        self.assertEqual(len(replica), 0)
+        
+    def test_writes_use_primary(self):
+        """Test that a write view reads and writes on the primary."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response, primary, replica = self.queries('post', reverse('book-create'), {
+            'title': 'Primary Book', 'publication_year': 2002, 'author': self.author.pk,
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        
+    def test_read_after_write(self):
+        """Test that a client reads from the primary for a while after writing."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.patch(reverse('book-update', kwargs={'pk': self.book.pk}),
+                                     {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.cookies['api_primary_pin']['max-age'], 5)
+        
+        _, _, replica = self.queries('get', reverse('book-list'))
+        self.assertEqual(replica, 0)
+        
+        # Without the cookie, the token still identifies the pinned user
+        other = APIClient()
+        other.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        _, _, replica = self.queries('get', reverse('book-list'), client=other)
+        self.assertEqual(replica, 0)
+        
+        caches['default'].clear()
+        _, _, replica = self.queries('get', reverse('book-list'), client=other)
+        self.assertGreater(replica, 0)
+        
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': True, 'ALIAS': 'default'})
+    def test_lagging_replica_not_cached(self):
+        """Test that a page read from a lagging replica is not cached for everyone."""
+        self.client.get(reverse('book-list'))
+        new_book = Book.objects.create(title='Fresh Book', publication_year=2003, author=self.author)
+        get_queryset = BookListView.get_queryset
+        
+        def lagging(view):
+            # The replica has not received the new book yet
+            queryset = get_queryset(view)
+            return queryset.exclude(pk=new_book.pk) if queryset.db == 'replica' else queryset
+            
+        with mock.patch.object(BookListView, 'get_queryset', lagging):
+            stale = self.client.get(reverse('book-list'))
+            again = self.client.get(reverse('book-list'))
+        self.assertEqual(stale.data['count'], 1)
+        self.assertEqual(again['X-Cache'], 'MISS')
+        
+        # Once the replica has caught up, nobody gets the stale page
+        response = self.client.get(reverse('book-list'))
+        self.assertEqual(response.data['count'], 2)
+        self.assertIn('Fresh Book', [book['title'] for book in response.data['results']])
+        
+        # Responses read from the primary are still cached
+        other = APIClient()
+        other.cookies['api_primary_pin'] = '1'
+        other.get(reverse('book-list'))
+        self.assertEqual(self.client.get(reverse('book-list'))['X-Cache'], 'HIT')
+        
+    def test_failed_write_not_pinned(self):
+        """Test that a rejected write does not pin the client."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.post(reverse('book-create'), {'title': ''}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('api_primary_pin', response.cookies)
+        
+    def test_disabled(self):
+        """Test that all reads use the primary when routing is disabled."""
+        with override_settings(API_READ_REPLICAS={**REPLICAS, 'ENABLED': False}):
+            _, primary, replica = self.queries('get', reverse('book-list'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        
+    def test_router(self):
+        """Test the router decisions outside and inside a routed request."""
+        router = ReadReplicaRouter()
+        self.assertIsNone(router.db_for_read(Book))
+        token = use_replica('replica')
+        try:
+            self.assertEqual(router.db_for_read(Book), 'replica')
+            self.assertEqual(router.db_for_write(Book), 'default')
+        finally:
+            reset_replica(token)
+        self.assertFalse(router.allow_migrate('replica', 'api'))
+        self.assertIsNone(router.allow_migrate('default', 'api'))
+        
+    def test_replicate(self):
+        """Test that replicate() copies a SQLite file into another."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        source, target = (os.path.join(directory.name, name) for name in ('primary.db', 'replica.db'))
+        with sqlite3.connect(source) as primary:
+            primary.execute('CREATE TABLE book (title TEXT)')
+            primary.execute("INSERT INTO book VALUES ('Copied')")
+        primary.close()
+        
+        replicate(source, target)
+        
+        replica = sqlite3.connect(target)
+        self.addCleanup(replica.close)
+        self.assertEqual(replica.execute('SELECT title FROM book').fetchall(), [('Copied',)])
+
+
+class ConnectionPoolTestCase(TestCase):
+    """
+    Test cases for the pooled SQLite backend (api.sqlite_pool) and its pragmas.
+    
+    Tests:
+    - A closed connection is reused by the next connect, also from another thread
+    - Expired, broken and surplus connections are closed instead of reused
+    - A connection closed inside a transaction is rolled back before reuse
+    - The configured pragmas (WAL, synchronous, mmap, busy timeout) are applied
+    """
+    
+    def setUp(self):
+        """Set up a pooled connection to a temporary database file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings_dict = {
+            **connection.settings_dict,
+            'NAME': os.path.join(self.directory.name, 'pooled.sqlite3'),
+            'ENGINE': 'api.sqlite_pool',
+            'OPTIONS': {**settings.SQLITE_OPTIONS, 'pool': {'MAX_SIZE': 2, 'MAX_AGE': 300}},
+        }
+        
+    def wrapper(self):
+        wrapper = PooledDatabaseWrapper(self.settings_dict, alias='pooled')
+        self.addCleanup(wrapper.pool.clear)
+        return wrapper
+        
+    def test_reuse(self):
+        """Test that the next connection, in any thread, reuses the closed one."""
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertEqual(len(wrapper.pool), 1)
+        
+        reused = []
+        
+        def connect():
+            other = PooledDatabaseWrapper(self.settings_dict, alias='pooled')
+            other.ensure_connection()
+            reused.append(other.connection)
+            other.close()
+            
+        thread = threading.Thread(target=connect)
+        thread.start()
+        thread.join()
+        self.assertIs(reused[0], raw)
+        self.assertEqual(wrapper.pool.stats['reused'], 1)
+        
+    def test_expired_and_broken(self):
+        """Test that expired or broken pooled connections are replaced."""
+        pool = ConnectionPool(max_size=2, max_age=60)
+        first, second = sqlite3.connect(':memory:'), sqlite3.connect(':memory:')
+        pool.checkin(first, time.monotonic() - 120)
+        pool.checkin(second, time.monotonic())
+        second.close()
+        
+        self.assertEqual(len(pool), 1)
+        self.assertIsNone(pool.checkout())
+        self.assertEqual(pool.stats['discarded'], 2)
+        
+    def test_max_size(self):
+        """Test that at most MAX_SIZE idle connections are kept."""
+        pool = ConnectionPool(max_size=2, max_age=None)
+        for _ in range(3):
+            pool.checkin(sqlite3.connect(':memory:'), time.monotonic())
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.stats['discarded'], 1)
+        
+    def test_rollback_on_checkin(self):
+        """Test that an unfinished transaction is rolled back before reuse."""
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (name TEXT)')
+        wrapper.set_autocommit(False)
+        with wrapper.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES ('uncommitted')")
+        wrapper.close()
+        
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertEqual(wrapper.pool.stats['reused'], 1)
+        wrapper.close()
+        
+    def test_pragmas(self):
+        """Test that new connections get the tuned pragmas."""
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            values = {}
+            for pragma in ('journal_mode', 'synchronous', 'mmap_size', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {pragma}')
+                values[pragma] = cursor.fetchone()[0]
+        wrapper.close()
+        
+        self.assertEqual(values['journal_mode'], 'wal')
+        self.assertEqual(values['synchronous'], 1)  # NORMAL
+        self.assertGreater(values['mmap_size'], 0)
+        self.assertEqual(values['busy_timeout'], 5000)
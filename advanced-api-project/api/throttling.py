@@ -0,0 +1,259 @@
+"""
+Sliding-window rate limiting for the write endpoints.
+
+``SlidingWindowThrottle`` is a DRF throttle class. A view opts in with a
+``throttle_scope`` (and optionally its own ``throttle_rate``); the rate for
+a scope comes from ``API_THROTTLING['RATES']``, e.g. ``'book-write':
+'120/min'``. Requests are counted per scope and client: authenticated
+requests per user (a user has exactly one API token, so this is also per
+token), anonymous requests per client address.
+
+DRF's ``SimpleRateThrottle`` keeps a list of request timestamps per client
+and rewrites it on every request. Here each client has two counters
+instead, for the current and the previous fixed window, and the request
+count over the last ``window`` seconds is estimated as::
+
+    previous * (1 - elapsed fraction of the current window) + current
+
+That is constant memory per client and one increment per request. The
+request is counted first and uncounted if it is over the limit, so
+concurrent requests can never be admitted beyond the limit. A rejected
+request gets a 429 with a ``Retry-After`` header: the time until the
+estimate leaves room for one more request.
+
+Counter stores (``BACKEND``):
+    local: A dict in this process (per-process limits, no I/O)
+    cache: The Django cache ``CACHE_ALIAS`` (limits shared by every process
+        using that cache; use Redis or Memcached in production)
+
+Settings (``API_THROTTLING``):
+    ENABLED: Enforce the rates
+    BACKEND: 'local' or 'cache'
+    CACHE_ALIAS: Cache used by the 'cache' backend
+    MAX_KEYS: Client counters kept by the 'local' backend before stale ones
+        are pruned
+    RATES: Mapping of scope -> 'requests/period' (s, min, hour or day)
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+from .cache import _key
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'MAX_KEYS': 100000,
+    'RATES': {},
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_throttle_settings():
+    """Return the throttling settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_THROTTLING', {})}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate such as ``'120/min'``.
+
+    Returns:
+        tuple: (number of requests, window in seconds)
+
+    Raises:
+        ImproperlyConfigured: If the rate is malformed
+    """
+    try:
+        requests, period = rate.split('/')
+        return int(requests), PERIODS[period.strip()[0]]
+    except (AttributeError, ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}; use e.g. "120/min".')
+
+
+def estimate_requests(previous, current, now, window):
+    """Return the sliding-window request count at ``now``."""
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+def retry_after(previous, current, limit, now, window):
+    """
+    Return the seconds until one more request fits under ``limit``.
+
+    Args:
+        previous: Requests counted in the previous window
+        current: Requests counted in the current window (without the
+            rejected one)
+        limit: Requests allowed per window
+        now: Current time in seconds
+        window: Window length in seconds
+    """
+    window_start = now - now % window
+    if current + 1 <= limit:
+        # The previous window's weight has to drop far enough
+        fraction = 1 - (limit - current - 1) / previous
+        return max(window_start + fraction * window - now, 0)
+    # Only after this window ends, once its weight has dropped far enough
+    fraction = max(1 - (limit - 1) / current, 0) if current else 0
+    return window_start + window + fraction * window - now
+
+
+class LocalWindowStore:
+    """
+    Thread-safe in-process window counters.
+
+    Each key maps to ``[window index, previous count, current count, window]``.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, now, window, max_keys=DEFAULTS['MAX_KEYS']):
+        """
+        Count a request for ``key``.
+
+        Returns:
+            tuple: (previous window count, current window count including
+            this request)
+        """
+        index = int(now // window)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                if len(self._counters) >= max_keys:
+                    self.prune(now)
+                counter = self._counters[key] = [index, 0, 0, window]
+            elif counter[0] != index:
+                counter[1] = counter[2] if counter[0] == index - 1 else 0
+                counter[0], counter[2] = index, 0
+            counter[2] += 1
+            return counter[1], counter[2]
+
+    def undo(self, key, now, window):
+        """Uncount a request counted by ``hit()`` at ``now``."""
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == int(now // window) and counter[2]:
+                counter[2] -= 1
+
+    def prune(self, now):
+        """Drop counters whose windows are too old to affect any estimate."""
+        stale = [key for key, (index, _, _, window) in self._counters.items() if (index + 2) * window <= now]
+        for key in stale:
+            del self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheWindowStore:
+    """
+    Window counters in a Django cache, shared by every process using it.
+
+    One key per client and window, expiring after two windows. A request
+    costs an ``add`` + ``incr`` on the current window and a ``get`` of the
+    previous one.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def window_key(self, key, index):
+        return _key('throttle', key, index)
+
+    def hit(self, key, now, window, max_keys=None):
+        index = int(now // window)
+        current_key = self.window_key(key, index)
+        self.cache.add(current_key, 0, timeout=2 * window + 1)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr()
+            self.cache.set(current_key, 1, timeout=2 * window + 1)
+            current = 1
+        previous = self.cache.get(self.window_key(key, index - 1), 0)
+        return previous, current
+
+    def undo(self, key, now, window):
+        try:
+            self.cache.decr(self.window_key(key, int(now // window)))
+        except ValueError:
+            pass
+
+
+local_store = LocalWindowStore()
+
+
+def get_store(options):
+    """Return the counter store selected by ``BACKEND``."""
+    if options['BACKEND'] == 'cache':
+        return CacheWindowStore(caches[options['CACHE_ALIAS']])
+    if options['BACKEND'] == 'local':
+        return local_store
+    raise ImproperlyConfigured(f"Unknown throttle backend {options['BACKEND']!r}; use 'local' or 'cache'.")
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle enforcing ``view.throttle_scope``'s rate with a sliding window.
+
+    Views without a scope, or whose scope has no rate, are not throttled.
+
+    Attributes:
+        timer: Clock used for the windows (overridable in tests)
+    """
+    timer = time.time
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_rate(self, view, options):
+        rate = getattr(view, 'throttle_rate', None)
+        if rate is None:
+            rate = options['RATES'].get(getattr(view, 'throttle_scope', None))
+        return rate
+
+    def get_client_key(self, request):
+        """
+        Return the user (or, for anonymous requests, the client address) to count against.
+
+        The address honours ``REST_FRAMEWORK['NUM_PROXIES']``: X-Forwarded-For
+        is only trusted up to that many proxies.
+        """
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'addr:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        options = get_throttle_settings()
+        rate = self.get_rate(view, options)
+        if not options['ENABLED'] or rate is None:
+            return True
+
+        limit, window = parse_rate(rate)
+        scope = getattr(view, 'throttle_scope', None) or type(view).__name__
+        key = f'{scope}:{self.get_client_key(request)}'
+        now = self.timer()
+        store = get_store(options)
+        previous, current = store.hit(key, now, window, options['MAX_KEYS'])
+        if estimate_requests(previous, current, now, window) <= limit:
+            return True
+
+        store.undo(key, now, window)
+        self.retry_after = retry_after(previous, current - 1, limit, now, window)
+        return False
+
+    def wait(self):
+        return self.retry_after
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # API overview (accessible without authentication)
@@ -14,6 +14,8 @@ urlpatterns = [
     path('books/create/', views.BookCreateView.as_view(), name='book-create'),
     path('books/<int:pk>/update/', views.BookUpdateView.as_view(), name='book-update'),
     path('books/<int:pk>/delete/', views.BookDeleteView.as_view(), name='book-delete'),
+    path('books/bulk/', views.BookBulkView.as_view(), name='book-bulk'),
+    path('books/export/', views.BookExportView.as_view(), name='book-export'),
     
     # Additional simple URL patterns for update and delete
     path('books/update/', views.BookUpdateView.as_view(), name='book-update-simple'),
@@ -22,4 +24,16 @@ urlpatterns = [
     # Authors API endpoints (read-only)
     path('authors/', views.AuthorListView.as_view(), name='author-list'),
     path('authors/<int:pk>/', views.AuthorDetailView.as_view(), name='author-detail'),
+    
+    # Async (ASGI-native) versions of the read-only endpoints
+    path('async/books/', async_views.AsyncBookListView.as_view(), name='async-book-list'),
+    path('async/books/<int:pk>/', async_views.AsyncBookDetailView.as_view(), name='async-book-detail'),
+    path('async/authors/', async_views.AsyncAuthorListView.as_view(), name='async-author-list'),
+    path('async/authors/<int:pk>/', async_views.AsyncAuthorDetailView.as_view(), name='async-author-detail'),
+    
+    # Catalog statistics (books per year, top authors, totals)
+    path('stats/', views.catalog_stats, name='catalog-stats'),
+    
+    # Response cache statistics (admin only)
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
 ]
@@ -0,0 +1,212 @@
+"""
+Optional single-writer queue that coalesces book mutations.
+
+SQLite allows one writer at a time, and every committed transaction costs
+an fsync. With many concurrent write requests each request waits for the
+database lock (and eventually fails with "database is locked"), and the
+throughput is bounded by the number of commits per second.
+
+With ``API_WRITE_COALESCING['ENABLED']``, the book write views hand their
+``save()``/``delete()`` calls to ``submit()``. A single writer thread takes
+them off a queue and runs up to ``MAX_BATCH`` of them in one transaction.
+It waits at most ``FLUSH_INTERVAL`` seconds for a batch to fill; writes
+that arrive while a batch is being committed simply go into the next one.
+Each write runs in its own savepoint, so a failing write (a constraint
+violation, say) is rolled back alone and its exception is raised in the
+request that submitted it.
+
+``submit()`` blocks until the batch holding the write has committed, so a
+request still only answers once its write is durable, and reads that
+follow see it. Signals and ``on_commit`` callbacks run in the writer
+thread.
+
+Writes submitted from inside a transaction (for example ``TestCase`` or a
+caller's ``atomic()`` block) run inline: the writer thread could not see
+the caller's uncommitted rows, and on SQLite it would wait for the
+caller's lock.
+
+Settings (``API_WRITE_COALESCING``):
+    ENABLED: Route book writes through the writer thread
+    MAX_BATCH: Most writes committed in one transaction
+    FLUSH_INTERVAL: Seconds the writer waits for more writes before
+        committing a batch (0 commits whatever is already queued)
+    TIMEOUT: Seconds a request waits for its write before giving up
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_BATCH': 100,
+    'FLUSH_INTERVAL': 0.002,
+    'TIMEOUT': 30,
+}
+
+_STOP = object()
+
+
+def get_write_queue_settings():
+    """Return the write coalescing settings merged with the defaults."""
+    return {**DEFAULTS, **getattr(settings, 'API_WRITE_COALESCING', {})}
+
+
+class WriteQueueTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The write could not be completed in time; try again.'
+    default_code = 'write_timeout'
+
+
+class WriteJob:
+    """A queued write: a callable and the future its caller waits on."""
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class WriteQueue:
+    """
+    A queue of writes drained by one writer thread in batched transactions.
+
+    Attributes:
+        using: Database alias the batches are committed on
+        stats: Counters of committed ``batches`` and ``writes``
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.stats = {'batches': 0, 'writes': 0}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the writer thread if it is not running."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run, name='api-write-queue', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        """Commit the queued writes, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue ``func(*args, **kwargs)`` and wait until it has been committed.
+
+        Returns:
+            The return value of ``func``
+
+        Raises:
+            Whatever ``func`` raised, or WriteQueueTimeout if the write was
+            not committed within ``TIMEOUT`` seconds (it is cancelled if it
+            had not started yet)
+        """
+        job = WriteJob(func, args, kwargs)
+        self.start()
+        self._queue.put(job)
+        try:
+            return job.future.result(timeout=get_write_queue_settings()['TIMEOUT'])
+        except FutureTimeout:
+            job.future.cancel()
+            raise WriteQueueTimeout()
+
+    def run(self):
+        try:
+            while True:
+                batch, stopping = self.collect()
+                if batch:
+                    self.flush(batch)
+                if stopping:
+                    return
+        finally:
+            connections[self.using].close()
+
+    def collect(self):
+        """
+        Block for the next write, then gather more for up to FLUSH_INTERVAL.
+
+        Returns:
+            tuple: (list of jobs, whether a stop was requested)
+        """
+        options = get_write_queue_settings()
+        job = self._queue.get()
+        if job is _STOP:
+            return [], True
+        batch = [job]
+        deadline = time.monotonic() + options['FLUSH_INTERVAL']
+        while len(batch) < options['MAX_BATCH']:
+            try:
+                remaining = deadline - time.monotonic()
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def flush(self, batch):
+        """Run ``batch`` in one transaction, each write in its own savepoint."""
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            with transaction.atomic(using=self.using):
+                for job in batch:
+                    try:
+                        with transaction.atomic(using=self.using):
+                            outcomes.append((job, job.run(), None))
+                    except Exception as exc:
+                        outcomes.append((job, None, exc))
+        except Exception as exc:
+            # The commit itself failed: none of the writes happened
+            connections[self.using].close_if_unusable_or_obsolete()
+            for job in batch:
+                job.future.set_exception(exc)
+            return
+
+        self.stats['batches'] += 1
+        self.stats['writes'] += len(batch)
+        for job, result, exc in outcomes:
+            if exc is not None:
+                job.future.set_exception(exc)
+            else:
+                job.future.set_result(result)
+
+
+write_queue = WriteQueue()
+
+
+def run_write(func, *args, **kwargs):
+    """
+    Run a database write, through the write queue when coalescing is enabled.
+
+    Writes run inline when coalescing is disabled or the caller is already
+    inside a transaction.
+    """
+    if (not get_write_queue_settings()['ENABLED']
+            or transaction.get_connection(write_queue.using).in_atomic_block):
+        return func(*args, **kwargs)
+    return write_queue.submit(func, *args, **kwargs)
+
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -75,10 +76,32 @@ WSGI_APPLICATION = 'api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Keep each thread's connection for DB_CONN_MAX_AGE seconds instead of
+# opening one per request; it is checked before reuse (CONN_HEALTH_CHECKS).
+# Under ASGI, where requests run in short-lived threads, set it to 0.
+# The SQLite pragmas run on every new connection:
+# - busy_timeout: wait for a lock instead of failing at once (first, so
+#   the journal mode switch waits too)
+# - journal_mode=WAL: readers and the writer no longer block each other
+# - synchronous=NORMAL: with WAL, fsync at checkpoints instead of every commit
+# - mmap_size: read pages through a memory map
+# Transactions start with BEGIN IMMEDIATE, so writers wait for the lock up
+# front instead of failing when a read transaction cannot be upgraded.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join([
+                f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+            ]),
+        },
     }
 }
 